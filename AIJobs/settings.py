@@ -86,6 +86,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'users.context_processors.notification_count',
+                'jobs.page_cache.csrf_placeholder',
             ],
         },
     },
@@ -124,6 +125,42 @@ else:
     }
 
 
+# Caches
+# "pages" holds rendered public pages and fragments for anonymous visitors. It is
+# file-based so every worker process on the host sees the same invalidations.
+# "shared" holds state that web workers and the qcluster must agree on (subscription
+# entitlements, the M-Pesa access token). It uses Redis when REDIS_URL is set and a
+# host-local file cache otherwise.
+if os.environ.get('REDIS_URL'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SHARED_CACHE_DIR', str(BASE_DIR / 'cache' / 'shared')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'aijobs-default',
+    },
+    'shared': SHARED_CACHE,
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('PAGE_CACHE_DIR', str(BASE_DIR / 'cache' / 'pages')),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+PAGE_CACHE_ALIAS = 'pages'
+SHARED_CACHE_ALIAS = 'shared'
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 300))  # seconds
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -167,16 +204,26 @@ LOGOUT_REDIRECT_URL = 'index'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Pre-generated sitemap files (see home.sitemaps.SitemapBuilder)
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITEMAP_PROTOCOL = os.environ.get('SITEMAP_PROTOCOL', 'https')
+SITEMAP_REBUILD_DELAY = int(os.environ.get('SITEMAP_REBUILD_DELAY', 300))  # seconds to batch listing changes
+
 # Email Configuration
 # Use SMTP if credentials are available, otherwise use console backend
 if os.environ.get('EMAIL_HOST') and os.environ.get('EMAIL_HOST_USER'):
-    EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    # Keeps authenticated SMTP connections alive per worker (see home/email_backends.py)
+    EMAIL_BACKEND = 'home.email_backends.PooledSMTPEmailBackend'
     EMAIL_HOST = os.environ.get('EMAIL_HOST')
     EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
     EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True').lower() == 'true'
     EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
     EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
     DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
+    EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 30))
+    EMAIL_POOL_MAX_MESSAGES = int(os.environ.get('EMAIL_POOL_MAX_MESSAGES', 100))
+    EMAIL_POOL_MAX_AGE = int(os.environ.get('EMAIL_POOL_MAX_AGE', 300))  # seconds
+    EMAIL_POOL_HEALTHCHECK_INTERVAL = int(os.environ.get('EMAIL_POOL_HEALTHCHECK_INTERVAL', 30))  # idle seconds before NOOP
 else:
     # Fallback to console backend for development/testing
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -184,6 +231,49 @@ else:
 
 # AI Configuration
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL')  # e.g. http://127.0.0.1:8765/v1 for run_fake_openai
+# 'openai', or 'fake' for the deterministic in-process stand-in (home.fake_openai)
+AI_BACKEND = os.environ.get('AI_BACKEND', 'openai')
+AI_FAKE_LATENCY = float(os.environ.get('AI_FAKE_LATENCY', 0))  # seconds added to each fake completion
+
+# Per-job analytics snapshot cache lifetime in seconds (0 disables caching)
+JOB_ANALYTICS_CACHE_TIMEOUT = int(os.environ.get('JOB_ANALYTICS_CACHE_TIMEOUT', 300))
+
+# Cached subscription tier/expiry lifetime in seconds; saves invalidate it sooner
+ENTITLEMENT_CACHE_TIMEOUT = int(os.environ.get('ENTITLEMENT_CACHE_TIMEOUT', 600))
+
+# Existing companies offered to the model when parsing a job posting
+AI_COMPANY_PROMPT_CANDIDATES = int(os.environ.get('AI_COMPANY_PROMPT_CANDIDATES', 10))
+
+# Bulk job imports (jobs.importers)
+JOB_IMPORT_CHUNK_SIZE = int(os.environ.get('JOB_IMPORT_CHUNK_SIZE', 100))  # postings per transaction
+AI_IMPORT_WORKERS = int(os.environ.get('AI_IMPORT_WORKERS', 4))  # concurrent AI parse requests
+AI_IMPORT_REQUESTS_PER_MINUTE = int(os.environ.get('AI_IMPORT_REQUESTS_PER_MINUTE', 60))
+AI_IMPORT_TASK_TIMEOUT_MARGIN = int(os.environ.get('AI_IMPORT_TASK_TIMEOUT_MARGIN', 120))  # seconds on top of a chunk's rate-limited parse time
+JOB_NOTIFICATION_TASK_TIMEOUT = int(os.environ.get('JOB_NOTIFICATION_TASK_TIMEOUT', 600))  # seconds per chunk of import notifications
+
+# Near-duplicate job listings (jobs.duplicates). New listings within
+# JOB_DUPLICATE_MAX_DISTANCE bits (at most 5, the index's band limit) of an active one
+# are saved inactive with duplicate_of set.
+JOB_DUPLICATE_DETECTION = os.environ.get('JOB_DUPLICATE_DETECTION', 'True').lower() == 'true'
+JOB_DUPLICATE_MAX_DISTANCE = min(int(os.environ.get('JOB_DUPLICATE_MAX_DISTANCE', 4)), 5)
+JOB_DUPLICATE_INDEX_SYNC_INTERVAL = int(os.environ.get('JOB_DUPLICATE_INDEX_SYNC_INTERVAL', 60))
+
+# Precomputed job recommendations (jobs.recommendations)
+JOB_RECOMMENDATIONS_PER_USER = int(os.environ.get('JOB_RECOMMENDATIONS_PER_USER', 20))
+JOB_RECOMMENDATION_CANDIDATES = int(os.environ.get('JOB_RECOMMENDATION_CANDIDATES', 5000))  # newest listings scored on a full refresh
+JOB_RECOMMENDATION_REFRESH_DELAY = int(os.environ.get('JOB_RECOMMENDATION_REFRESH_DELAY', 60))  # seconds; batches a burst of profile edits
+JOB_RECOMMENDATION_LISTING_DELAY = int(os.environ.get('JOB_RECOMMENDATION_LISTING_DELAY', 300))  # seconds; batches new listings into one scoring pass
+JOB_RECOMMENDATION_TASK_TIMEOUT = int(os.environ.get('JOB_RECOMMENDATION_TASK_TIMEOUT', 600))  # seconds per scoring pass
+
+# Results of manage.py run_benchmarks, one entry per run (see jobs.benchmarks)
+BENCHMARK_HISTORY_FILE = os.environ.get('BENCHMARK_HISTORY_FILE', BASE_DIR / 'benchmarks' / 'history.json')
+
+# How often each process picks up company changes made by other processes (seconds)
+COMPANY_INDEX_SYNC_INTERVAL = int(os.environ.get('COMPANY_INDEX_SYNC_INTERVAL', 60))
+
+# Rows fetched per database round-trip when streaming applicant exports
+APPLICANT_EXPORT_CHUNK_SIZE = int(os.environ.get('APPLICANT_EXPORT_CHUNK_SIZE', 2000))
 
 # M-Pesa Configuration
 MPESA_CONSUMER_KEY = os.environ.get('MPESA_CONSUMER_KEY')
@@ -234,6 +324,22 @@ MPESA_PASSKEY = os.environ.get('MPESA_PASSKEY')
 MPESA_SHORTCODE = os.environ.get('MPESA_SHORTCODE')
 MPESA_CALLBACK_URL = os.environ.get('MPESA_CALLBACK_URL')
 MPESA_ENVIRONMENT = os.environ.get('MPESA_ENVIRONMENT', 'sandbox') # sandbox or production
+MPESA_API_BASE_URL = os.environ.get('MPESA_API_BASE_URL')  # optional override, e.g. a local stub server
+MPESA_TOKEN_REFRESH_MARGIN = int(os.environ.get('MPESA_TOKEN_REFRESH_MARGIN', 300))  # refresh this many seconds before expiry
+MPESA_CONNECT_TIMEOUT = float(os.environ.get('MPESA_CONNECT_TIMEOUT', 5))  # seconds
+MPESA_READ_TIMEOUT = float(os.environ.get('MPESA_READ_TIMEOUT', 30))  # seconds
+MPESA_MAX_RETRIES = int(os.environ.get('MPESA_MAX_RETRIES', 3))  # idempotent (GET) requests only
+MPESA_POOL_SIZE = int(os.environ.get('MPESA_POOL_SIZE', 10))  # keep-alive connections per process
+MPESA_ASYNC_STK_PUSH = os.environ.get('MPESA_ASYNC_STK_PUSH', 'True').lower() == 'true'  # send STK pushes from Django-Q
+MPESA_CALLBACK_ASYNC = os.environ.get('MPESA_CALLBACK_ASYNC', 'False').lower() == 'true'  # process callbacks from Django-Q
+
+# Background application email delivery
+APPLICATION_DELIVERY_MAX_ATTEMPTS = int(os.environ.get('APPLICATION_DELIVERY_MAX_ATTEMPTS', 5))
+APPLICATION_DELIVERY_RETRY_BASE = int(os.environ.get('APPLICATION_DELIVERY_RETRY_BASE', 60))  # seconds, doubles per attempt
+
+# Outgoing attachment limits: per-file cap and the per-process cache of encoded parts
+EMAIL_ATTACHMENT_MAX_BYTES = int(os.environ.get('EMAIL_ATTACHMENT_MAX_BYTES', 10 * 1024 * 1024))
+EMAIL_ATTACHMENT_CACHE_BYTES = int(os.environ.get('EMAIL_ATTACHMENT_CACHE_BYTES', 32 * 1024 * 1024))
 
 # Django-Q Configuration
 Q_CLUSTER = {
@@ -241,6 +347,9 @@ Q_CLUSTER = {
     'workers': 4,
     'recycle': 500,
     'timeout': 60,
+    # Must exceed the longest per-task timeout (bulk import tasks set their own),
+    # or the ORM broker hands a still-running task to another worker
+    'retry': int(os.environ.get('Q_CLUSTER_RETRY', 900)),
     'compress': True,
     'save_limit': 250,
     'queue_limit': 500,
@@ -15,18 +15,9 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.contrib.sitemaps.views import sitemap
 from django.urls import path, include
 from django.conf import settings
 from users import views as users_views
-from home.sitemaps import StaticViewSitemap, JobListingSitemap, CompanySitemap, JobCategorySitemap
-
-sitemaps = {
-    'static': StaticViewSitemap,
-    'jobs': JobListingSitemap,
-    'companies': CompanySitemap,
-    'categories': JobCategorySitemap,
-}
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -35,7 +26,6 @@ urlpatterns = [
     path('mpesa/callback/', users_views.mpesa_callback, name='mpesa_callback'),
     path('accounts/', include('allauth.urls')),
     path('jobs/', include('jobs.urls')),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
 ]
 
 if settings.DEBUG:
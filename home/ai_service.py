@@ -1,21 +1,35 @@
 import json
 import datetime
-from difflib import SequenceMatcher
 from home.models import AIChatMessage
 from openai import OpenAI
 from django.conf import settings
+from jobs.company_matcher import CompanyNameIndex
+from .fake_openai import FakeOpenAI
 
 class AIService:
     @staticmethod
-    def analyze_cv(cv_text, categories_data=None):
+    def _client():
         """
-        Analyzes CV text using OpenAI and returns a structured JSON response.
+        Returns the chat completions client for settings.AI_BACKEND: OpenAI
+        (optionally at OPENAI_BASE_URL, e.g. the run_fake_openai stub server) or
+        the in-process FakeOpenAI. None if OpenAI has no API key configured.
         """
+        if getattr(settings, 'AI_BACKEND', 'openai') == 'fake':
+            return FakeOpenAI(latency=getattr(settings, 'AI_FAKE_LATENCY', 0.0))
         api_key = getattr(settings, 'OPENAI_API_KEY', None)
         if not api_key:
             return None
-            
-        client = OpenAI(api_key=api_key)
+        return OpenAI(api_key=api_key, base_url=getattr(settings, 'OPENAI_BASE_URL', None))
+
+    @staticmethod
+    def analyze_cv(cv_text, categories_data=None):
+        """
+        Analyzes CV text using OpenAI and returns a structured JSON response.
+        """
+        client = AIService._client()
+        if client is None:
+            return None
+
         
         categories_prompt = ""
         if categories_data:
@@ -75,11 +89,10 @@ class AIService:
         """
         Analyzes Cover Letter text using OpenAI and returns a structured JSON response.
         """
-        api_key = getattr(settings, 'OPENAI_API_KEY', None)
-        if not api_key:
+        client = AIService._client()
+        if client is None:
             return None
-            
-        client = OpenAI(api_key=api_key)
+
         
         prompt = f"""
         You are a professional HR manager. Analyze the following Cover Letter text and provide a detailed assessment.
@@ -127,11 +140,10 @@ class AIService:
         """
         Generates a professional, tailored cover letter using OpenAI and includes analysis scores.
         """
-        api_key = getattr(settings, 'OPENAI_API_KEY', None)
-        if not api_key:
+        client = AIService._client()
+        if client is None:
             return None
-            
-        client = OpenAI(api_key=api_key)
+
         
         # Gather User Data
         profile = getattr(user, 'profile', None)
@@ -237,11 +249,10 @@ class AIService:
         """
         Handles general chat interactions for the AI assistant.
         """
-        api_key = getattr(settings, 'OPENAI_API_KEY', None)
-        if not api_key:
+        client = AIService._client()
+        if client is None:
             return "AI Service is currently unavailable."
-            
-        client = OpenAI(api_key=api_key)
+
         
         # Build context
         context_prompt = f"""
@@ -283,11 +294,10 @@ class AIService:
         Matches a search query to a list of job categories using OpenAI.
         categories_data is a list of dicts: [{'name': '...', 'keywords': [...]}, ...]
         """
-        api_key = getattr(settings, 'OPENAI_API_KEY', None)
-        if not api_key:
+        client = AIService._client()
+        if client is None:
             return []
-            
-        client = OpenAI(api_key=api_key)
+
         
         prompt = f"""
         Given the following search query from a job seeker, identify the most relevant job categories from the provided list.
@@ -326,28 +336,12 @@ class AIService:
             return []
 
     @staticmethod
-    def _fuzzy_match_company(company_name, existing_companies, threshold=0.75):
+    def _fuzzy_match_company(company_name, threshold=0.75, limit=5):
         """
-        Performs fuzzy matching to find similar company names.
-        Returns list of tuples: (company_id, company_name, similarity_score)
+        Finds existing companies with names similar to company_name using the
+        trigram index. Returns list of dicts: {'id', 'name', 'similarity'}
         """
-        matches = []
-        company_name_lower = company_name.lower().strip()
-        
-        for company in existing_companies:
-            existing_name_lower = company['name'].lower().strip()
-            similarity = SequenceMatcher(None, company_name_lower, existing_name_lower).ratio()
-            
-            if similarity >= threshold:
-                matches.append({
-                    'id': company['id'],
-                    'name': company['name'],
-                    'similarity': round(similarity, 3)
-                })
-        
-        # Sort by similarity (highest first)
-        matches.sort(key=lambda x: x['similarity'], reverse=True)
-        return matches
+        return CompanyNameIndex.shared().top_k(company_name, k=limit, threshold=threshold)
 
     @staticmethod
     def create_job_listing(text, existing_companies=None, categories_data=None):
@@ -357,21 +351,24 @@ class AIService:
         
         Args:
             text: The job listing text to parse
-            existing_companies: List of dicts with {'id', 'name'} of existing companies
+            existing_companies: Optional list of dicts with {'id', 'name'} to offer the model;
+                by default candidates are retrieved from the company index
             categories_data: List of dicts with {'name', 'keywords'} of job categories
             
         Returns:
             Dict with 'company', 'job_listing', 'requirements', and 'similar_companies' (if any found)
         """
-        api_key = getattr(settings, 'OPENAI_API_KEY', None)
-        if not api_key:
+        client = AIService._client()
+        if client is None:
             return None
-            
-        client = OpenAI(api_key=api_key)
+
         
-        # Prepare existing companies data for AI
-        companies_list = existing_companies if existing_companies else []
-        companies_names = [c['name'] for c in companies_list]
+        # Only the few companies the text most likely refers to go into the prompt,
+        # so its size doesn't grow with the Company table
+        limit = getattr(settings, 'AI_COMPANY_PROMPT_CANDIDATES', 10)
+        if existing_companies is None:
+            existing_companies = CompanyNameIndex.shared().candidates_in_text(text, k=limit)
+        companies_names = [c['name'] for c in existing_companies[:limit]]
         
         # Prepare categories data
         categories_list = categories_data if categories_data else []
@@ -442,7 +439,7 @@ class AIService:
         system_prompt = f"""You are a job listing parser. Extract structured information from job posting text.
         
 Available job categories: {', '.join(category_names) if category_names else 'Any relevant category'}
-Existing companies in database: {', '.join(companies_names) if companies_names else 'None'}
+Possibly matching companies in database: {', '.join(companies_names) if companies_names else 'None'}
 
 Extract all relevant information accurately. For company name, check if it matches any existing company name from the list provided.
 If the company name is very similar to an existing one (e.g., 'Arrotech Company' vs 'Arrotech Solutions'), note this in your response.
@@ -474,8 +471,8 @@ If the company name is very similar to an existing one (e.g., 'Arrotech Company'
                 # Perform fuzzy matching on company name
                 company_name = parsed_data.get('company', {}).get('name', '')
                 similar_companies = []
-                if company_name and existing_companies:
-                    similar_companies = AIService._fuzzy_match_company(company_name, existing_companies)
+                if company_name:
+                    similar_companies = AIService._fuzzy_match_company(company_name)
                 
                 parsed_data['similar_companies'] = similar_companies
                 return parsed_data
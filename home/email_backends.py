@@ -0,0 +1,117 @@
+import smtplib
+import ssl
+import threading
+import time
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+
+# One authenticated SMTP connection per worker thread, shared by every
+# backend instance that get_connection() hands out on that thread.
+_pool = threading.local()
+
+
+class PooledSMTPEmailBackend(EmailBackend):
+    """
+    SMTP backend that keeps its authenticated (TLS) connection open between
+    sends instead of reconnecting for every EmailMessage.send().
+
+    - An idle connection is checked with NOOP after EMAIL_POOL_HEALTHCHECK_INTERVAL
+      seconds and replaced if the server has dropped it.
+    - A connection is retired after EMAIL_POOL_MAX_MESSAGES messages or
+      EMAIL_POOL_MAX_AGE seconds, whichever comes first.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_messages = getattr(settings, 'EMAIL_POOL_MAX_MESSAGES', 100)
+        self.max_age = getattr(settings, 'EMAIL_POOL_MAX_AGE', 300)
+        self.healthcheck_interval = getattr(settings, 'EMAIL_POOL_HEALTHCHECK_INTERVAL', 30)
+
+    def _pool_key(self):
+        return (self.host, self.port, self.username, self.use_tls, self.use_ssl)
+
+    def open(self):
+        """
+        Attaches the worker's pooled connection, opening a new one if needed.
+        Returns False (never "newly opened") so send_messages() leaves it open,
+        or None if opening failed silently.
+        """
+        if self.connection:
+            return False
+
+        entry = getattr(_pool, 'entry', None)
+        if entry is not None and entry['key'] == self._pool_key() and self._is_usable(entry):
+            self.connection = entry['connection']
+            return False
+        self._retire()
+
+        opened = super().open()
+        if opened is None or not self.connection:
+            return None
+        now = time.monotonic()
+        _pool.entry = {
+            'key': self._pool_key(),
+            'connection': self.connection,
+            'opened_at': now,
+            'last_used': now,
+            'messages': 0,
+        }
+        return False
+
+    def _is_usable(self, entry):
+        now = time.monotonic()
+        if entry['messages'] >= self.max_messages or now - entry['opened_at'] >= self.max_age:
+            return False
+        if now - entry['last_used'] < self.healthcheck_interval:
+            return True
+        try:
+            status = entry['connection'].noop()[0]
+        except (smtplib.SMTPException, ssl.SSLError, OSError):
+            return False
+        return status == 250
+
+    def _send(self, email_message):
+        if not email_message.recipients():
+            return False
+        # The connection may have been retired mid-batch by the message limit
+        if self.connection is None and self.open() is None:
+            return False
+        try:
+            sent = super()._send(email_message)
+        except (smtplib.SMTPException, OSError):
+            # Don't hand a possibly dead socket to the next send on this thread
+            self._retire()
+            self.connection = None
+            raise
+        if not sent:
+            # A silently failed send leaves the connection in the same doubt
+            self._retire()
+            self.connection = None
+            return False
+        entry = getattr(_pool, 'entry', None)
+        if entry is not None and entry['connection'] is self.connection:
+            entry['messages'] += 1
+            entry['last_used'] = time.monotonic()
+            if entry['messages'] >= self.max_messages:
+                self._retire()
+                self.connection = None
+        return sent
+
+    def _retire(self):
+        """Really closes the pooled connection for this thread, if any."""
+        entry = getattr(_pool, 'entry', None)
+        if entry is None:
+            return
+        _pool.entry = None
+        connection = entry['connection']
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, ssl.SSLError, OSError):
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    def close(self):
+        # Detach without quitting so the next send on this thread reuses it
+        self.connection = None
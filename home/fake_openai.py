@@ -0,0 +1,270 @@
+import hashlib
+import json
+import re
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from openai.types.chat import ChatCompletion
+
+# Which AIService prompt a request came from, by a phrase in its system message
+CV_ANALYSIS = 'evaluates CVs'
+COVER_LETTER_ANALYSIS = 'evaluates Cover Letters'
+COVER_LETTER_GENERATION = 'cover letter writer'
+CATEGORY_MATCHING = 'map queries to job categories'
+
+CV_SECTIONS = {
+    'Contact information': ('@', 'phone', 'email'),
+    'Professional summary': ('summary', 'profile', 'objective'),
+    'Work experience': ('experience', 'employment', 'worked'),
+    'Education': ('education', 'university', 'college', 'degree', 'diploma'),
+    'Skills': ('skills', 'proficient', 'competencies'),
+    'Certifications': ('certified', 'certification', 'certificate'),
+}
+
+
+def _digest(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=4).digest(), 'big')
+
+
+def _after(text, marker):
+    start = text.find(marker)
+    return text[start + len(marker):].strip() if start >= 0 else ''
+
+
+def _line_after(text, marker):
+    return _after(text, marker).split('\n', 1)[0].strip()
+
+
+def _json_after(text, marker, default):
+    rest = _after(text, marker)
+    try:
+        return json.JSONDecoder().raw_decode(rest)[0] if rest else default
+    except ValueError:
+        return default
+
+
+def _words(text):
+    return set(re.findall(r'[a-z0-9+#]+', text.lower()))
+
+
+def _matching_categories(text, categories, limit=3):
+    """Names of the categories whose name or keywords appear in text, best match first."""
+    words = _words(text)
+    scored = []
+    for position, category in enumerate(categories or []):
+        terms = [category.get('name', '')] + list(category.get('keywords') or [])
+        hits = sum(1 for term in terms if term and _words(term) and _words(term) <= words)
+        if hits:
+            scored.append((-hits, position, category['name']))
+    return [name for _, _, name in sorted(scored)[:limit]]
+
+
+def analyze_cv(system, prompt):
+    cv_text = _after(prompt, 'CV TEXT:')
+    lowered = cv_text.lower()
+    missing = [section for section, cues in CV_SECTIONS.items() if not any(cue in lowered for cue in cues)]
+    present = len(CV_SECTIONS) - len(missing)
+    length_bonus = min(len(cv_text.split()) // 100, 5)
+    scores = {
+        'professionalism_score': min(20, 8 + 2 * present - ('Contact information' in missing) * 4),
+        'relevance_score': min(40, 15 + 3 * present + length_bonus + _digest(cv_text) % 5),
+        'experience_score': min(30, 10 + length_bonus * 2 + ('Work experience' not in missing) * 10),
+        'education_score': 8 if 'Education' not in missing else 3,
+    }
+    return {
+        'total_score': sum(scores.values()),
+        **scores,
+        'missing_sections': missing,
+        'improvement_suggestions': [f"Add a clear {section.lower()} section." for section in missing]
+        or ["Quantify your achievements with numbers where you can."],
+        'suggested_categories': _matching_categories(cv_text, _json_after(prompt, 'from the following list:', [])),
+    }
+
+
+def _cover_letter_scores(text):
+    lowered = text.lower()
+    missing = []
+    if not lowered.startswith('dear'):
+        missing.append('Greeting addressed to the hiring manager')
+    if not any(closing in lowered for closing in ('regards', 'sincerely', 'yours')):
+        missing.append('Formal closing')
+    if 'experience' not in lowered:
+        missing.append('Relevant experience')
+    words = len(text.split())
+    scores = {
+        'professionalism_score': 20 - 5 * len(missing),
+        'content_score': min(40, 20 + words // 25),
+        'tone_score': 14 + _digest(text) % 5,
+        'impact_score': min(20, 10 + words // 50),
+    }
+    return {'total_score': sum(scores.values()), **scores, 'missing_elements': missing}
+
+
+def analyze_cover_letter(system, prompt):
+    return _cover_letter_scores(_after(prompt, 'COVER LETTER TEXT:'))
+
+
+def generate_cover_letter(system, prompt):
+    name = re.search(r'Name: (.*)', prompt)
+    title = re.search(r'Title: (.*)', prompt)
+    company = re.search(r'Company: (.*)', prompt)
+    skills = _after(prompt, 'SKILLS:').split('JOB LISTING:', 1)[0].strip()
+    name = name.group(1).strip() if name else 'Applicant'
+    title = title.group(1).strip() if title else 'advertised'
+    company = company.group(1).strip() if company else 'your company'
+    content = "\n\n".join([
+        "Dear Hiring Manager,",
+        f"I am writing to apply for the {title} position at {company}. "
+        "I have followed your work closely and would be glad to contribute to your team.",
+        f"My experience has given me a strong foundation in {skills or 'the core skills this role requires'}, "
+        "and I have a track record of delivering reliable work on time and collaborating across teams.",
+        "I would welcome the opportunity to discuss how my background fits your needs. "
+        "Thank you for your time and consideration.",
+        f"Kind regards,\n{name}",
+    ])
+    analysis = _cover_letter_scores(content)
+    analysis['improvement_suggestions'] = ["Mention a specific achievement that matches the role."]
+    return {'content': content, 'analysis': analysis}
+
+
+def match_categories(system, prompt):
+    query = _line_after(prompt, 'SEARCH QUERY:')
+    categories = _json_after(prompt, 'AVAILABLE CATEGORIES:', [])
+    return {'matched_categories': _matching_categories(query, categories)}
+
+
+def chat_reply(messages):
+    question = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), '')
+    topic = ' '.join(question.split()[:8])
+    return (
+        f"Thanks for asking about \"{topic}\". You can browse and search open roles on the Jobs page, "
+        "upload your CV for an instant score, and generate a tailored cover letter from any job listing."
+    )
+
+
+def parse_job_listing(system, prompt):
+    text = _after(prompt, 'and requirements:')
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    known = [name.strip() for name in _line_after(system, 'Possibly matching companies in database:').split(',')]
+    company = next((name for name in known if name and name != 'None' and name.lower() in text.lower()), None)
+    if company is None:
+        found = re.search(r'\b(?:at|join|by)\s+((?:[A-Z][\w&.-]*\s?){1,4})', text)
+        company = found.group(1).strip() if found else 'Unknown Company'
+    categories = [name.strip() for name in _line_after(system, 'Available job categories:').split(',')]
+    category = next((name for name in categories if name and name.lower() in text.lower()), categories[0])
+    location = re.search(r'\b(?:in|Location:)\s+([A-Z][a-z]+)', text)
+    email = re.search(r'[\w.+-]+@[\w-]+\.[\w.]+', text)
+    url = re.search(r'https?://\S+', text)
+    years = re.search(r'(\d+)\+?\s*years?', text)
+    requirements = [line.lstrip('-*• ').strip() for line in lines if line[0] in '-*•']
+    return {
+        'company': {'name': company, 'website': url.group(0) if url else ''},
+        'job_listing': {
+            'title': re.split(r'[.!?:|]', lines[0])[0][:100] if lines else 'Untitled role',
+            'category': category,
+            'description': text,
+            'location': location.group(1) if location else 'Remote',
+            'terms': next((term for term in ('Part Time', 'Contract', 'Freelance', 'Internship', 'Attachment')
+                           if term.lower() in text.lower()), 'Full Time'),
+            'education_level_required': 'University' if re.search(r'degree|university', text, re.I) else 'None',
+            'experience_required_years': int(years.group(1)) if years else 0,
+            'application_method': 'email' if email else 'website' if url else 'other',
+            'employer_email': email.group(0) if email else '',
+            'application_url': url.group(0) if url else '',
+        },
+        'requirements': [{'description': requirement, 'is_mandatory': True} for requirement in requirements],
+    }
+
+
+JSON_RESPONDERS = [
+    (CV_ANALYSIS, analyze_cv),
+    (COVER_LETTER_ANALYSIS, analyze_cover_letter),
+    (COVER_LETTER_GENERATION, generate_cover_letter),
+    (CATEGORY_MATCHING, match_categories),
+]
+
+
+def completion(model='gpt-3.5-turbo', messages=(), functions=None, function_call=None, **kwargs):
+    """
+    Returns a chat.completions response body (as a dict) for one of AIService's
+    prompts. Responses are built from the prompt alone, so the same request
+    always gets the same answer.
+    """
+    messages = list(messages)
+    system = messages[0]['content'] if messages and messages[0]['role'] == 'system' else ''
+    prompt = messages[-1]['content'] if messages else ''
+    message = {'role': 'assistant', 'content': None}
+    if functions:
+        name = (function_call or {}).get('name') or functions[0]['name']
+        message['function_call'] = {'name': name, 'arguments': json.dumps(parse_job_listing(system, prompt))}
+        finish_reason = 'function_call'
+    else:
+        responder = next((func for phrase, func in JSON_RESPONDERS if phrase in system), None)
+        message['content'] = json.dumps(responder(system, prompt)) if responder else chat_reply(messages)
+        finish_reason = 'stop'
+
+    prompt_tokens = sum(len((m.get('content') or '').split()) for m in messages)
+    completion_tokens = len((message['content'] or message.get('function_call', {}).get('arguments', '')).split())
+    return {
+        'id': f'chatcmpl-fake-{uuid.uuid4().hex[:12]}',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{'index': 0, 'message': message, 'finish_reason': finish_reason}],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class FakeOpenAI:
+    """
+    In-process stand-in for openai.OpenAI (AI_BACKEND = 'fake'). Only
+    chat.completions.create() is provided; each call sleeps `latency` seconds
+    to mimic a round trip, then answers with completion().
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatCompletion.model_validate(completion(**kwargs))
+
+
+class FakeOpenAIRequestHandler(BaseHTTPRequestHandler):
+    """Serves completion() at POST /v1/chat/completions, for OPENAI_BASE_URL."""
+    latency = 0.0
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/v1/chat/completions':
+            return self._send(404, {'error': {'message': f"Unknown path {self.path}", 'type': 'invalid_request_error'}})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            response = completion(**body)
+        except (ValueError, TypeError, KeyError) as e:
+            return self._send(400, {'error': {'message': str(e), 'type': 'invalid_request_error'}})
+        if self.latency:
+            time.sleep(self.latency)
+        self._send(200, response)
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(addr='127.0.0.1', port=0, latency=0.0):
+    handler = type('Handler', (FakeOpenAIRequestHandler,), {'latency': latency})
+    return ThreadingHTTPServer((addr, port), handler)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from home.sitemaps import SitemapBuilder
+
+
+class Command(BaseCommand):
+    help = "Generate the gzip-compressed sitemap index and section files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rewrite every file, not just changed pages")
+
+    def handle(self, *args, **options):
+        written = SitemapBuilder().build(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(written)} sitemap file(s)"))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from home.fake_openai import make_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the deterministic fake OpenAI chat completions API over HTTP. "
+        "Point OPENAI_BASE_URL at the printed URL to use it from other processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--addr', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=None, help="Seconds added to each response (default: AI_FAKE_LATENCY)")
+
+    def handle(self, *args, **options):
+        latency = options['latency'] if options['latency'] is not None else settings.AI_FAKE_LATENCY
+        server = make_server(options['addr'], options['port'], latency)
+        self.stdout.write(self.style.SUCCESS(
+            f"Fake OpenAI API on http://{options['addr']}:{server.server_port}/v1 (latency {latency}s); Ctrl-C to stop"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -1,5 +1,15 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from xml.sax.saxutils import escape
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sites.models import Site
+from django.db.models import QuerySet
 from django.urls import reverse
+from django.utils import timezone
 from jobs.models import JobListing, Company, JobCategory
 
 class StaticViewSitemap(Sitemap):
@@ -17,6 +27,7 @@ class JobListingSitemap(Sitemap):
     changefreq = 'daily'
     priority = 0.8
     limit = 5000  # Maximum items per sitemap section
+    fields = ('pk', 'updated_at')
 
     def items(self):
         return JobListing.objects.filter(is_active=True).order_by('-posted_at')
@@ -25,12 +36,13 @@ class JobListingSitemap(Sitemap):
         return reverse('job_detail', args=[obj.pk])
 
     def lastmod(self, obj):
-        return obj.posted_at
+        return obj.updated_at
 
 class CompanySitemap(Sitemap):
     changefreq = 'weekly'
     priority = 0.7
     limit = 5000
+    fields = ('pk', 'updated_at')
 
     def items(self):
         return Company.objects.all()
@@ -39,16 +51,156 @@ class CompanySitemap(Sitemap):
         return reverse('company_detail', args=[obj.pk])
 
     def lastmod(self, obj):
-        return obj.created_at
+        return obj.updated_at
 
 class JobCategorySitemap(Sitemap):
     changefreq = 'weekly'
     priority = 0.6
     limit = 5000
+    fields = ('pk',)
 
     def items(self):
         return JobCategory.objects.all()
 
     def location(self, obj):
-        # Categories are typically shown in job_list with filters, but we can point to job list
-        return reverse('job_list')
+        # Categories are shown in job_list with the category filter applied
+        return f"{reverse('job_list')}?category={obj.pk}"
+
+SITEMAPS = {
+    'static': StaticViewSitemap,
+    'jobs': JobListingSitemap,
+    'companies': CompanySitemap,
+    'categories': JobCategorySitemap,
+}
+
+
+class SitemapBuilder:
+    """
+    Writes the sitemap index and one gzip-compressed file per section page to
+    SITEMAP_ROOT, so crawlers are served static bytes instead of DB queries.
+
+    Sections are paged by primary key, so new rows only change the last page.
+    Builds are incremental: each page's entries are hashed and only pages whose
+    hash changed (and the index, if any did) are rewritten.
+    """
+    INDEX_FILE = 'sitemap.xml.gz'
+    MANIFEST_FILE = 'manifest.json'
+
+    def __init__(self, root=None, base_url=None):
+        self.root = Path(root or settings.SITEMAP_ROOT)
+        if base_url is None:
+            protocol = getattr(settings, 'SITEMAP_PROTOCOL', 'https')
+            base_url = f"{protocol}://{Site.objects.get_current().domain}"
+        self.base_url = base_url.rstrip('/')
+
+    @staticmethod
+    def page_filename(section, page):
+        return f'sitemap-{section}-{page}.xml.gz'
+
+    def build(self, force=False):
+        """Regenerates changed files and returns the names of the files written."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest()
+        if manifest.get('base_url') != self.base_url:
+            force = True
+        old_sections = manifest.get('sections', {})
+
+        written = []
+        sections = {}
+        for section, sitemap_class in SITEMAPS.items():
+            sitemap = sitemap_class()
+            old_pages = old_sections.get(section, [])
+            pages = []
+            for number, entries in enumerate(self._paginate(sitemap), start=1):
+                digest = hashlib.sha1(
+                    '\n'.join(f'{loc} {lastmod or ""}' for loc, lastmod in entries).encode()
+                ).hexdigest()
+                lastmods = [lastmod for _, lastmod in entries if lastmod]
+                page = {'digest': digest, 'lastmod': max(lastmods) if lastmods else None}
+                filename = self.page_filename(section, number)
+                previous = old_pages[number - 1] if number <= len(old_pages) else None
+                if force or previous != page or not (self.root / filename).exists():
+                    self._write(filename, self._render_urlset(sitemap, entries))
+                    written.append(filename)
+                pages.append(page)
+
+            # Drop pages a shrinking section no longer has
+            for number in range(len(pages) + 1, len(old_pages) + 1):
+                (self.root / self.page_filename(section, number)).unlink(missing_ok=True)
+                written.append(self.page_filename(section, number))
+            sections[section] = pages
+
+        if written or force or not (self.root / self.INDEX_FILE).exists():
+            self._write(self.INDEX_FILE, self._render_index(sections))
+            written.append(self.INDEX_FILE)
+            self._save_manifest({'base_url': self.base_url, 'sections': sections})
+        return written
+
+    def _paginate(self, sitemap):
+        items = sitemap.items()
+        if isinstance(items, QuerySet):
+            # Only the columns the sitemap needs, streamed in stable pk order
+            items = items.order_by('pk').values_list(*sitemap.fields, named=True).iterator(chunk_size=sitemap.limit)
+        lastmod = getattr(sitemap, 'lastmod', None)
+
+        entries = []
+        for item in items:
+            modified = lastmod(item) if lastmod else None
+            entries.append((
+                self.base_url + sitemap.location(item),
+                modified.isoformat() if modified else None,
+            ))
+            if len(entries) == sitemap.limit:
+                yield entries
+                entries = []
+        if entries:
+            yield entries
+
+    def _render_urlset(self, sitemap, entries):
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+                 '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+        for loc, lastmod in entries:
+            lines.append('<url>')
+            lines.append(f'<loc>{escape(loc)}</loc>')
+            if lastmod:
+                lines.append(f'<lastmod>{lastmod}</lastmod>')
+            if sitemap.changefreq:
+                lines.append(f'<changefreq>{sitemap.changefreq}</changefreq>')
+            if sitemap.priority is not None:
+                lines.append(f'<priority>{sitemap.priority}</priority>')
+            lines.append('</url>')
+        lines.append('</urlset>')
+        return '\n'.join(lines)
+
+    def _render_index(self, sections):
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+                 '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+        for section, pages in sections.items():
+            for number, page in enumerate(pages, start=1):
+                loc = self.base_url + reverse('sitemap_section', kwargs={'section': section, 'page': number})
+                lines.append('<sitemap>')
+                lines.append(f'<loc>{escape(loc)}</loc>')
+                if page['lastmod']:
+                    lines.append(f"<lastmod>{page['lastmod']}</lastmod>")
+                lines.append('</sitemap>')
+        lines.append('</sitemapindex>')
+        return '\n'.join(lines)
+
+    def _write(self, filename, content):
+        # Write then rename so a crawler never reads a half-written file
+        path = self.root / filename
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_bytes(gzip.compress(content.encode('utf-8'), mtime=0))
+        os.replace(tmp, path)
+
+    def _load_manifest(self):
+        try:
+            return json.loads((self.root / self.MANIFEST_FILE).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        manifest['generated_at'] = timezone.now().isoformat(timespec='seconds')
+        tmp = self.root / (self.MANIFEST_FILE + '.tmp')
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, self.root / self.MANIFEST_FILE)
@@ -0,0 +1,31 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django_q.tasks import schedule
+from django_q.models import Schedule
+from .sitemaps import SitemapBuilder
+
+SITEMAP_REBUILD_PENDING_KEY = 'home:sitemap_rebuild_pending'
+
+def schedule_sitemap_rebuild():
+    """
+    Schedules one sitemap rebuild SITEMAP_REBUILD_DELAY seconds from now. A burst
+    of listing changes within that window shares the same rebuild. The pending
+    flag is on the shared cache so the web workers and the cluster all see it.
+    """
+    from users.services import shared_cache
+    delay = getattr(settings, 'SITEMAP_REBUILD_DELAY', 300)
+    if not shared_cache().add(SITEMAP_REBUILD_PENDING_KEY, True, delay):
+        return
+    schedule(
+        'home.tasks.rebuild_sitemaps_task',
+        schedule_type=Schedule.ONCE,
+        next_run=timezone.now() + timedelta(seconds=delay),
+        repeats=-1,
+    )
+
+def rebuild_sitemaps_task():
+    from users.services import shared_cache
+    shared_cache().delete(SITEMAP_REBUILD_PENDING_KEY)
+    written = SitemapBuilder().build()
+    return f"Rewrote {len(written)} sitemap file(s)"
@@ -1,3 +1,253 @@
-from django.test import TestCase
+import gzip
+import smtplib
+import tempfile
+import threading
+from unittest.mock import patch
+from django.core.mail import EmailMessage, get_connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_q.models import Schedule
 
-# Create your tests here.
+from home import email_backends
+from home.ai_service import AIService
+from home.fake_openai import make_server
+from home.sitemaps import SitemapBuilder
+from home.tasks import SITEMAP_REBUILD_PENDING_KEY
+from jobs.models import Company, JobCategory, JobListing
+from users.models import MySkill, MyUser
+from users.services import shared_cache
+
+
+class FakeSMTP:
+    instances = []
+
+    def __init__(self, host, port, **kwargs):
+        self.sent = 0
+        self.closed = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self, context=None):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def noop(self):
+        return (451, b'closed') if self.closed else (250, b'OK')
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        self.sent += 1
+        return {}
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@override_settings(
+    EMAIL_BACKEND='home.email_backends.PooledSMTPEmailBackend',
+    EMAIL_HOST='smtp.example.com',
+    EMAIL_HOST_USER='user',
+    EMAIL_HOST_PASSWORD='secret',
+    EMAIL_USE_TLS=True,
+    EMAIL_POOL_MAX_MESSAGES=2,
+    EMAIL_POOL_HEALTHCHECK_INTERVAL=0,
+)
+@patch('smtplib.SMTP', FakeSMTP)
+class PooledSMTPEmailBackendTests(TestCase):
+    def setUp(self):
+        FakeSMTP.instances = []
+        email_backends._pool.entry = None
+
+    def send(self, count):
+        for i in range(count):
+            EmailMessage(f'Subject {i}', 'Body', 'from@example.com', ['to@example.com']).send()
+
+    def test_connection_reused_until_message_limit(self):
+        self.send(3)
+        self.assertEqual(len(FakeSMTP.instances), 2)
+        self.assertEqual(FakeSMTP.instances[0].sent, 2)
+        self.assertTrue(FakeSMTP.instances[0].closed)
+
+    def test_dead_connection_replaced_after_health_check(self):
+        self.send(1)
+        FakeSMTP.instances[0].closed = True
+        self.send(1)
+        self.assertEqual(len(FakeSMTP.instances), 2)
+        self.assertEqual(FakeSMTP.instances[1].sent, 1)
+
+    @override_settings(EMAIL_POOL_HEALTHCHECK_INTERVAL=60)
+    def test_failed_send_retires_connection(self):
+        self.send(1)
+        FakeSMTP.instances[0].closed = True
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            self.send(1)
+        self.assertIsNone(email_backends._pool.entry)
+        self.send(1)
+        self.assertEqual(len(FakeSMTP.instances), 2)
+        self.assertEqual(FakeSMTP.instances[1].sent, 1)
+
+    def test_batch_send_on_one_connection(self):
+        connection = get_connection()
+        messages = [EmailMessage('Subject', 'Body', 'from@example.com', ['to@example.com']) for _ in range(3)]
+        self.assertEqual(connection.send_messages(messages), 3)
+        self.assertEqual(len(FakeSMTP.instances), 2)
+
+
+class SitemapBuilderTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        settings_override = override_settings(SITEMAP_ROOT=self.root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.category = JobCategory.objects.create(name='Engineering')
+        self.company = Company.objects.create(name='Acme Ltd')
+        self.jobs = [
+            JobListing.objects.create(
+                title=f'Engineer {i}', company='Acme Ltd', company_profile=self.company,
+                category=self.category, location='Nairobi', url='http://example.com'
+            )
+            for i in range(3)
+        ]
+        self.builder = SitemapBuilder(root=self.root.name, base_url='https://findajob.example')
+
+    def _read(self, filename):
+        with gzip.open(f'{self.root.name}/{filename}') as f:
+            return f.read().decode()
+
+    def test_build_writes_index_and_sections(self):
+        written = self.builder.build()
+        self.assertIn(SitemapBuilder.INDEX_FILE, written)
+
+        index = self._read(SitemapBuilder.INDEX_FILE)
+        self.assertIn('https://findajob.example/sitemap-jobs-1.xml', index)
+        self.assertIn(f'<lastmod>{self.jobs[-1].updated_at.isoformat()}</lastmod>', index)
+
+        jobs = self._read('sitemap-jobs-1.xml.gz')
+        for job in self.jobs:
+            self.assertIn(f'https://findajob.example/jobs/{job.pk}/', jobs)
+
+    def test_rebuild_only_rewrites_changed_pages(self):
+        self.builder.build()
+        self.assertEqual(self.builder.build(), [])
+
+        self.jobs[0].title = 'Senior Engineer'
+        self.jobs[0].save()
+        self.assertEqual(self.builder.build(), ['sitemap-jobs-1.xml.gz', SitemapBuilder.INDEX_FILE])
+
+        self.jobs[1].is_active = False
+        self.jobs[1].save()
+        self.builder.build()
+        self.assertNotIn(f'/jobs/{self.jobs[1].pk}/', self._read('sitemap-jobs-1.xml.gz'))
+
+    def test_served_as_static_gzip_bytes(self):
+        response = self.client.get(reverse('sitemap'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Last-Modified', response)
+        self.assertIn(b'<sitemapindex', gzip.decompress(response.content))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('sitemap_section', kwargs={'section': 'jobs', 'page': 1}))
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn(b'<urlset', response.content)
+        self.assertEqual(self.client.get('/sitemap-jobs-9.xml').status_code, 404)
+
+    def test_listing_change_schedules_one_rebuild(self):
+        shared_cache().delete(SITEMAP_REBUILD_PENDING_KEY)
+        Schedule.objects.filter(func='home.tasks.rebuild_sitemaps_task').delete()
+
+        self.jobs[0].save()
+        self.company.save()
+        self.assertEqual(Schedule.objects.filter(func='home.tasks.rebuild_sitemaps_task').count(), 1)
+
+
+CV_TEXT = """Jane Wanjiru - jane@example.com
+Summary: Backend developer with five years of experience building Django APIs.
+Experience: Senior Developer at Acme Ltd, 2019 - present.
+Education: BSc Computer Science, University of Nairobi.
+Skills: Python, Django, PostgreSQL."""
+
+POSTING = """Senior Python Developer
+KCB Bank Kenya is hiring in Nairobi. 3+ years of Django experience and a degree required.
+- Build internal APIs
+- Review code
+Send your CV to careers@kcb.example.com"""
+
+
+@override_settings(AI_BACKEND='fake', AI_FAKE_LATENCY=0)
+class FakeOpenAIBackendTests(TestCase):
+    def setUp(self):
+        self.categories = [
+            {'name': 'Engineering', 'keywords': ['python', 'django', 'developer']},
+            {'name': 'Finance', 'keywords': ['accounting', 'audit']},
+        ]
+
+    def test_cv_analysis_matches_schema_and_is_deterministic(self):
+        result = AIService.analyze_cv(CV_TEXT, self.categories)
+        self.assertEqual(result, AIService.analyze_cv(CV_TEXT, self.categories))
+        parts = ['professionalism_score', 'relevance_score', 'experience_score', 'education_score']
+        self.assertEqual(result['total_score'], sum(result[part] for part in parts))
+        self.assertLessEqual(result['total_score'], 100)
+        self.assertEqual(result['missing_sections'], ['Certifications'])
+        self.assertEqual(result['suggested_categories'], ['Engineering'])
+
+    def test_cover_letter_generation_and_analysis(self):
+        user = MyUser.objects.create_user(email='jane@example.com', password='password123')
+        MySkill.objects.create(user=user, name='Django')
+        job = JobListing.objects.create(
+            title='Backend Engineer', company='Acme Ltd', category=JobCategory.objects.create(name='Engineering'),
+            location='Nairobi', url='http://example.com'
+        )
+        generated = AIService.generate_cover_letter(user, job)
+        self.assertIn('Backend Engineer position at Acme Ltd', generated['content'])
+        self.assertIn('Django', generated['content'])
+        self.assertEqual(generated['analysis']['missing_elements'], [])
+
+        analysis = AIService.analyze_cover_letter("To whom it may concern, hire me.")
+        self.assertEqual(
+            set(analysis),
+            {'total_score', 'professionalism_score', 'content_score', 'tone_score', 'impact_score', 'missing_elements'},
+        )
+        self.assertIn('Formal closing', analysis['missing_elements'])
+
+    def test_chat_and_category_matching(self):
+        user = MyUser.objects.create_user(email='jane@example.com', password='password123')
+        self.assertIn('remote Django jobs', AIService.chat(user, 'Where can I find remote Django jobs?'))
+        self.assertEqual(AIService.match_categories('django developer', self.categories), ['Engineering'])
+        self.assertEqual(AIService.match_categories('nursing', self.categories), [])
+
+    def test_job_listing_parsing(self):
+        company = Company.objects.create(name='KCB Bank Kenya')
+        parsed = AIService.create_job_listing(POSTING, categories_data=self.categories)
+        self.assertEqual(parsed['company']['name'], 'KCB Bank Kenya')
+        self.assertEqual(parsed['similar_companies'][0]['id'], company.pk)
+        listing = parsed['job_listing']
+        self.assertEqual(listing['title'], 'Senior Python Developer')
+        self.assertEqual(listing['location'], 'Nairobi')
+        self.assertEqual(listing['experience_required_years'], 3)
+        self.assertEqual(listing['employer_email'], 'careers@kcb.example.com')
+        self.assertEqual([r['description'] for r in parsed['requirements']], ['Build internal APIs', 'Review code'])
+
+    @override_settings(AI_FAKE_LATENCY=0.25)
+    def test_artificial_latency(self):
+        with patch('home.fake_openai.time.sleep') as sleep:
+            AIService.match_categories('django', self.categories)
+        sleep.assert_called_once_with(0.25)
+
+    @override_settings(AI_BACKEND='openai', OPENAI_API_KEY='test-key')
+    def test_stub_server_speaks_the_openai_protocol(self):
+        server = make_server()
+        self.addCleanup(server.server_close)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+
+        with override_settings(OPENAI_BASE_URL=f'http://127.0.0.1:{server.server_port}/v1'):
+            self.assertEqual(AIService.match_categories('python audit', self.categories), ['Engineering', 'Finance'])
+            parsed = AIService.create_job_listing(POSTING, existing_companies=[], categories_data=self.categories)
+        self.assertEqual(parsed['job_listing']['title'], 'Senior Python Developer')
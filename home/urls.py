@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from . import views
 
 urlpatterns = [
@@ -9,4 +9,6 @@ urlpatterns = [
     path('chat-history/', views.chat_history, name='chat_history'),
     path('contact/', views.contact, name='contact'),
     path('robots.txt', views.robots_txt, name='robots_txt'),
+    path('sitemap.xml', views.sitemap_index, name='sitemap'),
+    re_path(r'^sitemap-(?P<section>[a-z]+)-(?P<page>[0-9]+)\.xml$', views.sitemap_section, name='sitemap_section'),
 ]
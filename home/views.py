@@ -2,16 +2,29 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.core.mail import send_mail
 from django.conf import settings
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_exempt
 from users.models import PersonalProfile, MySkill, UserDocument
 from .models import AIChatMessage
-from jobs.models import Application, JobListing
+from .sitemaps import SitemapBuilder
+from jobs.models import Application, JobListing, JobRecommendation
+from jobs.conditional import public_conditional_page, index_state
+from jobs import page_cache
+from jobs.page_cache import anonymous_page_cache
+import gzip
 import json
+from pathlib import Path
 
+@public_conditional_page(index_state)
+@anonymous_page_cache('index')
 def index(request):
+    # Lazy: skipped entirely when the template's latest-jobs fragment is cached
     latest_jobs = JobListing.objects.filter(is_active=True).order_by('-posted_at')[:6]
-    return render(request, 'home/index.html', {'latest_jobs': latest_jobs})
+    return render(request, 'home/index.html', {
+        'latest_jobs': latest_jobs,
+        'page_cache_generation': page_cache.generation(),
+    })
 
 
 def privacy_policy(request):
@@ -30,6 +43,34 @@ Sitemap: {}/sitemap.xml
 """.format(request.build_absolute_uri('/').rstrip('/'))
     return HttpResponse(content, content_type='text/plain')
 
+def sitemap_index(request):
+    return _serve_sitemap_file(request, SitemapBuilder.INDEX_FILE)
+
+def sitemap_section(request, section, page):
+    return _serve_sitemap_file(request, SitemapBuilder.page_filename(section, page))
+
+def _serve_sitemap_file(request, filename):
+    """Serves a pre-generated sitemap, gzip-encoded when the client accepts it."""
+    root = Path(settings.SITEMAP_ROOT)
+    if not (root / SitemapBuilder.INDEX_FILE).exists():
+        # First request after a fresh deploy; later builds run from the task queue
+        SitemapBuilder().build()
+    path = root / filename
+    try:
+        data = path.read_bytes()
+        modified = path.stat().st_mtime
+    except FileNotFoundError:
+        raise Http404("Sitemap not found")
+
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = HttpResponse(data, content_type='application/xml')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(data), content_type='application/xml')
+    response['Last-Modified'] = http_date(modified)
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
 @login_required
 def dashboard(request):
     user = request.user
@@ -66,11 +107,15 @@ def dashboard(request):
     work_experiences = user.work_experiences.all().order_by('-start_date')
     educations = user.educations.all().order_by('-start_date')
     
-    # Recommendation logic
-    recommended_jobs = JobListing.objects.none()
-    preferences_complete = False
-    if profile and profile.preferred_categories.exists():
-        preferences_complete = True
+    # Precomputed by jobs.recommendations; applying removes a job from the list
+    recommended_jobs = [
+        recommendation.job for recommendation in JobRecommendation.objects.filter(
+            user=user, job__is_active=True
+        ).select_related('job__category').order_by('-score')[:4]
+    ]
+    preferences_complete = bool(profile and profile.preferred_categories.exists())
+    if not recommended_jobs and preferences_complete:
+        # No precomputed list yet (new seeker, or before the first refresh)
         recommended_jobs = JobListing.objects.filter(
             is_active=True,
             category__in=profile.preferred_categories.all()
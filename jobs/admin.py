@@ -1,5 +1,11 @@
+from django import forms
 from django.contrib import admin
-from .models import JobCategory, JobListing, Application, AutomationLog, JobRequirement, Company
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect, render
+from django.urls import path
+from .importers import read_postings
+from .tasks import queue_ai_import
+from .models import JobCategory, JobListing, Application, AutomationLog, JobRequirement, JobRecommendation, Company
 
 admin.site.register(Company)
 @admin.register(JobCategory)
@@ -10,18 +16,68 @@ class JobRequirementInline(admin.TabularInline):
     model = JobRequirement
     extra = 1
 
+class AIJobImportForm(forms.Form):
+    postings_file = forms.FileField(
+        help_text="JSON Lines file ({\"text\": ...} per line) or a text file with postings separated by '---' lines."
+    )
+
 @admin.register(JobListing)
 class JobListingAdmin(admin.ModelAdmin):
     list_display = ('title', 'company', 'category', 'terms', 'location', 'posted_at')
-    list_filter = ('category', 'location', 'posted_at')
+    list_filter = ('category', 'location', 'posted_at', ('duplicate_of', admin.EmptyFieldListFilter))
     search_fields = ('title', 'company', 'description')
+    raw_id_fields = ('duplicate_of',)
     inlines = [JobRequirementInline]
+    change_list_template = 'admin/jobs/joblisting/change_list.html'
+
+    def get_urls(self):
+        custom_urls = [
+            path('import-ai/', self.admin_site.admin_view(self.import_ai_view), name='jobs_joblisting_import_ai'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def import_ai_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = AIJobImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            try:
+                postings = read_postings(form.cleaned_data['postings_file'])
+            except ValueError:
+                # Also covers json.JSONDecodeError and UnicodeDecodeError
+                form.add_error('postings_file', "This file is not valid UTF-8 text or JSON Lines.")
+            else:
+                if postings:
+                    batches = queue_ai_import(postings, request.user.id)
+                    self.message_user(
+                        request,
+                        f"Queued {len(postings)} postings for AI import in {batches} batches. "
+                        "Each batch's result will appear in Automation logs.",
+                    )
+                    return redirect('admin:jobs_joblisting_changelist')
+                form.add_error('postings_file', "No postings found in this file.")
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'title': "Import jobs with AI",
+        }
+        return render(request, 'admin/jobs/joblisting/import_ai.html', context)
 
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
-    list_display = ('user', 'job', 'status', 'applied_at')
-    list_filter = ('status', 'applied_at')
+    list_display = ('user', 'job', 'status', 'delivery_status', 'delivery_attempts', 'applied_at')
+    list_filter = ('status', 'delivery_status', 'applied_at')
     search_fields = ('user__email', 'job__title', 'job__company')
+    actions = ['retry_delivery']
+
+    @admin.action(description="Retry email delivery for selected applications")
+    def retry_delivery(self, request, queryset):
+        from .tasks import queue_application_delivery
+        for application in queryset:
+            queue_application_delivery(application)
+        self.message_user(request, f"Queued {queryset.count()} applications for delivery.")
 
 @admin.register(AutomationLog)
 class AutomationLogAdmin(admin.ModelAdmin):
@@ -34,3 +90,9 @@ class JobRequirementAdmin(admin.ModelAdmin):
     list_display = ('description', 'job', 'is_mandatory')
     list_filter = ('is_mandatory',)
     search_fields = ('description', 'job__title')
+
+@admin.register(JobRecommendation)
+class JobRecommendationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'job', 'score', 'computed_at')
+    search_fields = ('user__email', 'job__title')
+    raw_id_fields = ('user', 'job')
@@ -0,0 +1,231 @@
+import io
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from home.ai_service import AIService
+from home.services import TextExtractor
+from users.models import MyUser
+from .models import JobCategory, JobListing
+from .synthetic import SYNTHETIC_DOMAIN
+from .tasks import send_job_notification_task
+from .utils import DocumentGenerator
+
+COVER_LETTER = "\n\n".join([
+    "Dear Hiring Manager,",
+    "I am writing to apply for the Backend Developer role. " * 6,
+    "In my current position I build and maintain Django services, design PostgreSQL schemas "
+    "and run our deployment pipeline. " * 5,
+    "I would welcome the chance to discuss how I can contribute to your team. " * 3,
+    "Kind regards,\nAmina Kamau",
+])
+
+
+class BenchmarkSuite:
+    """
+    Times the hot views and services against the data in the current database
+    (see SyntheticDataGenerator). Each benchmark runs once cold, then `repeat`
+    times; the report holds the cold time, median, p95 and min in milliseconds
+    and the number of SQL queries per run. AI calls are answered by the
+    FakeOpenAI backend with no added latency, so they time this app's side.
+    Benchmarks in WRITES run inside a transaction that is rolled back, so
+    --current-db runs leave no rows behind.
+    """
+    WRITES = {'send_job_notification_task'}
+
+    def __init__(self, repeat=10, only=None):
+        self.repeat = repeat
+        self.only = set(only or [])
+        self._tmpdir = None
+
+    def _fixtures(self):
+        seeker = MyUser.objects.filter(
+            email__endswith=f'@{SYNTHETIC_DOMAIN}', role='Job Seeker'
+        ).annotate(n=Count('applications')).order_by('-n').first()
+        employer = MyUser.objects.filter(
+            email__endswith=f'@{SYNTHETIC_DOMAIN}', role='Employer', company__isnull=False
+        ).annotate(n=Count('company__jobs__applications')).order_by('-n').first()
+        if seeker is None or employer is None:
+            raise ValueError("No synthetic users found; run generate_synthetic_data first.")
+        analytics_job = JobListing.objects.filter(
+            company_profile=employer.company
+        ).annotate(n=Count('applications')).order_by('-n').first()
+        notify_job = JobListing.objects.filter(is_active=True).annotate(
+            n=Count('category__interested_users')
+        ).order_by('-n').first()
+        search_term = analytics_job.title.split()[-1] if analytics_job else 'Engineer'
+        return seeker, employer, analytics_job, notify_job, search_term
+
+    def _client(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def benchmarks(self):
+        """Returns {name: zero-argument callable}."""
+        seeker, employer, analytics_job, notify_job, search_term = self._fixtures()
+        categories_data = list(JobCategory.objects.values('name', 'keywords'))
+        seeker_client = self._client(seeker)
+        employer_client = self._client(employer)
+
+        pdf_bytes = DocumentGenerator.generate_pdf(COVER_LETTER)
+        docx_bytes = DocumentGenerator.generate_docx(COVER_LETTER)
+        self._tmpdir = tempfile.TemporaryDirectory()
+        pdf_path = os.path.join(self._tmpdir.name, 'cv.pdf')
+        docx_path = os.path.join(self._tmpdir.name, 'cv.docx')
+        with open(pdf_path, 'wb') as f:
+            f.write(pdf_bytes)
+        with open(docx_path, 'wb') as f:
+            f.write(docx_bytes)
+
+        # Signed-in requests, so the anonymous page cache doesn't answer them
+        benchmarks = {
+            'job_list': lambda: seeker_client.get(reverse('job_list')),
+            'job_list_search': lambda: seeker_client.get(reverse('job_list'), {'q': search_term}),
+            'dashboard_seeker': lambda: seeker_client.get(reverse('dashboard')),
+            'dashboard_employer': lambda: employer_client.get(reverse('dashboard')),
+            'generate_pdf': lambda: DocumentGenerator.generate_pdf(COVER_LETTER),
+            'generate_docx': lambda: DocumentGenerator.generate_docx(COVER_LETTER),
+            'extract_upload_pdf': lambda: DocumentGenerator.extract_text_from_file(SimpleUploadedFile('cv.pdf', pdf_bytes)),
+            'extract_upload_docx': lambda: DocumentGenerator.extract_text_from_file(SimpleUploadedFile('cv.docx', docx_bytes)),
+            'extract_file_pdf': lambda: TextExtractor.extract_text(pdf_path),
+            'extract_file_docx': lambda: TextExtractor.extract_text(docx_path),
+            'ai_analyze_cv': lambda: AIService.analyze_cv(COVER_LETTER, categories_data),
+        }
+        if analytics_job:
+            benchmarks['job_analytics'] = lambda: employer_client.get(reverse('job_analytics', args=[analytics_job.pk]))
+            benchmarks['ai_generate_cover_letter'] = lambda: AIService.generate_cover_letter(seeker, analytics_job)
+        if notify_job:
+            benchmarks['send_job_notification_task'] = lambda: send_job_notification_task(notify_job.pk)
+        if self.only:
+            benchmarks = {name: func for name, func in benchmarks.items() if name in self.only}
+        return dict(sorted(benchmarks.items()))
+
+    @staticmethod
+    @contextmanager
+    def _rolled_back():
+        with transaction.atomic():
+            yield
+            transaction.set_rollback(True)
+
+    def _measure(self, func, rollback=False):
+        # The transaction is opened outside the capture so it adds no queries
+        with self._rolled_back() if rollback else nullcontext(), CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+        status = getattr(result, 'status_code', None)
+        if status is not None and status >= 400:
+            raise RuntimeError(f"returned HTTP {status}")
+        return elapsed, len(queries)
+
+    def run(self):
+        results = {}
+        overrides = override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            AI_BACKEND='fake',
+            AI_FAKE_LATENCY=0.0,
+        )
+        with overrides:
+            try:
+                for name, func in self.benchmarks().items():
+                    rollback = name in self.WRITES
+                    cold, _ = self._measure(func, rollback)
+                    timings, query_counts = [], []
+                    for _ in range(self.repeat):
+                        elapsed, query_count = self._measure(func, rollback)
+                        timings.append(elapsed)
+                        query_counts.append(query_count)
+                    timings.sort()
+                    results[name] = {
+                        'cold_ms': round(cold * 1000, 2),
+                        'median_ms': round(statistics.median(timings) * 1000, 2),
+                        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 2),
+                        'min_ms': round(timings[0] * 1000, 2),
+                        'queries': max(query_counts),
+                    }
+            finally:
+                if self._tmpdir:
+                    self._tmpdir.cleanup()
+        return results
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkHistory:
+    """JSON file holding one entry per benchmark run, oldest first."""
+
+    def __init__(self, path=None):
+        self.path = path or settings.BENCHMARK_HISTORY_FILE
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def append(self, results, **meta):
+        history = self.load()
+        entry = {'timestamp': timezone.now().isoformat(timespec='seconds'), 'commit': current_commit(), **meta, 'results': results}
+        history.append(entry)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(history, f, indent=2)
+        os.replace(tmp, self.path)
+        return entry, (history[-2] if len(history) > 1 else None)
+
+    @staticmethod
+    def regressions(current, previous, tolerance=0.2):
+        """
+        Lists benchmarks whose median got more than `tolerance` slower, or that
+        run more queries, than in the previous entry.
+        """
+        found = []
+        if not previous:
+            return found
+        for name, result in current['results'].items():
+            before = previous['results'].get(name)
+            if not before:
+                continue
+            if result['queries'] > before['queries']:
+                found.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+            if before['median_ms'] and result['median_ms'] > before['median_ms'] * (1 + tolerance):
+                found.append(f"{name}: median {before['median_ms']} -> {result['median_ms']} ms")
+        return found
+
+
+def format_table(current, previous=None):
+    out = io.StringIO()
+    out.write(f"{'benchmark':<28}{'median ms':>11}{'p95 ms':>10}{'cold ms':>10}{'queries':>9}{'vs prev':>10}\n")
+    for name, result in current['results'].items():
+        change = ''
+        before = (previous or {}).get('results', {}).get(name)
+        if before and before['median_ms']:
+            change = f"{(result['median_ms'] / before['median_ms'] - 1) * 100:+.0f}%"
+        out.write(
+            f"{name:<28}{result['median_ms']:>11}{result['p95_ms']:>10}{result['cold_ms']:>10}"
+            f"{result['queries']:>9}{change:>10}\n"
+        )
+    return out.getvalue()
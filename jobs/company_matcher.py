@@ -0,0 +1,192 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from .models import Company
+
+# Legal-form words dropped from the end of a name, so "Acme Ltd" matches "ACME Limited"
+LEGAL_SUFFIXES = {
+    'ltd', 'limited', 'plc', 'inc', 'incorporated', 'llc', 'llp', 'lp', 'corp', 'corporation',
+    'co', 'company', 'gmbh', 'ag', 'sa', 'bv', 'nv', 'pty', 'pvt', 'private',
+}
+
+
+def normalize_company_name(name):
+    name = (name or '').lower().replace('&', ' and ')
+    tokens = re.sub(r'[^a-z0-9]+', ' ', name).split()
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+# Runs of capitalised words (allowing "&", "of", "and" inside), e.g. "Bank of Africa Kenya Ltd"
+NAME_PHRASE_RE = re.compile(r"[A-Z0-9][\w.&'-]*(?:\s+(?:(?:of|and|&|the|de)\s+)?[A-Z0-9][\w.&'-]*)*")
+
+
+def trigrams(normalized):
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CompanyNameIndex:
+    """
+    In-memory trigram inverted index over company names.
+
+    top_k() only scores companies that share trigrams with the query, and skips
+    those whose trigram count rules out reaching the threshold, so a lookup costs
+    a few posting-list walks instead of a comparison against every company.
+    Similarity is the Dice coefficient of the normalized names' trigram sets.
+
+    Each process keeps one shared index. Company signals update it immediately;
+    changes made by other processes are picked up at most
+    COMPANY_INDEX_SYNC_INTERVAL seconds later from Company.updated_at.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(set)
+        self._companies = {}  # id -> (name, normalized, trigrams)
+        self._by_normalized = defaultdict(set)
+        self._synced_at = None
+        self._checked_at = 0.0
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    index = cls()
+                    index.rebuild()
+                    cls._shared = index
+        cls._shared.sync()
+        return cls._shared
+
+    @classmethod
+    def reset(cls):
+        with cls._shared_lock:
+            cls._shared = None
+
+    def __len__(self):
+        return len(self._companies)
+
+    def add(self, company_id, name):
+        normalized = normalize_company_name(name)
+        grams = trigrams(normalized)
+        with self._lock:
+            self.remove(company_id)
+            self._companies[company_id] = (name, normalized, grams)
+            self._by_normalized[normalized].add(company_id)
+            for gram in grams:
+                self._postings[gram].add(company_id)
+
+    def remove(self, company_id):
+        with self._lock:
+            entry = self._companies.pop(company_id, None)
+            if entry is None:
+                return
+            ids = self._by_normalized.get(entry[1])
+            if ids is not None:
+                ids.discard(company_id)
+                if not ids:
+                    del self._by_normalized[entry[1]]
+            for gram in entry[2]:
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(company_id)
+                    if not postings:
+                        del self._postings[gram]
+
+    def rebuild(self):
+        with self._lock:
+            self._postings.clear()
+            self._companies.clear()
+            self._by_normalized.clear()
+            self._synced_at = Company.objects.order_by('-updated_at').values_list('updated_at', flat=True).first()
+            for company_id, name in Company.objects.values_list('id', 'name').iterator(chunk_size=2000):
+                self.add(company_id, name)
+            self._checked_at = time.monotonic()
+
+    def sync(self, force=False):
+        """Applies Company changes made outside this process since the last sync."""
+        interval = getattr(settings, 'COMPANY_INDEX_SYNC_INTERVAL', 60)
+        if not force and time.monotonic() - self._checked_at < interval:
+            return
+        with self._lock:
+            self._checked_at = time.monotonic()
+            changed = Company.objects.all()
+            if self._synced_at is not None:
+                changed = changed.filter(updated_at__gte=self._synced_at)
+            for company_id, name, updated_at in changed.values_list('id', 'name', 'updated_at'):
+                self.add(company_id, name)
+                if self._synced_at is None or updated_at > self._synced_at:
+                    self._synced_at = updated_at
+            # Deletions leave no updated_at behind; a count mismatch means rebuild
+            if Company.objects.count() != len(self._companies):
+                self.rebuild()
+
+    def top_k(self, name, k=5, threshold=0.75):
+        """Returns up to k {'id', 'name', 'similarity'} dicts, best match first."""
+        normalized = normalize_company_name(name)
+        if not normalized:
+            return []
+        if threshold >= 1.0:
+            # Only identical normalized names qualify, so skip the trigram walk
+            with self._lock:
+                matches = [
+                    {'id': company_id, 'name': self._companies[company_id][0], 'similarity': 1.0}
+                    for company_id in self._by_normalized.get(normalized, ())
+                ]
+            matches.sort(key=lambda match: match['name'])
+            return matches[:k]
+
+        query = trigrams(normalized)
+        size = len(query)
+        # Dice >= t needs |B| between |A|*t/(2-t) and |A|*(2-t)/t
+        min_size = size * threshold / (2 - threshold) if threshold else 0
+        max_size = size * (2 - threshold) / threshold if threshold else float('inf')
+
+        with self._lock:
+            overlaps = defaultdict(int)
+            for gram in query:
+                for company_id in self._postings.get(gram, ()):
+                    overlaps[company_id] += 1
+
+            matches = []
+            for company_id, overlap in overlaps.items():
+                company_name, company_normalized, grams = self._companies[company_id]
+                if not min_size <= len(grams) <= max_size:
+                    continue
+                if company_normalized == normalized:
+                    similarity = 1.0
+                else:
+                    similarity = 2 * overlap / (size + len(grams))
+                if similarity >= threshold:
+                    matches.append({'id': company_id, 'name': company_name, 'similarity': round(similarity, 3)})
+
+        matches.sort(key=lambda match: (-match['similarity'], match['name']))
+        return matches[:k]
+
+    def candidates_in_text(self, text, k=10, threshold=0.8, max_chars=5000):
+        """
+        Retrieves the companies most likely to be mentioned in free text, by
+        matching every run of up to six capitalised words against the index. Returns up to k matches in the same shape as top_k().
+        """
+        best = {}
+        phrases = set()
+        for match in NAME_PHRASE_RE.finditer((text or '')[:max_chars]):
+            words = match.group().split()
+            for start in range(len(words)):
+                for end in range(start + 1, min(start + 6, len(words)) + 1):
+                    phrases.add(' '.join(words[start:end]))
+
+        for phrase in phrases:
+            for candidate in self.top_k(phrase, k=k, threshold=threshold):
+                current = best.get(candidate['id'])
+                if current is None or candidate['similarity'] > current['similarity']:
+                    best[candidate['id']] = candidate
+
+        matches = sorted(best.values(), key=lambda match: (-match['similarity'], match['name']))
+        return matches[:k]
@@ -0,0 +1,87 @@
+import hashlib
+from functools import wraps
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from .models import JobListing, Company
+
+
+def _is_public(request):
+    # Signed-in pages are personalised, and a pending flash message must be rendered
+    return not request.user.is_authenticated and 'messages' not in request.COOKIES
+
+
+def public_conditional_page(state_func):
+    """
+    Adds ETag/Last-Modified validators to a public view and answers matching
+    conditional requests with 304 before the view runs.
+
+    state_func(request, *args, **kwargs) returns (etag_parts, last_modified), or
+    None when there is nothing to validate against (e.g. the object is missing).
+    Signed-in visitors always get a normal response without validators.
+    """
+    def get_state(request, *args, **kwargs):
+        if not hasattr(request, '_conditional_state'):
+            request._conditional_state = state_func(request, *args, **kwargs) if _is_public(request) else None
+        return request._conditional_state
+
+    def etag_func(request, *args, **kwargs):
+        state = get_state(request, *args, **kwargs)
+        if state is None:
+            return None
+        parts, _ = state
+        return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        state = get_state(request, *args, **kwargs)
+        return state[1] if state else None
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header('ETag'):
+                # Let browsers keep the page but revalidate it on every visit
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def _listings_state(request, view_name):
+    state = JobListing.objects.aggregate(
+        last_modified=Max('updated_at'),
+        active=Count('id', filter=Q(is_active=True)),
+    )
+    # The hour keeps relative "posted ... ago" times from going stale for long
+    hour = timezone.now().strftime('%Y%m%d%H')
+    parts = (view_name, request.GET.urlencode(), state['last_modified'], state['active'], hour)
+    return parts, state['last_modified']
+
+
+def index_state(request):
+    return _listings_state(request, 'index')
+
+
+def job_list_state(request):
+    return _listings_state(request, 'job_list')
+
+
+def job_detail_state(request, pk):
+    row = JobListing.objects.filter(pk=pk).values_list('updated_at', 'company_profile__updated_at').first()
+    if row is None:
+        return None
+    job_updated, company_updated = row
+    return ('job_detail', pk, job_updated, company_updated), max(filter(None, row))
+
+
+def company_detail_state(request, pk):
+    company_updated = Company.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if company_updated is None:
+        return None
+    jobs = JobListing.objects.filter(company_profile_id=pk).aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    last_modified = max(filter(None, (company_updated, jobs['last_modified'])))
+    return ('company_detail', pk, company_updated, jobs['last_modified'], jobs['count']), last_modified
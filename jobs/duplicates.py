@@ -0,0 +1,204 @@
+import hashlib
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from django.conf import settings
+from .company_matcher import normalize_company_name
+from .models import JobListing
+
+# Six bands of 10-11 bits: fingerprints up to five bits apart share at least one band
+BANDS = 6
+BAND_SHIFTS = [0, 11, 22, 33, 44, 54]
+BAND_WIDTHS = [11, 11, 11, 11, 10, 10]
+
+
+def _band_keys(fingerprint):
+    return [fingerprint >> shift & ((1 << width) - 1) for shift, width in zip(BAND_SHIFTS, BAND_WIDTHS)]
+
+
+def _tokens(text):
+    return re.findall(r'[a-z0-9]+', (text or '').lower())
+
+
+def simhash(title, company, description):
+    """
+    64-bit weighted SimHash of a listing. Title words and the normalized company
+    name weigh more than description word 3-shingles, so reposts with light
+    edits to the description land within a few bits of each other.
+    """
+    features = Counter()
+    for token in _tokens(title):
+        features[f't:{token}'] += 3
+    features[f'c:{normalize_company_name(company)}'] += 3
+    words = _tokens(description)[:2000]
+    for i in range(max(len(words) - 2, 0)):
+        features[' '.join(words[i:i + 3])] += 1
+
+    # Bit-sliced counters: planes[i] holds bit i of every column's weighted vote
+    # count, so adding a feature is a few 64-bit operations instead of 64 loops
+    planes = []
+    total = 0
+    for feature, weight in features.items():
+        value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big')
+        total += weight
+        for _ in range(weight):
+            carry = value
+            for i in range(len(planes)):
+                planes[i], carry = planes[i] ^ carry, planes[i] & carry
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+
+    # A bit is set where more than half the total weight voted for it
+    half = total // 2
+    above, equal = 0, (1 << 64) - 1
+    for i in range(max(len(planes), half.bit_length()) - 1, -1, -1):
+        plane = planes[i] if i < len(planes) else 0
+        if half >> i & 1:
+            equal &= plane
+        else:
+            above |= equal & plane
+            equal &= ~plane
+    return above
+
+
+def to_signed(fingerprint):
+    # Stored in a signed BIGINT column
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def listing_simhash(job):
+    return to_signed(simhash(job.title, job.company, job.description))
+
+
+class JobDuplicateIndex:
+    """
+    In-memory LSH index of active, non-duplicate listings' SimHash fingerprints.
+
+    Fingerprints are split into six bands. Two fingerprints within five bits of
+    each other must agree on at least one whole band, so a lookup only
+    compares against listings sharing a band instead of scanning the table.
+
+    Kept per process like CompanyNameIndex: JobListing signals update it, and
+    other processes' changes are synced from JobListing.updated_at every
+    JOB_DUPLICATE_INDEX_SYNC_INTERVAL seconds.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bands = [defaultdict(set) for _ in range(BANDS)]
+        self._fingerprints = {}
+        self._synced_at = None
+        self._checked_at = 0.0
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    index = cls()
+                    index.rebuild()
+                    cls._shared = index
+        cls._shared.sync()
+        return cls._shared
+
+    @classmethod
+    def reset(cls):
+        with cls._shared_lock:
+            cls._shared = None
+
+    @staticmethod
+    def indexed_listings():
+        return JobListing.objects.filter(is_active=True, duplicate_of__isnull=True, simhash__isnull=False)
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def add(self, job_id, value):
+        fingerprint = to_unsigned(value)
+        with self._lock:
+            self.remove(job_id)
+            self._fingerprints[job_id] = fingerprint
+            for band, key in enumerate(_band_keys(fingerprint)):
+                self._bands[band][key].add(job_id)
+
+    def remove(self, job_id):
+        with self._lock:
+            fingerprint = self._fingerprints.pop(job_id, None)
+            if fingerprint is None:
+                return
+            for band, key in enumerate(_band_keys(fingerprint)):
+                bucket = self._bands[band].get(key)
+                if bucket is not None:
+                    bucket.discard(job_id)
+                    if not bucket:
+                        del self._bands[band][key]
+
+    def rebuild(self):
+        with self._lock:
+            for band in self._bands:
+                band.clear()
+            self._fingerprints.clear()
+            self._synced_at = JobListing.objects.order_by('-updated_at').values_list('updated_at', flat=True).first()
+            for job_id, value in self.indexed_listings().values_list('id', 'simhash').iterator(chunk_size=5000):
+                self.add(job_id, value)
+            self._checked_at = time.monotonic()
+
+    def sync(self, force=False):
+        interval = getattr(settings, 'JOB_DUPLICATE_INDEX_SYNC_INTERVAL', 60)
+        if not force and time.monotonic() - self._checked_at < interval:
+            return
+        with self._lock:
+            self._checked_at = time.monotonic()
+            changed = JobListing.objects.all()
+            if self._synced_at is not None:
+                changed = changed.filter(updated_at__gte=self._synced_at)
+            rows = changed.values_list('id', 'simhash', 'is_active', 'duplicate_of_id', 'updated_at')
+            for job_id, value, is_active, duplicate_of_id, updated_at in rows:
+                if is_active and duplicate_of_id is None and value is not None:
+                    self.add(job_id, value)
+                else:
+                    self.remove(job_id)
+                if self._synced_at is None or updated_at > self._synced_at:
+                    self._synced_at = updated_at
+            if self.indexed_listings().count() != len(self._fingerprints):
+                self.rebuild()
+
+    def find(self, value, max_distance=None, exclude=None):
+        """Returns (job_id, distance) of the closest indexed listing within max_distance bits, or None."""
+        if max_distance is None:
+            max_distance = getattr(settings, 'JOB_DUPLICATE_MAX_DISTANCE', 4)
+        fingerprint = to_unsigned(value)
+        best = None
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(_band_keys(fingerprint)):
+                candidates |= self._bands[band].get(key, set())
+            for job_id in candidates:
+                if job_id == exclude:
+                    continue
+                distance = (fingerprint ^ self._fingerprints[job_id]).bit_count()
+                if distance <= max_distance and (best is None or (distance, job_id) < best[::-1]):
+                    best = (job_id, distance)
+        return best
+
+
+def find_duplicate(value, exclude=None):
+    """Returns the id of an existing active listing that value near-duplicates, or None."""
+    index = JobDuplicateIndex.shared()
+    match = index.find(value, exclude=exclude)
+    if match is None:
+        return None
+    # The index may hold a listing from a rolled-back transaction or another process
+    if not JobDuplicateIndex.indexed_listings().filter(pk=match[0]).exists():
+        index.remove(match[0])
+        return find_duplicate(value, exclude)
+    return match[0]
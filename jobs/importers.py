@@ -0,0 +1,448 @@
+import csv
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import connection, transaction
+from django.utils import timezone
+from django_q.tasks import async_task
+from .company_matcher import CompanyNameIndex, normalize_company_name
+from .duplicates import JobDuplicateIndex, find_duplicate, simhash, to_signed
+from .models import Company, JobCategory, JobListing, JobRequirement
+
+_signal_state = threading.local()
+
+
+@contextmanager
+def suppress_job_signals():
+    """
+    Silences the per-row JobListing/Company/JobRequirement receivers (notifications,
+    cache invalidation, sitemap rebuilds) on this thread. Bulk writers use it and
+    run the equivalent work once for the whole batch instead.
+    """
+    previous = getattr(_signal_state, 'suppressed', False)
+    _signal_state.suppressed = True
+    try:
+        yield
+    finally:
+        _signal_state.suppressed = previous
+
+
+def job_signals_suppressed():
+    return getattr(_signal_state, 'suppressed', False)
+
+
+class RateLimiter:
+    """Thread-safe limiter allowing at most `per_minute` acquisitions per rolling minute, evenly spaced."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def read_postings(lines):
+    """
+    Reads raw postings from an iterable of text lines. Each line of a JSON Lines
+    file is an object with a "text" key; any other file holds plain-text postings
+    separated by lines containing only "---". Raises ValueError on undecodable
+    bytes or a line that is not a JSON object.
+    """
+    postings = []
+    current = []
+    jsonl = None
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        stripped = line.strip()
+        if jsonl is None and stripped:
+            jsonl = stripped.startswith('{')
+        if jsonl:
+            if stripped:
+                record = json.loads(stripped)
+                if not isinstance(record, dict):
+                    raise ValueError("Each JSON line must be an object with a \"text\" key.")
+                text = str(record.get('text') or '').strip()
+                if text:
+                    postings.append(text)
+        elif stripped == '---':
+            if ''.join(current).strip():
+                postings.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(line)
+    if ''.join(current).strip():
+        postings.append(''.join(current).strip())
+    return postings
+
+
+# JobListing fields with choices; bulk_create skips full_clean, so values are checked here
+CHOICE_FIELDS = ('terms', 'education_level_required', 'application_method')
+
+COMPANY_FIELDS = (
+    'description', 'website', 'location', 'primary_phone', 'secondary_phone',
+    'primary_email', 'secondary_email', 'founded_in',
+)
+
+
+def _job_item(record):
+    """Turns one flat import record into the parsed-posting shape JobImportWriter takes."""
+    record = {key: value for key, value in record.items() if key and value not in ('', None)}
+    company = record.pop('company', None)
+    if not isinstance(company, dict):
+        company = {'name': company}
+    for field in COMPANY_FIELDS:
+        if f'company_{field}' in record:
+            company.setdefault(field, record.pop(f'company_{field}'))
+
+    requirements = record.pop('requirements', None) or []
+    if isinstance(requirements, str):
+        # CSV cells hold requirements separated by "|"
+        requirements = requirements.split('|')
+    requirements = [
+        requirement if isinstance(requirement, dict) else {'description': str(requirement).strip()}
+        for requirement in requirements
+    ]
+
+    if 'expires_in_days' in record:
+        try:
+            days = int(record.pop('expires_in_days'))
+        except (TypeError, ValueError):
+            # JobImportWriter counts a None item as invalid
+            return None
+        record.setdefault('expiry_date', (timezone.now().date() + timedelta(days=days)).isoformat())
+    if 'experience_required_years' in record:
+        try:
+            record['experience_required_years'] = int(record['experience_required_years'])
+        except (TypeError, ValueError):
+            record.pop('experience_required_years')
+    return {'company': company, 'job_listing': record, 'requirements': requirements}
+
+
+def read_job_records(lines, fmt='jsonl'):
+    """
+    Streams job records from a JSON Lines or CSV file as parsed postings. Each
+    record holds JobListing fields plus "company" (a name, or an object of
+    Company fields) and "requirements" (a list, or "|"-separated in CSV).
+    A JSON line that is not an object comes through as None, which
+    JobImportWriter counts as invalid.
+    """
+    if fmt == 'csv':
+        rows = csv.DictReader(lines)
+    else:
+        rows = (json.loads(line) for line in lines if line.strip())
+    for row in rows:
+        yield _job_item(row) if isinstance(row, dict) else None
+
+
+def _clean(value):
+    return ' '.join((value or '').lower().split())
+
+
+class JobImportWriter:
+    """
+    Writes parsed postings ({'company', 'job_listing', 'requirements'} dicts, the
+    shape AIService.create_job_listing returns) in chunks. Each chunk runs in one
+    transaction. Companies, jobs and requirements are created with bulk_create.
+    Postings that duplicate an existing or already-imported listing are skipped.
+    Postings missing a title, company, category or valid URL, or with a value
+    outside a field's choices, are counted as invalid.
+    """
+
+    def __init__(self, chunk_size=None, notify=True, create_categories=False, fingerprint=True):
+        self.chunk_size = chunk_size or getattr(settings, 'JOB_IMPORT_CHUNK_SIZE', 100)
+        self.notify = notify
+        self.create_categories = create_categories
+        # Without fingerprints near-duplicates are not checked and simhash stays
+        # empty until backfill_job_duplicates runs
+        self.fingerprint = fingerprint
+        self.stats = {'created': 0, 'duplicates': 0, 'invalid': 0, 'companies_created': 0, 'categories_created': 0}
+        self.created_job_ids = []
+        self._seen = set()
+        self._categories = {_clean(c.name): c for c in JobCategory.objects.all()}
+        self._default_category = next(iter(self._categories.values()), None)
+        self._choices = {
+            name: {value for value, _ in JobListing._meta.get_field(name).choices} for name in CHOICE_FIELDS
+        }
+        self._validate_url = URLValidator()
+
+    def write(self, parsed_items):
+        chunk = []
+        for item in parsed_items:
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._write_chunk(chunk)
+        self._after_import()
+        return self.stats
+
+    def _write_chunk(self, items):
+        if self.create_categories:
+            self._create_categories(items)
+        items = [item for item in items if self._is_valid(item)]
+        if not items:
+            return
+        with transaction.atomic(), suppress_job_signals():
+            companies = self._resolve_companies(items)
+            fresh = self._drop_duplicates(items, companies)
+            if not fresh:
+                return
+
+            jobs = [self._build_job(item, companies) for item in fresh]
+            if connection.features.can_return_rows_from_bulk_insert:
+                JobListing.objects.bulk_create(jobs)
+            else:
+                # Without RETURNING we need per-row inserts to learn the new ids
+                for job in jobs:
+                    job.save()
+
+            JobRequirement.objects.bulk_create([
+                JobRequirement(
+                    job=job,
+                    description=(requirement.get('description') or '')[:255],
+                    is_mandatory=requirement.get('is_mandatory', True),
+                )
+                for job, item in zip(jobs, fresh)
+                for requirement in item.get('requirements') or []
+                if requirement.get('description')
+            ])
+            if self.fingerprint:
+                duplicate_index = JobDuplicateIndex.shared()
+                for job in jobs:
+                    duplicate_index.add(job.pk, job.simhash)
+            self.created_job_ids.extend(job.pk for job in jobs)
+            self.stats['created'] += len(jobs)
+
+    def _is_valid(self, item):
+        job_data = (item or {}).get('job_listing') or {}
+        company_name = ((item or {}).get('company') or {}).get('name')
+        if not (job_data.get('title') and company_name and self._category_for(job_data)
+                and self._url_for(job_data) and self._has_valid_choices(job_data)):
+            self.stats['invalid'] += 1
+            return False
+        return True
+
+    def _url_for(self, job_data):
+        # The listing URL is required; a posting without a usable one is not imported
+        try:
+            for field in ('url', 'application_url'):
+                if job_data.get(field):
+                    self._validate_url(job_data[field])
+        except ValidationError:
+            return None
+        return job_data.get('url') or job_data.get('application_url')
+
+    def _has_valid_choices(self, job_data):
+        return all(
+            not job_data.get(name) or job_data[name] in choices
+            for name, choices in self._choices.items()
+        )
+
+    def _category_for(self, job_data):
+        return self._categories.get(_clean(job_data.get('category'))) or self._default_category
+
+    def _create_categories(self, items):
+        """Bulk-creates the categories named in a chunk that do not exist yet."""
+        new_categories = {}
+        for item in items:
+            name = ' '.join(str(((item or {}).get('job_listing') or {}).get('category') or '').split())
+            if name and _clean(name) not in self._categories:
+                new_categories.setdefault(_clean(name), JobCategory(name=name[:100]))
+        if not new_categories:
+            return
+        names = [c.name for c in new_categories.values()]
+        existing = set(JobCategory.objects.filter(name__in=names).values_list('name', flat=True))
+        JobCategory.objects.bulk_create(
+            [c for c in new_categories.values() if c.name not in existing], ignore_conflicts=True
+        )
+        created = 0
+        for category in JobCategory.objects.filter(name__in=names):
+            self._categories[_clean(category.name)] = category
+            created += category.name not in existing
+        self._default_category = self._default_category or next(iter(self._categories.values()), None)
+        self.stats['categories_created'] += created
+
+    def _resolve_companies(self, items):
+        """Maps each normalized company name to a Company, creating missing ones in bulk."""
+        index = CompanyNameIndex.shared()
+        companies = {}
+        new_companies = {}
+        for item in items:
+            data = item['company']
+            key = normalize_company_name(data['name'])
+            if key in companies or key in new_companies:
+                continue
+            match = index.top_k(data['name'], k=1, threshold=1.0)
+            if match:
+                companies[key] = match[0]['id']
+            else:
+                new_companies[key] = Company(
+                    name=data['name'][:255],
+                    description=data.get('description') or '',
+                    website=data.get('website') or '',
+                    location=data.get('location') or '',
+                    primary_phone=(data.get('primary_phone') or '')[:20],
+                    secondary_phone=(data.get('secondary_phone') or '')[:20],
+                    primary_email=data.get('primary_email') or '',
+                    secondary_email=data.get('secondary_email') or '',
+                    founded_in=data.get('founded_in'),
+                )
+
+        if new_companies:
+            # Names another import (or a stale index) already has are not counted as created
+            names = [company.name for company in new_companies.values()]
+            existing = set(Company.objects.filter(name__in=names).values_list('name', flat=True))
+            Company.objects.bulk_create(
+                [company for company in new_companies.values() if company.name not in existing],
+                ignore_conflicts=True,
+            )
+            by_name = dict(Company.objects.filter(name__in=names).values_list('name', 'id'))
+            for key, company in new_companies.items():
+                companies[key] = by_name[company.name]
+                index.add(by_name[company.name], company.name)
+            self.stats['companies_created'] += len(by_name.keys() - existing)
+
+        names = dict(Company.objects.filter(pk__in=companies.values()).values_list('id', 'name'))
+        return {key: (company_id, names[company_id]) for key, company_id in companies.items()}
+
+    def _dedupe_key(self, title, company_id, location):
+        return (_clean(title), company_id, _clean(location))
+
+    def _drop_duplicates(self, items, companies):
+        titles = {item['job_listing']['title'] for item in items}
+        existing = {
+            self._dedupe_key(title, company_id, location)
+            for title, company_id, location in JobListing.objects.filter(
+                title__in=titles
+            ).values_list('title', 'company_profile_id', 'location')
+        }
+        fresh = []
+        for item in items:
+            job_data = item['job_listing']
+            company_id, company_name = companies[normalize_company_name(item['company']['name'])]
+            key = self._dedupe_key(job_data['title'], company_id, job_data.get('location'))
+            if key in existing or key in self._seen:
+                self.stats['duplicates'] += 1
+                continue
+            # Reposts with a different title or light edits are caught by SimHash
+            fingerprint = None
+            if self.fingerprint:
+                fingerprint = to_signed(simhash(job_data['title'], company_name, job_data.get('description')))
+                if settings.JOB_DUPLICATE_DETECTION and find_duplicate(fingerprint):
+                    self.stats['duplicates'] += 1
+                    continue
+            self._seen.add(key)
+            item['_simhash'] = fingerprint
+            fresh.append(item)
+        return fresh
+
+    def _build_job(self, item, companies):
+        job_data = item['job_listing']
+        company_id, company_name = companies[normalize_company_name(item['company']['name'])]
+        expiry_date = None
+        if job_data.get('expiry_date'):
+            try:
+                expiry_date = datetime.strptime(job_data['expiry_date'], '%Y-%m-%d').date()
+            except ValueError:
+                pass
+        return JobListing(
+            title=job_data['title'][:255],
+            category=self._category_for(job_data),
+            company=company_name,
+            company_profile_id=company_id,
+            description=job_data.get('description', ''),
+            location=(job_data.get('location') or '')[:255],
+            url=self._url_for(job_data),
+            terms=job_data.get('terms') or 'Full Time',
+            education_level_required=job_data.get('education_level_required') or 'None',
+            experience_required_years=job_data.get('experience_required_years'),
+            application_method=job_data.get('application_method') or 'website',
+            employer_email=job_data.get('employer_email') or None,
+            application_url=job_data.get('application_url') or None,
+            application_instructions=job_data.get('application_instructions', ''),
+            expiry_date=expiry_date,
+            simhash=item['_simhash'],
+        )
+
+    def _after_import(self):
+        """Does once for the whole import what the suppressed signals would have done per row."""
+        if not self.created_job_ids and not self.stats['companies_created']:
+            return
+        from home.tasks import schedule_sitemap_rebuild
+        from .page_cache import invalidate
+        invalidate()
+        schedule_sitemap_rebuild()
+        if self.created_job_ids:
+            # One pass over all new jobs instead of a task per job
+            async_task(
+                'jobs.tasks.recommend_new_listings_task',
+                self.created_job_ids,
+                timeout=getattr(settings, 'JOB_RECOMMENDATION_TASK_TIMEOUT', 600),
+            )
+            if self.notify:
+                # One task per chunk keeps each fan-out inside its own timeout
+                timeout = getattr(settings, 'JOB_NOTIFICATION_TASK_TIMEOUT', 600)
+                for start in range(0, len(self.created_job_ids), self.chunk_size):
+                    async_task(
+                        'jobs.tasks.send_job_notifications_batch_task',
+                        self.created_job_ids[start:start + self.chunk_size],
+                        timeout=timeout,
+                    )
+
+
+class AIJobImporter:
+    """
+    Parses many raw postings with AIService.create_job_listing on a thread pool,
+    rate-limited to AI_IMPORT_REQUESTS_PER_MINUTE, and writes the results with
+    JobImportWriter. Identical posting texts are only parsed once.
+    """
+
+    def __init__(self, workers=None, per_minute=None, chunk_size=None):
+        self.workers = workers or getattr(settings, 'AI_IMPORT_WORKERS', 4)
+        self.limiter = RateLimiter(per_minute or getattr(settings, 'AI_IMPORT_REQUESTS_PER_MINUTE', 60))
+        self.writer = JobImportWriter(chunk_size=chunk_size)
+        self.categories_data = list(JobCategory.objects.values('name', 'keywords'))
+
+    def _parse(self, text):
+        from home.ai_service import AIService
+        self.limiter.acquire()
+        try:
+            return AIService.create_job_listing(text, categories_data=self.categories_data)
+        finally:
+            # Worker threads must not hold on to their own DB connections
+            connection.close()
+
+    def run(self, texts):
+        unique_texts = list({hashlib.sha1(_clean(text).encode()).hexdigest(): text for text in texts}.values())
+        stats = {'postings': len(texts), 'repeated_postings': len(texts) - len(unique_texts), 'parse_failures': 0}
+
+        def successful(results):
+            for item in results:
+                if item:
+                    yield item
+                else:
+                    stats['parse_failures'] += 1
+
+        # Warm the shared company index before the worker threads use it
+        CompanyNameIndex.shared()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Results arrive in order while later postings are still parsing,
+            # so chunks are written as soon as they fill up
+            stats.update(self.writer.write(successful(pool.map(self._parse, unique_texts))))
+        return stats
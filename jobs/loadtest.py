@@ -0,0 +1,204 @@
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from html.parser import HTMLParser
+from unittest import mock
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from users.models import MyUser
+from .models import Application, JobListing
+from .synthetic import SYNTHETIC_DOMAIN
+
+
+# Each scenario is one visitor action: (client, user, job, rng) -> list of responses
+def job_list_scenario(client, user, job, rng):
+    params = rng.choice([{}, {'q': job.title.split()[-1]}, {'category': job.category_id}, {'location': job.location}])
+    return [client.get(reverse('job_list'), params)]
+
+
+def job_detail_scenario(client, user, job, rng):
+    return [client.get(reverse('job_detail', args=[job.pk]))]
+
+
+def dashboard_scenario(client, user, job, rng):
+    return [client.get(reverse('dashboard'))]
+
+
+def job_analytics_scenario(client, user, job, rng):
+    return [client.get(reverse('job_analytics', args=[job.pk]))]
+
+
+class HiddenInputs(HTMLParser):
+    """Collects the name -> value pairs of a page's hidden form inputs."""
+
+    def __init__(self):
+        super().__init__()
+        self.values = {}
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'input' and attrs.get('type') == 'hidden' and attrs.get('name'):
+            self.values[attrs['name']] = attrs.get('value') or ''
+
+    @classmethod
+    def parse(cls, response):
+        parser = cls()
+        parser.feed(response.content.decode(response.charset or 'utf-8'))
+        return parser.values
+
+
+def apply_via_email_scenario(client, user, job, rng):
+    url = reverse('apply_via_email', args=[job.pk])
+    responses = [client.get(url), client.post(url, {'action': 'generate_ai'})]
+    cv = user.documents.filter(document_type__name='CV').values_list('pk', flat=True).first()
+    # Read the letter from the preview page itself; response.context is only
+    # filled in under the test runner, not under run_load_test
+    generated = HiddenInputs.parse(responses[1]) if responses[1].status_code == 200 else {}
+    if cv and generated.get('cover_letter_text'):
+        # Submit the generated letter, as the preview page does
+        responses.append(client.post(url, {
+            'cv_used': cv, 'cover_letter_text': generated['cover_letter_text'],
+            'analysis_data_json': generated.get('analysis_data_json', '{}'), 'file_format': 'pdf',
+        }))
+    return responses
+
+
+SCENARIOS = {
+    'job_list': (job_list_scenario, None),
+    'job_detail': (job_detail_scenario, None),
+    'dashboard': (dashboard_scenario, 'Job Seeker'),
+    'job_analytics': (job_analytics_scenario, 'Employer'),
+    'apply_via_email': (apply_via_email_scenario, 'Job Seeker'),
+}
+
+
+class LoadTestDriver:
+    """
+    Drives the views in-process with Django's test client: `concurrency` threads
+    (or the calling thread, when it is 1) each run `iterations` randomly chosen scenarios as randomly chosen synthetic
+    users (see SyntheticDataGenerator), and per-scenario latency is reported.
+
+    AI calls go to the in-process FakeOpenAI backend (answering after
+    `ai_latency` seconds) and the background task queue is stubbed out, so the
+    numbers measure this app, not OpenAI or the mail server.
+    """
+
+    def __init__(self, scenarios=None, concurrency=4, iterations=50, seed=0, ai_latency=0.0):
+        self.scenarios = {name: SCENARIOS[name] for name in (scenarios or SCENARIOS)}
+        self.concurrency = concurrency
+        self.iterations = iterations
+        self.seed = seed
+        self.ai_latency = ai_latency
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _population(self):
+        users = list(MyUser.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}').select_related('company'))
+        seekers = [user for user in users if user.role == 'Job Seeker']
+        employers = [user for user in users if user.role == 'Employer' and user.company_id]
+        jobs = list(JobListing.objects.filter(is_active=True).only('pk', 'title', 'category_id', 'location', 'company_profile_id')[:5000])
+        if not (seekers and jobs):
+            raise ValueError("No synthetic users or listings found; run generate_synthetic_data first.")
+        jobs_by_company = defaultdict(list)
+        for job in jobs:
+            jobs_by_company[job.company_profile_id].append(job)
+        applied = set(Application.objects.filter(user__in=seekers).values_list('user_id', 'job_id'))
+        return {'Job Seeker': seekers, 'Employer': employers, None: seekers}, jobs, jobs_by_company, applied
+
+    def _worker(self, number, population, jobs, jobs_by_company, applied):
+        rng = random.Random(self.seed * 1000 + number)
+        clients = {}
+        for _ in range(self.iterations):
+            name = rng.choice(list(self.scenarios))
+            scenario, role = self.scenarios[name]
+            if role == 'Employer':
+                employers = [user for user in population['Employer'] if jobs_by_company.get(user.company_id)]
+                if not employers:
+                    continue
+                user = rng.choice(employers)
+                job = rng.choice(jobs_by_company[user.company_id])
+            else:
+                user = rng.choice(population[role])
+                job = rng.choice(jobs)
+                if name == 'apply_via_email':
+                    # Apply to a job this user hasn't applied to yet
+                    with self._lock:
+                        if (user.pk, job.pk) in applied:
+                            continue
+                        applied.add((user.pk, job.pk))
+
+            if role is None:
+                client = clients.setdefault(None, Client())
+            else:
+                client = clients.get(user.pk)
+                if client is None:
+                    client = clients[user.pk] = Client()
+                    client.force_login(user)
+
+            started = time.perf_counter()
+            responses = scenario(client, user, job, rng)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.latencies[name].append(elapsed)
+                if any(response.status_code >= 400 for response in responses):
+                    self.errors[name] += 1
+
+    def _threaded_worker(self, *args):
+        try:
+            self._worker(*args)
+        finally:
+            # Each thread opened its own connection
+            connection.close()
+
+    def run(self):
+        population, jobs, jobs_by_company, applied = self._population()
+        with ExitStack() as stack:
+            stack.enter_context(override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                AI_BACKEND='fake',
+                AI_FAKE_LATENCY=self.ai_latency,
+            ))
+            stack.enter_context(mock.patch('jobs.tasks.async_task'))
+            args = (population, jobs, jobs_by_company, applied)
+            started = time.perf_counter()
+            if self.concurrency == 1:
+                self._worker(0, *args)
+            else:
+                threads = [
+                    threading.Thread(target=self._threaded_worker, args=(number, *args))
+                    for number in range(self.concurrency)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            duration = time.perf_counter() - started
+        return self.report(duration)
+
+    def report(self, duration):
+        scenarios = {}
+        total = 0
+        for name, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            total += len(ordered)
+            scenarios[name] = {
+                'requests': len(ordered),
+                'errors': self.errors[name],
+                'mean_ms': round(statistics.fmean(ordered) * 1000, 1),
+                'p50_ms': round(ordered[len(ordered) // 2] * 1000, 1),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                'max_ms': round(ordered[-1] * 1000, 1),
+            }
+        return {
+            'concurrency': self.concurrency,
+            'duration_s': round(duration, 2),
+            'throughput_rps': round(total / duration, 1) if duration else 0,
+            'scenarios': scenarios,
+        }
@@ -0,0 +1,132 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.duplicates import JobDuplicateIndex, listing_simhash
+from jobs.importers import suppress_job_signals
+from jobs.models import Application, JobListing, Wishlist
+from jobs.services import JobAnalyticsService
+
+
+class Command(BaseCommand):
+    help = "Compute SimHash fingerprints for existing listings and flag (or merge) near-duplicate reposts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Listings updated per transaction")
+        parser.add_argument('--max-distance', type=int, help="Max differing bits (default: JOB_DUPLICATE_MAX_DISTANCE)")
+        parser.add_argument('--merge', action='store_true', help="Move applications and wishlists to the original listing and delete the reposts")
+        parser.add_argument('--dry-run', action='store_true', help="Report duplicates without changing anything")
+
+    def handle(self, *args, **options):
+        # Oldest first, so each repost points at the earliest listing it copies
+        index = JobDuplicateIndex()
+        duplicates = {}
+        found = 0
+        fingerprinted = 0
+        batch = []
+        listings = JobListing.objects.order_by('posted_at', 'pk').only(
+            'pk', 'title', 'company', 'description', 'is_active', 'simhash', 'duplicate_of'
+        )
+        for job in listings.iterator(chunk_size=options['chunk_size']):
+            value = listing_simhash(job)
+            changed = value != job.simhash
+            job.simhash = value
+            match = None
+            if job.duplicate_of_id:
+                # Flagged when it was saved
+                duplicates[job.pk] = job.duplicate_of_id
+            else:
+                match = index.find(value, max_distance=options['max_distance'])
+            if match:
+                found += 1
+                duplicates[job.pk] = match[0]
+                job.duplicate_of_id = match[0]
+                job.is_active = False
+                changed = True
+            elif job.is_active and not job.duplicate_of_id:
+                index.add(job.pk, value)
+            if changed:
+                batch.append(job)
+                fingerprinted += 1
+            if len(batch) >= options['chunk_size']:
+                self._save(batch, options['dry_run'])
+                batch = []
+        self._save(batch, options['dry_run'])
+        duplicates = self._resolve_roots(duplicates, options['dry_run'])
+
+        self.stdout.write(f"{fingerprinted} listings updated, {found} new near-duplicates found.")
+        if options['merge'] and duplicates:
+            self._merge(duplicates, options['dry_run'])
+        if not options['dry_run']:
+            JobDuplicateIndex.reset()
+            if found or options['merge']:
+                from jobs.page_cache import invalidate
+                invalidate()
+        else:
+            self.stdout.write(self.style.WARNING("Dry run: no changes were saved."))
+
+    def _save(self, batch, dry_run):
+        if batch and not dry_run:
+            # bulk_update leaves updated_at alone, so bump it for the index sync in running processes
+            with transaction.atomic(), suppress_job_signals():
+                JobListing.objects.bulk_update(batch, ['simhash', 'duplicate_of', 'is_active'])
+                JobListing.objects.filter(pk__in=[job.pk for job in batch]).update(updated_at=timezone.now())
+
+    def _resolve_roots(self, duplicates, dry_run):
+        # A listing flagged at save time can point at one the backfill has since
+        # found to be a repost itself. Point every duplicate at the root original,
+        # or merging would move its rows onto a listing that is about to be deleted.
+        roots = {}
+        for duplicate_id in duplicates:
+            root_id = duplicates[duplicate_id]
+            seen = {duplicate_id}
+            while root_id in duplicates and root_id not in seen:
+                seen.add(root_id)
+                root_id = duplicates[root_id]
+            roots[duplicate_id] = root_id
+        repointed = {}
+        for duplicate_id, root_id in roots.items():
+            if root_id != duplicates[duplicate_id]:
+                repointed.setdefault(root_id, []).append(duplicate_id)
+        if repointed and not dry_run:
+            with transaction.atomic(), suppress_job_signals():
+                for root_id, duplicate_ids in repointed.items():
+                    JobListing.objects.filter(pk__in=duplicate_ids).update(
+                        duplicate_of_id=root_id, updated_at=timezone.now()
+                    )
+        return roots
+
+    def _merge(self, duplicates, dry_run):
+        applications = Application.objects.filter(job_id__in=list(duplicates))
+        wishlists = Wishlist.objects.filter(job_id__in=list(duplicates))
+        self.stdout.write(
+            f"Merging {len(duplicates)} reposts: {applications.count()} applications and "
+            f"{wishlists.count()} wishlist entries move to the original listings."
+        )
+        if dry_run:
+            return
+        with transaction.atomic():
+            for duplicate_id, original_id in duplicates.items():
+                self._merge_applications(duplicate_id, original_id)
+                # A user who saved both copies keeps a single wishlist entry
+                already_saved = Wishlist.objects.filter(job_id=original_id).values('user_id')
+                Wishlist.objects.filter(job_id=duplicate_id).exclude(user_id__in=already_saved).update(job_id=original_id)
+            JobListing.objects.filter(pk__in=list(duplicates)).delete()
+            # The queryset updates above skip the per-application signal
+            originals = set(duplicates.values())
+            transaction.on_commit(lambda: JobAnalyticsService.invalidate(*originals))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {len(duplicates)} reposts."))
+
+    def _merge_applications(self, duplicate_id, original_id):
+        # A user who applied to both copies keeps only their earlier application
+        originals = {
+            application.user_id: application
+            for application in Application.objects.filter(job_id=original_id).order_by('-applied_at')
+        }
+        for application in Application.objects.filter(job_id=duplicate_id, user_id__in=list(originals)):
+            original = originals[application.user_id]
+            if application.applied_at < original.applied_at:
+                Application.objects.filter(job_id=original_id, user_id=application.user_id).delete()
+            else:
+                application.delete()
+        Application.objects.filter(job_id=duplicate_id).update(job_id=original_id)
@@ -185,26 +185,25 @@ class Command(BaseCommand):
     }
 
     def handle(self, *args, **options):
-        created_count = 0
-        updated_count = 0
+        existing = JobCategory.objects.in_bulk(list(self.JOB_CATEGORIES), field_name='name')
+        new_categories = []
+        updated = []
         for name, data in self.JOB_CATEGORIES.items():
-            category, created = JobCategory.objects.update_or_create(
-                name=name,
-                defaults={
-                    "keywords": data["keywords"],
-                    "category_type": data["type"]
-                }
-            )
-            if created:
-                created_count += 1
+            category = existing.get(name)
+            if category is None:
+                new_categories.append(JobCategory(name=name, keywords=data["keywords"], category_type=data["type"]))
                 self.stdout.write(self.style.SUCCESS(f"Created category: {name}"))
             else:
-                updated_count += 1
+                category.keywords = data["keywords"]
+                category.category_type = data["type"]
+                updated.append(category)
                 self.stdout.write(self.style.SUCCESS(f"Updated category: {name}"))
 
+        JobCategory.objects.bulk_create(new_categories)
+        JobCategory.objects.bulk_update(updated, ["keywords", "category_type"])
+
         self.stdout.write(
             self.style.SUCCESS(
-                f"Done. {created_count} new categories created, {updated_count} categories updated."
+                f"Done. {len(new_categories)} new categories created, {len(updated)} categories updated."
             )
         )
-
@@ -0,0 +1,34 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.synthetic import BASE_COUNTS, SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = "Generate a reproducible synthetic job board (users, CVs, companies, listings, applications, notifications)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help="Multiplier for the base row counts: " + ', '.join(f'{count} {name}' for name, count in BASE_COUNTS.items()),
+        )
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed and scale give the same data")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Rows per bulk insert")
+        parser.add_argument('--clear', action='store_true', help="Delete previously generated synthetic data first")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            SyntheticDataGenerator.clear()
+            self.stdout.write("Removed previous synthetic data.")
+        started = time.monotonic()
+        generator = SyntheticDataGenerator(
+            scale=options['scale'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            stdout=self.stdout,
+        )
+        stats = generator.run()
+        stats['seconds'] = round(time.monotonic() - started, 2)
+        self.stdout.write(self.style.SUCCESS(json.dumps(stats, indent=2)))
@@ -0,0 +1,44 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.importers import JobImportWriter, read_job_records
+
+
+class Command(BaseCommand):
+    help = "Bulk-import job listings (with their categories, companies and requirements) from a JSON Lines or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON Lines file (one listing object per line) or CSV file with a header row")
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help="Input format (default: from the file extension)")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Listings written per transaction")
+        parser.add_argument('--no-notify', action='store_true', help="Skip the job notification pass for the imported listings")
+        parser.add_argument(
+            '--skip-duplicate-check', action='store_true',
+            help="Don't fingerprint listings for near-duplicate detection (faster; run backfill_job_duplicates later)",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        fmt = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'jsonl')
+        writer = JobImportWriter(
+            chunk_size=options['chunk_size'],
+            notify=not options['no_notify'],
+            create_categories=True,
+            fingerprint=not options['skip_duplicate_check'],
+        )
+
+        started = time.monotonic()
+        try:
+            with path.open(encoding='utf-8', newline='') as f:
+                stats = writer.write(read_job_records(f, fmt))
+        except OSError as e:
+            raise CommandError(f"Could not read {path}: {e}")
+        except (ValueError, csv.Error) as e:
+            raise CommandError(f"Invalid {fmt} input in {path}: {e}")
+
+        stats['seconds'] = round(time.monotonic() - started, 2)
+        self.stdout.write(self.style.SUCCESS(json.dumps(stats, indent=2)))
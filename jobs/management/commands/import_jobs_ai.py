@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.importers import AIJobImporter, read_postings
+
+
+class Command(BaseCommand):
+    help = "Parse a file of raw job postings with the AI parser and import them in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON Lines file ({\"text\": ...} per line) or text file with postings separated by '---' lines")
+        parser.add_argument('--workers', type=int, help="Concurrent AI requests (default: AI_IMPORT_WORKERS)")
+        parser.add_argument('--per-minute', type=int, help="AI request rate limit (default: AI_IMPORT_REQUESTS_PER_MINUTE)")
+        parser.add_argument('--chunk-size', type=int, help="Postings written per transaction (default: JOB_IMPORT_CHUNK_SIZE)")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8') as f:
+                postings = read_postings(f)
+        except OSError as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        if not postings:
+            raise CommandError("No postings found in the file.")
+
+        self.stdout.write(f"Parsing {len(postings)} postings...")
+        importer = AIJobImporter(
+            workers=options['workers'],
+            per_minute=options['per_minute'],
+            chunk_size=options['chunk_size'],
+        )
+        stats = importer.run(postings)
+        self.stdout.write(self.style.SUCCESS(json.dumps(stats, indent=2)))
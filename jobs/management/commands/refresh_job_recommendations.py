@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.recommendations import RecommendationEngine
+from users.models import MyUser
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed job recommendations of every job seeker, or of the given users"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', metavar='EMAIL', help="Only refresh this user (repeatable)")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Job seekers scored per batch")
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['user']:
+            user_ids = list(MyUser.objects.filter(email__in=options['user']).values_list('pk', flat=True))
+            if len(user_ids) != len(set(options['user'])):
+                raise CommandError("Unknown user email(s).")
+        started = time.monotonic()
+        written = RecommendationEngine(chunk_size=options['chunk_size']).refresh_users(user_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} recommendations in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,63 @@
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from jobs.benchmarks import BenchmarkHistory, BenchmarkSuite, format_table
+from jobs.synthetic import SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = "Benchmark the hot views and services and append the results to the benchmark history file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help="Synthetic data scale for the throwaway benchmark database")
+        parser.add_argument('--current-db', action='store_true', help="Benchmark the configured database as it is instead of a fresh synthetic one")
+        parser.add_argument('--repeat', type=int, default=10, help="Timed runs per benchmark (after one cold run)")
+        parser.add_argument('--only', action='append', help="Benchmark to run (repeatable; default: all)")
+        parser.add_argument('--history', help="History file (default: BENCHMARK_HISTORY_FILE)")
+        parser.add_argument('--no-save', action='store_true', help="Print the results without recording them")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Median slowdown counted as a regression (0.2 = 20%%)")
+        parser.add_argument('--fail-on-regression', action='store_true', help="Exit with an error when a regression is found")
+
+    def handle(self, *args, **options):
+        suite = BenchmarkSuite(repeat=options['repeat'], only=options['only'])
+        if options['current_db']:
+            results = self._run(suite)
+        else:
+            results = self._run_on_fresh_database(suite, options['scale'])
+
+        history = BenchmarkHistory(options['history'])
+        meta = {'scale': None if options['current_db'] else options['scale'], 'repeat': options['repeat']}
+        if options['no_save']:
+            entry, previous = {**meta, 'results': results}, (history.load() or [None])[-1]
+        else:
+            entry, previous = history.append(results, **meta)
+        self.stdout.write(format_table(entry, previous))
+
+        regressions = BenchmarkHistory.regressions(entry, previous, options['tolerance'])
+        for regression in regressions:
+            self.stdout.write(self.style.WARNING(f"Regression: {regression}"))
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} benchmark regressions")
+
+    def _run(self, suite):
+        try:
+            return suite.run()
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e))
+
+    def _run_on_fresh_database(self, suite, scale):
+        # Same isolation as the test runner: a throwaway database and media directory
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+                self.stdout.write(f"Generating synthetic data (scale {scale})...")
+                SyntheticDataGenerator(scale=scale, seed=0).run()
+                return self._run(suite)
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
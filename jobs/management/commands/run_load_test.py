@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.loadtest import SCENARIOS, LoadTestDriver
+
+
+class Command(BaseCommand):
+    help = "Replay job board traffic in-process against the synthetic data and report per-view latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help="Scenario to run (repeatable; default: all)")
+        parser.add_argument('--concurrency', type=int, default=4, help="Simulated concurrent visitors (threads)")
+        parser.add_argument('--iterations', type=int, default=50, help="Scenarios run by each visitor")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--ai-latency', type=float, default=0.0, help="Seconds each fake OpenAI call takes")
+
+    def handle(self, *args, **options):
+        driver = LoadTestDriver(
+            scenarios=options['scenario'],
+            concurrency=options['concurrency'],
+            iterations=options['iterations'],
+            seed=options['seed'],
+            ai_latency=options['ai_latency'],
+        )
+        try:
+            report = driver.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(json.dumps(report, indent=2))
+        if any(scenario['errors'] for scenario in report['scenarios'].values()):
+            self.stdout.write(self.style.WARNING("Some requests failed; see the errors counts above."))
@@ -1,7 +1,8 @@
 from django.db import models
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 from django_q.tasks import async_task
 
 class JobCategory(models.Model):
@@ -34,6 +35,7 @@ class Company(models.Model):
     
     founded_in = models.IntegerField(blank=True, null=True, help_text="Year the company was founded")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -101,8 +103,20 @@ class JobListing(models.Model):
     
     expiry_date = models.DateField(blank=True, null=True)
     posted_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     is_active = models.BooleanField(default=True)
 
+    # Near-duplicate detection (see jobs.duplicates)
+    simhash = models.BigIntegerField(blank=True, null=True, editable=False)
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates',
+        help_text="Set when this listing was detected as a repost of another one"
+    )
+
     def __str__(self):
         return f"{self.title} at {self.company}"
     
@@ -125,6 +139,14 @@ class Application(models.Model):
         ('Rejected', 'Rejected'),
         ('Offer', 'Offer'),
     )
+    DELIVERY_STATUS_CHOICES = (
+        ('Not Queued', 'Not Queued'),
+        ('Pending', 'Pending'),
+        ('Sending', 'Sending'),
+        ('Retrying', 'Retrying'),
+        ('Sent', 'Sent'),
+        ('Failed', 'Failed'),
+    )
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='applications')
     job = models.ForeignKey(JobListing, on_delete=models.CASCADE, related_name='applications')
@@ -143,6 +165,20 @@ class Application(models.Model):
         related_name='application_cover_letters'
     )
 
+    # Background email delivery (see jobs.tasks.send_application_email_task)
+    delivery_status = models.CharField(max_length=20, choices=DELIVERY_STATUS_CHOICES, default='Not Queued')
+    delivery_attempts = models.PositiveIntegerField(default=0)
+    delivery_error = models.TextField(blank=True, null=True)
+    delivered_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'status', 'applied_at']),
+            models.Index(fields=['user', 'applied_at']),
+            models.Index(fields=['applied_at']),
+            models.Index(fields=['delivery_status']),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.job}"
 
@@ -175,7 +211,134 @@ class Wishlist(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.job.title}"
 
+class JobRecommendation(models.Model):
+    """One of a job seeker's best-matching listings, precomputed by jobs.recommendations."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='job_recommendations')
+    job = models.ForeignKey(JobListing, on_delete=models.CASCADE, related_name='recommendations')
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'job')
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.job} ({self.score:.2f})"
+
 @receiver(post_save, sender=JobListing)
 def trigger_job_notifications(sender, instance, created, **kwargs):
-    if created:
+    from .importers import job_signals_suppressed
+    if job_signals_suppressed():
+        return
+    if created and not instance.duplicate_of_id:
         async_task('jobs.tasks.send_job_notification_task', instance.id)
+
+@receiver(post_save, sender=JobListing)
+def recommend_new_listing(sender, instance, created, **kwargs):
+    from .importers import job_signals_suppressed
+    if job_signals_suppressed():
+        return
+    if created and instance.is_active and not instance.duplicate_of_id:
+        from .tasks import schedule_new_listing_recommendations
+        schedule_new_listing_recommendations(instance.posted_at)
+
+@receiver(post_save, sender=Application)
+def drop_applied_recommendation(sender, instance, created, **kwargs):
+    if created:
+        JobRecommendation.objects.filter(user_id=instance.user_id, job_id=instance.job_id).delete()
+
+@receiver(post_save, sender=JobRequirement)
+@receiver(post_delete, sender=JobRequirement)
+def touch_job_for_requirement(sender, instance, **kwargs):
+    from .importers import job_signals_suppressed
+    if job_signals_suppressed():
+        return
+    # Requirements render on the job page, so they count as a change to the job
+    JobListing.objects.filter(pk=instance.job_id).update(updated_at=timezone.now())
+    from .page_cache import invalidate
+    invalidate()
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def invalidate_job_analytics(sender, instance, **kwargs):
+    from .services import JobAnalyticsService
+    JobAnalyticsService.invalidate(instance.job_id)
+
+@receiver(post_save, sender='socialaccount.SocialApp')
+@receiver(post_delete, sender='socialaccount.SocialApp')
+def clear_gmail_client_cache(sender, instance, **kwargs):
+    from .services import GmailClientCache
+    GmailClientCache.clear()
+
+@receiver(post_save, sender=JobListing)
+@receiver(post_delete, sender=JobListing)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def schedule_sitemap_rebuild(sender, instance, **kwargs):
+    from .importers import job_signals_suppressed
+    if job_signals_suppressed():
+        return
+    from home.tasks import schedule_sitemap_rebuild
+    schedule_sitemap_rebuild()
+
+@receiver(post_save, sender=JobListing)
+@receiver(post_delete, sender=JobListing)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_page_cache(sender, instance, **kwargs):
+    from .importers import job_signals_suppressed
+    if job_signals_suppressed():
+        return
+    from .page_cache import invalidate
+    invalidate()
+
+@receiver(post_save, sender=Company)
+def index_company_name(sender, instance, **kwargs):
+    from .importers import job_signals_suppressed
+    if job_signals_suppressed():
+        return
+    from .company_matcher import CompanyNameIndex
+    if CompanyNameIndex._shared is not None:
+        CompanyNameIndex._shared.add(instance.pk, instance.name)
+
+@receiver(post_delete, sender=Company)
+def unindex_company_name(sender, instance, **kwargs):
+    from .company_matcher import CompanyNameIndex
+    if CompanyNameIndex._shared is not None:
+        CompanyNameIndex._shared.remove(instance.pk)
+
+@receiver(pre_save, sender=JobListing)
+def flag_duplicate_listing(sender, instance, **kwargs):
+    from .importers import job_signals_suppressed
+    if job_signals_suppressed() or kwargs.get('raw'):
+        return
+    from .duplicates import listing_simhash, find_duplicate
+    instance.simhash = listing_simhash(instance)
+    if instance._state.adding and not instance.duplicate_of_id and settings.JOB_DUPLICATE_DETECTION:
+        duplicate_of_id = find_duplicate(instance.simhash)
+        if duplicate_of_id:
+            # Keep the repost for reference but out of listings and notifications
+            instance.duplicate_of_id = duplicate_of_id
+            instance.is_active = False
+
+@receiver(post_save, sender=JobListing)
+def index_listing_fingerprint(sender, instance, **kwargs):
+    from .importers import job_signals_suppressed
+    if job_signals_suppressed():
+        return
+    from .duplicates import JobDuplicateIndex
+    index = JobDuplicateIndex._shared
+    if index is None:
+        return
+    if instance.is_active and not instance.duplicate_of_id and instance.simhash is not None:
+        index.add(instance.pk, instance.simhash)
+    else:
+        index.remove(instance.pk)
+
+@receiver(post_delete, sender=JobListing)
+def unindex_listing_fingerprint(sender, instance, **kwargs):
+    from .duplicates import JobDuplicateIndex
+    if JobDuplicateIndex._shared is not None:
+        JobDuplicateIndex._shared.remove(instance.pk)
@@ -0,0 +1,76 @@
+import hashlib
+import uuid
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+GENERATION_KEY = 'pages:generation'
+# Rendered in place of the CSRF token while capturing a page, then swapped for the
+# visitor's own token on every response so cached pages never share a token.
+CSRF_PLACEHOLDER = 'PAGE-CACHE-CSRF-TOKEN-PLACEHOLDER'
+
+
+def page_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'pages')]
+
+
+def generation():
+    """Current cache generation; bumping it retires every cached page and fragment at once."""
+    value = page_cache().get(GENERATION_KEY)
+    if value is None:
+        value = uuid.uuid4().hex
+        page_cache().add(GENERATION_KEY, value, None)
+        value = page_cache().get(GENERATION_KEY, value)
+    return value
+
+
+def invalidate():
+    page_cache().set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def _is_cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and 'messages' not in request.COOKIES
+    )
+
+
+def anonymous_page_cache(view_name):
+    """
+    Caches the full rendered page of a public view for logged-out visitors, keyed
+    by view, absolute URL and the current generation. Signed-in requests, flash
+    messages and non-200 responses bypass it.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable(request):
+                return view_func(request, *args, **kwargs)
+
+            url_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+            key = f'pages:{generation()}:{view_name}:{url_hash}'
+            cached = page_cache().get(key)
+            if cached is None:
+                request._page_cache_capture = True
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                cached = (response.content, response['Content-Type'])
+                page_cache().set(key, cached, getattr(settings, 'PAGE_CACHE_TIMEOUT', 300))
+
+            content, content_type = cached
+            if CSRF_PLACEHOLDER.encode() in content:
+                content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+            return HttpResponse(content, content_type=content_type)
+        return wrapper
+    return decorator
+
+
+def csrf_placeholder(request):
+    """Context processor: renders a placeholder CSRF token while a page is being captured."""
+    if getattr(request, '_page_cache_capture', False):
+        return {'csrf_token': CSRF_PLACEHOLDER}
+    return {}
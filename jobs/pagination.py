@@ -0,0 +1,94 @@
+import base64
+import json
+from datetime import datetime
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a queryset.
+
+    Rows are ordered by the given keys, all descending with NULLs last, and each
+    page continues strictly after the last row of the previous one, so deep pages
+    cost the same as the first. The last key must be unique (usually 'pk').
+    Key values must be numbers, datetimes or None so the cursor can round-trip.
+    """
+
+    def __init__(self, queryset, keys, per_page=50):
+        self.keys = list(keys)
+        self.per_page = per_page
+        self.aliases = [f'_keyset_{i}' for i in range(len(self.keys))]
+        self.queryset = queryset.annotate(
+            **{alias: F(key) for alias, key in zip(self.aliases, self.keys)}
+        ).order_by(*[F(alias).desc(nulls_last=True) for alias in self.aliases])
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        values = self.decode_cursor(cursor)
+        if values is not None:
+            queryset = queryset.filter(self._after(values))
+
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = self.encode_cursor(rows[-1])
+        return KeysetPage(rows, next_cursor)
+
+    def encode_cursor(self, obj):
+        # isoformat() keeps microseconds; DjangoJSONEncoder would cut them to
+        # milliseconds and rows sharing a millisecond would be skipped or repeated
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (getattr(obj, alias) for alias in self.aliases)
+        ]
+        raw = json.dumps(values).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.aliases):
+            return None
+
+        decoded = []
+        for value in values:
+            if isinstance(value, str):
+                value = parse_datetime(value)
+                if value is None:
+                    return None
+            decoded.append(value)
+        return decoded
+
+    def _after(self, values):
+        # (k0 < v0) OR (k0 = v0 AND k1 < v1) OR ... with NULL sorting after any value
+        condition = Q(pk__in=[])
+        equal_so_far = Q()
+        for alias, value in zip(self.aliases, values):
+            if value is None:
+                equal_so_far &= Q(**{f'{alias}__isnull': True})
+                continue
+            condition |= equal_so_far & (Q(**{f'{alias}__lt': value}) | Q(**{f'{alias}__isnull': True}))
+            equal_so_far &= Q(**{alias: value})
+        return condition
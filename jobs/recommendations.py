@@ -0,0 +1,231 @@
+import heapq
+import math
+import re
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from users.models import Education, MySkill, MyUser, PersonalProfile, UserDocument, WorkExperience
+from .models import Application, JobListing, JobRecommendation, JobRequirement
+
+EDUCATION_RANK = {'None': 0, 'Primary': 1, 'Secondary': 2, 'College': 3, 'University': 4}
+
+# Share of the score each signal can contribute; they sum to 1
+WEIGHTS = {'skills': 0.35, 'text': 0.25, 'category': 0.15, 'experience': 0.15, 'education': 0.10}
+
+STOPWORDS = frozenset("""
+    about all also and any are apply can candidate company for from good has have job our role should
+    strong team that the their this will with work working you your years year experience required
+""".split())
+
+
+def _terms(text):
+    return {term for term in re.findall(r'[a-z0-9+#]+', (text or '').lower()) if len(term) > 2 and term not in STOPWORDS}
+
+
+class SeekerProfile:
+    """The parts of a job seeker's profile that listings are scored against."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.skills = []  # term sets, one per skill
+        self.terms = set()  # CV, work history and education text
+        self.experience_years = 0.0
+        self.education_rank = 0
+        self.category_ids = set()
+        self.applied = set()
+
+    @classmethod
+    def load(cls, user_ids):
+        """Builds profiles for the given job seekers' ids in a fixed number of queries."""
+        profiles = {user_id: cls(user_id) for user_id in user_ids}
+        ids = list(profiles)
+        today = timezone.localdate()
+
+        for user_id, name in MySkill.objects.filter(user_id__in=ids).values_list('user_id', 'name'):
+            terms = _terms(name) or {name.lower()}
+            profiles[user_id].skills.append(terms)
+
+        experiences = WorkExperience.objects.filter(user_id__in=ids).values_list(
+            'user_id', 'job_title', 'description', 'start_date', 'end_date'
+        )
+        for user_id, title, description, start, end in experiences:
+            profile = profiles[user_id]
+            profile.terms |= _terms(title) | _terms(description)
+            profile.experience_years += max(((end or today) - start).days, 0) / 365.25
+
+        for user_id, level, degree, field in Education.objects.filter(user_id__in=ids).values_list(
+            'user_id', 'level', 'degree', 'field_of_study'
+        ):
+            profile = profiles[user_id]
+            profile.terms |= _terms(degree) | _terms(field)
+            profile.education_rank = max(profile.education_rank, EDUCATION_RANK.get(level, 0))
+
+        # Latest CV only; earlier uploads are superseded
+        cvs = UserDocument.objects.filter(
+            user_id__in=ids, document_type__name__icontains='CV', extracted_content__isnull=False
+        ).order_by('user_id', '-uploaded_at').values_list('user_id', 'extracted_content')
+        seen = set()
+        for user_id, content in cvs:
+            if user_id not in seen:
+                seen.add(user_id)
+                profiles[user_id].terms |= _terms(content)
+
+        preferred = PersonalProfile.preferred_categories.through.objects.filter(
+            personalprofile__user_id__in=ids
+        ).values_list('personalprofile__user_id', 'jobcategory_id')
+        for user_id, category_id in preferred:
+            profiles[user_id].category_ids.add(category_id)
+
+        for user_id, job_id in Application.objects.filter(user_id__in=ids).values_list('user_id', 'job_id'):
+            profiles[user_id].applied.add(job_id)
+        return profiles
+
+
+class ListingFeatures:
+    __slots__ = ('job_id', 'terms', 'category_id', 'education_rank', 'experience_years')
+
+    def __init__(self, job_id, terms, category_id, education_level, experience_years):
+        self.job_id = job_id
+        self.terms = terms
+        self.category_id = category_id
+        self.education_rank = EDUCATION_RANK.get(education_level, 0)
+        self.experience_years = experience_years or 0
+
+    @classmethod
+    def load(cls, listings, limit=None):
+        """Features of the newest `limit` active, non-duplicate listings in the queryset."""
+        rows = listings.filter(is_active=True, duplicate_of__isnull=True).order_by('-posted_at').values_list(
+            'id', 'title', 'description', 'category_id', 'education_level_required', 'experience_required_years', 'posted_at'
+        )
+        rows = list(rows[:limit] if limit else rows)
+        if not rows:
+            return []
+        # Requirements by date range rather than a long IN list of ids
+        requirements = defaultdict(set)
+        requirement_rows = JobRequirement.objects.filter(
+            job__is_active=True, job__posted_at__gte=rows[-1][6], job__posted_at__lte=rows[0][6]
+        ).values_list('job_id', 'description')
+        for job_id, description in requirement_rows:
+            requirements[job_id] |= _terms(description)
+        return [
+            cls(job_id, _terms(title) | _terms(description) | requirements.get(job_id, set()), category_id, education, experience)
+            for job_id, title, description, category_id, education, experience, _ in rows
+        ]
+
+
+def score(profile, listing):
+    """
+    How well a listing suits a seeker, from 0 to 1. Zero when nothing in the
+    profile's skills, text or preferred categories relates to the listing, so
+    experience and education alone never make a recommendation.
+    """
+    skills = sum(1 for skill in profile.skills if skill <= listing.terms)
+    skills = min(skills / min(len(profile.skills), 5), 1.0) if profile.skills else 0.0
+    shared = len(profile.terms & listing.terms)
+    text = shared / math.sqrt(len(profile.terms) * len(listing.terms)) if shared else 0.0
+    category = 1.0 if listing.category_id in profile.category_ids else 0.0
+    if not (skills or text or category):
+        return 0.0
+    experience = min(profile.experience_years / listing.experience_years, 1.0) if listing.experience_years else 1.0
+    education = 1.0 if profile.education_rank >= listing.education_rank else 0.0
+    return round(
+        WEIGHTS['skills'] * skills + WEIGHTS['text'] * text + WEIGHTS['category'] * category
+        + WEIGHTS['experience'] * experience + WEIGHTS['education'] * education,
+        4,
+    )
+
+
+class RecommendationEngine:
+    """
+    Keeps each job seeker's top JOB_RECOMMENDATIONS_PER_USER listings in
+    JobRecommendation, scored by score() against the newest
+    JOB_RECOMMENDATION_CANDIDATES active listings.
+
+    refresh_users() recomputes whole lists (after a profile change);
+    add_listings() scores new listings against every seeker and only writes
+    where they beat the seeker's current list.
+    """
+
+    def __init__(self, per_user=None, candidates=None, chunk_size=500):
+        self.per_user = per_user or getattr(settings, 'JOB_RECOMMENDATIONS_PER_USER', 20)
+        self.candidates = candidates or getattr(settings, 'JOB_RECOMMENDATION_CANDIDATES', 5000)
+        self.chunk_size = chunk_size
+
+    def _seeker_chunks(self, user_ids=None):
+        seekers = MyUser.objects.filter(role='Job Seeker', is_active=True)
+        if user_ids is not None:
+            seekers = seekers.filter(pk__in=user_ids)
+        ids = list(seekers.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), self.chunk_size):
+            yield SeekerProfile.load(ids[start:start + self.chunk_size])
+
+    def _top(self, profile, listings, limit):
+        scored = (
+            (score(profile, listing), listing.job_id)
+            for listing in listings if listing.job_id not in profile.applied
+        )
+        return heapq.nlargest(limit, (item for item in scored if item[0] > 0))
+
+    def refresh_users(self, user_ids=None):
+        """Recomputes the lists of the given job seekers (default: all). Returns the number of rows written."""
+        listings = ListingFeatures.load(JobListing.objects.all(), limit=self.candidates)
+        written = 0
+        for profiles in self._seeker_chunks(user_ids):
+            rows = [
+                JobRecommendation(user_id=user_id, job_id=job_id, score=value)
+                for user_id, profile in profiles.items()
+                for value, job_id in self._top(profile, listings, self.per_user)
+            ]
+            with transaction.atomic():
+                JobRecommendation.objects.filter(user_id__in=list(profiles)).delete()
+                JobRecommendation.objects.bulk_create(rows)
+            written += len(rows)
+        return written
+
+    def add_listings(self, job_ids):
+        """Scores new listings against every job seeker. Returns the number of rows written."""
+        job_ids = list(job_ids)
+        written = 0
+        for start in range(0, len(job_ids), self.candidates):
+            listings = ListingFeatures.load(JobListing.objects.filter(pk__in=job_ids[start:start + self.candidates]))
+            if listings:
+                written += self._add(listings)
+        return written
+
+    def _add(self, listings):
+        written = 0
+        for profiles in self._seeker_chunks():
+            current = {
+                row['user_id']: (row['n'], row['floor'])
+                for row in JobRecommendation.objects.filter(user_id__in=list(profiles))
+                .values('user_id').annotate(n=Count('id'), floor=Min('score'))
+            }
+            rows = []
+            for user_id, profile in profiles.items():
+                count, floor = current.get(user_id, (0, 0.0))
+                rows.extend(
+                    JobRecommendation(user_id=user_id, job_id=job_id, score=value)
+                    for value, job_id in self._top(profile, listings, self.per_user)
+                    if count < self.per_user or value > floor
+                )
+            if not rows:
+                continue
+            with transaction.atomic():
+                JobRecommendation.objects.bulk_create(rows, ignore_conflicts=True)
+                self._trim({row.user_id for row in rows})
+            written += len(rows)
+        return written
+
+    def _trim(self, user_ids):
+        """Deletes rows beyond each user's top per_user."""
+        kept = defaultdict(int)
+        extra = []
+        rows = JobRecommendation.objects.filter(user_id__in=user_ids).order_by('user_id', '-score', '-job_id')
+        for pk, user_id in rows.values_list('pk', 'user_id'):
+            kept[user_id] += 1
+            if kept[user_id] > self.per_user:
+                extra.append(pk)
+        if extra:
+            JobRecommendation.objects.filter(pk__in=extra).delete()
@@ -1,12 +1,227 @@
 import base64
+import csv
+import io
+import json
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta, timezone as dt_timezone
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
+from email.generator import BytesGenerator
+from email.message import MIMEPart
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import Avg, Count, Q
 from allauth.socialaccount.models import SocialToken, SocialAccount, SocialApp
-from googleapiclient.discovery import build
+from django.utils import timezone
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import MediaIoBaseUpload
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from .models import JobListing, JobRequirement
+
+
+class GmailClientCache:
+    """
+    Per-process cache for everything the Gmail API send path needs: the parsed
+    discovery document, the Google SocialApp credentials and each user's
+    OAuth credentials, refreshed shortly before the access token expires.
+    """
+    SOCIAL_APP_TTL = 300  # seconds
+    TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+    TOKEN_URI = 'https://oauth2.googleapis.com/token'
+    MAX_CACHED_CREDENTIALS = 1000
+
+    _lock = threading.Lock()
+    _discovery_document = None
+    _social_app = None
+    _social_app_expires = 0
+    _credentials = OrderedDict()
+
+    @classmethod
+    def get_discovery_document(cls):
+        # Uses the discovery document bundled with google-api-python-client,
+        # so building a service never touches the network.
+        if cls._discovery_document is None:
+            cls._discovery_document = json.loads(get_static_doc('gmail', 'v1'))
+        return cls._discovery_document
+
+    @classmethod
+    def build_service(cls, credentials):
+        return build_from_document(cls.get_discovery_document(), credentials=credentials)
+
+    @classmethod
+    def get_social_app(cls):
+        """Returns the Google SocialApp, raising SocialApp.DoesNotExist if it is not configured."""
+        now = time.monotonic()
+        if cls._social_app is None or now >= cls._social_app_expires:
+            cls._social_app = SocialApp.objects.get(provider='google')
+            cls._social_app_expires = now + cls.SOCIAL_APP_TTL
+        return cls._social_app
+
+    @classmethod
+    def get_credentials(cls, social_token, social_app):
+        """
+        Returns cached OAuth credentials for a SocialToken, refreshing the access
+        token when it is within TOKEN_REFRESH_MARGIN of expiry. Refreshed tokens
+        are written back to the SocialToken so other workers pick them up.
+        The refresh runs under a per-account lock, so a slow token round-trip
+        only holds up sends for that account.
+        """
+        key = (social_token.pk, social_token.token_secret)
+        with cls._lock:
+            entry = cls._credentials.get(key)
+            if entry is None:
+                expiry = None
+                if social_token.expires_at:
+                    # google-auth works with naive UTC datetimes
+                    expiry = timezone.make_naive(social_token.expires_at, dt_timezone.utc)
+                creds = Credentials(
+                    token=social_token.token,
+                    refresh_token=social_token.token_secret,
+                    token_uri=cls.TOKEN_URI,
+                    client_id=social_app.client_id,
+                    client_secret=social_app.secret,
+                    expiry=expiry,
+                )
+                entry = cls._credentials[key] = (creds, threading.Lock())
+                if len(cls._credentials) > cls.MAX_CACHED_CREDENTIALS:
+                    cls._credentials.popitem(last=False)
+            else:
+                cls._credentials.move_to_end(key)
+        creds, refresh_lock = entry
+
+        with refresh_lock:
+            if creds.refresh_token and cls._needs_refresh(creds):
+                creds.refresh(Request())
+                SocialToken.objects.filter(pk=social_token.pk).update(
+                    token=creds.token,
+                    expires_at=timezone.make_aware(creds.expiry, dt_timezone.utc) if creds.expiry else None,
+                )
+        return creds
+
+    @classmethod
+    def _needs_refresh(cls, creds):
+        if not creds.token:
+            return True
+        if creds.expiry is None:
+            return False
+        return creds.expiry - cls.TOKEN_REFRESH_MARGIN <= timezone.now().replace(tzinfo=None)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._social_app = None
+            cls._social_app_expires = 0
+            cls._credentials = OrderedDict()
+
+class AttachmentTooLargeError(Exception):
+    pass
+
+
+class MimeAttachmentCache:
+    """
+    Builds base64-encoded MIME attachment parts by streaming the source file
+    through the encoder in chunks, instead of reading it whole and encoding the
+    full message again. Encoded payloads are kept in a small per-process LRU
+    keyed by (path, size, mtime), so a retried send reuses them.
+    """
+    # 57 raw bytes encode to one full 76-character base64 line
+    READ_CHUNK_SIZE = 57 * 1024
+
+    _lock = threading.Lock()
+    _encoded = OrderedDict()
+    _encoded_bytes = 0
+
+    @classmethod
+    def build_part(cls, source, filename):
+        """
+        Returns a MIMEPart attachment for a file path or Django File, raising
+        AttachmentTooLargeError above EMAIL_ATTACHMENT_MAX_BYTES.
+        """
+        path = source if isinstance(source, str) else getattr(source, 'path', None)
+        size = os.path.getsize(path) if path else source.size
+        max_bytes = getattr(settings, 'EMAIL_ATTACHMENT_MAX_BYTES', 10 * 1024 * 1024)
+        if size > max_bytes:
+            raise AttachmentTooLargeError(
+                f"{filename} is {size // 1024} KB, above the {max_bytes // 1024} KB attachment limit."
+            )
+
+        key = (path, size, os.path.getmtime(path)) if path else None
+        payload = cls._get(key)
+        if payload is None:
+            if path:
+                with open(path, 'rb') as f:
+                    payload = cls._encode(f)
+            else:
+                source.open('rb')
+                try:
+                    payload = cls._encode(source)
+                finally:
+                    source.seek(0)
+            cls._put(key, payload)
+
+        part = MIMEPart()
+        part['Content-Type'] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        part['Content-Transfer-Encoding'] = 'base64'
+        part.set_payload(payload)
+        part.add_header('Content-Disposition', 'attachment', filename=filename)
+        return part
+
+    @classmethod
+    def _encode(cls, fileobj):
+        encoded = io.StringIO()
+        while True:
+            chunk = fileobj.read(cls.READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            encoded.write(base64.encodebytes(chunk).decode('ascii'))
+        return encoded.getvalue()
+
+    @classmethod
+    def _get(cls, key):
+        if key is None:
+            return None
+        with cls._lock:
+            payload = cls._encoded.get(key)
+            if payload is not None:
+                cls._encoded.move_to_end(key)
+            return payload
+
+    @classmethod
+    def _put(cls, key, payload):
+        limit = getattr(settings, 'EMAIL_ATTACHMENT_CACHE_BYTES', 32 * 1024 * 1024)
+        if key is None or len(payload) > limit:
+            return
+        with cls._lock:
+            if key in cls._encoded:
+                return
+            cls._encoded[key] = payload
+            cls._encoded_bytes += len(payload)
+            while cls._encoded_bytes > limit:
+                _, evicted = cls._encoded.popitem(last=False)
+                cls._encoded_bytes -= len(evicted)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._encoded = OrderedDict()
+            cls._encoded_bytes = 0
+
+    @staticmethod
+    def attachment_name(prefix, source):
+        name = source if isinstance(source, str) else source.name
+        ext = name.rsplit('.', 1)[-1].lower() if '.' in name else 'pdf'
+        return f'{prefix}.{ext}'
+
 
 class EmailService:
     @staticmethod
@@ -25,12 +240,15 @@ class EmailService:
                 
                 if social_token:
                     print(f"DEBUG Email: Found SocialToken for user. Attempting Gmail API...")
-                    social_app = SocialApp.objects.get(provider='google')
+                    social_app = GmailClientCache.get_social_app()
                     return EmailService._send_via_gmail_api(user, job, cover_letter_file, social_token, social_app, cv_file_path)
                 else:
                     print(f"DEBUG Email: No SocialToken found for user. Falling back to SMTP.")
             except (SocialAccount.DoesNotExist, SocialApp.DoesNotExist):
                 print(f"DEBUG Email: Google integration not fully configured for user. Falling back to SMTP.")
+            except AttachmentTooLargeError:
+                # SMTP would carry the same oversize attachment
+                raise
             except Exception as e:
                 print(f"DEBUG Email Error: Unexpected transition error: {str(e)}")
             
@@ -39,15 +257,8 @@ class EmailService:
 
     @staticmethod
     def _send_via_gmail_api(user, job, cover_letter_file, social_token, social_app, cv_file_path):
-        creds = Credentials(
-            token=social_token.token,
-            refresh_token=social_token.token_secret,
-            token_uri='https://oauth2.googleapis.com/token',
-            client_id=social_app.client_id,
-            client_secret=social_app.secret,
-        )
-        
-        service = build('gmail', 'v1', credentials=creds)
+        creds = GmailClientCache.get_credentials(social_token, social_app)
+        service = GmailClientCache.build_service(creds)
         
         message = MIMEMultipart()
         message['to'] = job.employer_email
@@ -57,38 +268,31 @@ class EmailService:
         email_body = f"Hello,\n\nA new job matching your preferences has been posted on JobMatch:\n\nBest regards,\n{user.profile.full_name or user.email}"
         message.attach(MIMEText(email_body, 'plain'))
 
-        # Attach Cover Letter
+        # Attach Cover Letter and CV (streamed into base64, cached for retries)
         if cover_letter_file:
-            content = cover_letter_file.read()
-            ext = cover_letter_file.name.split('.')[-1] if '.' in cover_letter_file.name else 'pdf'
-            mime_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' if ext == 'docx' else 'application/pdf'
-            
-            part = MIMEApplication(content)
-            part.add_header('Content-Disposition', 'attachment', filename=f'Cover_Letter.{ext}')
-            # Override content-type for docx
-            if ext == 'docx':
-                part.set_type(mime_type)
-            message.attach(part)
-            cover_letter_file.seek(0)
-
-        # Attach CV
+            message.attach(MimeAttachmentCache.build_part(
+                cover_letter_file, MimeAttachmentCache.attachment_name('Cover_Letter', cover_letter_file)
+            ))
         if cv_file_path:
-            with open(cv_file_path, 'rb') as f:
-                ext = cv_file_path.split('.')[-1] if '.' in cv_file_path else 'pdf'
-                part = MIMEApplication(f.read())
-                part.add_header('Content-Disposition', 'attachment', filename=f'CV.{ext}')
-                message.attach(part)
-
-        raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
-        create_message = {'raw': raw_message}
-        
+            message.attach(MimeAttachmentCache.build_part(
+                cv_file_path, MimeAttachmentCache.attachment_name('CV', cv_file_path)
+            ))
+
+        # Upload the RFC 822 message as media instead of base64-encoding the
+        # whole thing into a JSON body; it is spooled to disk once it gets big.
+        spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
         try:
-            service.users().messages().send(userId="me", body=create_message).execute()
+            BytesGenerator(spool).flatten(message)
+            spool.seek(0)
+            media = MediaIoBaseUpload(spool, mimetype='message/rfc822', chunksize=1024 * 1024, resumable=True)
+            service.users().messages().send(userId="me", body={}, media_body=media).execute()
             print("DEBUG Email: Gmail API Send Successful")
             return True, "Email sent via Gmail API"
         except Exception as e:
             print(f"DEBUG Email Error: Gmail API Error: {str(e)}")
             return False, f"Gmail API Error: {str(e)}"
+        finally:
+            spool.close()
 
     @staticmethod
     def _send_via_smtp(user, job, cover_letter_file, cv_file_path):
@@ -162,14 +366,14 @@ FindAJob.ai Team"""
         )
 
         if cover_letter_file:
-            ext = cover_letter_file.name.split('.')[-1] if '.' in cover_letter_file.name else 'pdf'
-            mime_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' if ext == 'docx' else 'application/pdf'
-            email.attach(f'Cover_Letter.{ext}', cover_letter_file.read(), mime_type)
-            cover_letter_file.seek(0)
+            email.attach(MimeAttachmentCache.build_part(
+                cover_letter_file, MimeAttachmentCache.attachment_name('Cover_Letter', cover_letter_file)
+            ))
 
         if cv_file_path:
-            with open(cv_file_path, 'rb') as f:
-                email.attach('CV.pdf', f.read(), 'application/pdf')
+            email.attach(MimeAttachmentCache.build_part(
+                cv_file_path, MimeAttachmentCache.attachment_name('CV', cv_file_path)
+            ))
 
         try:
             email.send()
@@ -177,3 +381,258 @@ FindAJob.ai Team"""
             return True, f"Application materials sent to your email. Please follow the instructions to complete your submission to {display_target}."
         except Exception as e:
             return False, f"SMTP Error: {str(e)}"
+
+
+class JobAnalyticsService:
+    STATUS_ORDER = ['Under Review', 'Shortlisted', 'Interviewing', 'Offer', 'Rejected']
+    STATUS_COLORS = {
+        'Interviewing': '#f59e0b',
+        'Shortlisted': '#8b5cf6',
+        'Offer': 'var(--success)',
+        'Rejected': '#ef4444',
+    }
+
+    @staticmethod
+    def cache_key(job_id):
+        return f"jobs:analytics:{job_id}"
+
+    @staticmethod
+    def get_snapshot(job):
+        """
+        Returns the analytics snapshot for a job, served from the cache when
+        JOB_ANALYTICS_CACHE_TIMEOUT is set (0 disables caching).
+        """
+        timeout = getattr(settings, 'JOB_ANALYTICS_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return JobAnalyticsService.compute_snapshot(job)
+
+        key = JobAnalyticsService.cache_key(job.pk)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = JobAnalyticsService.compute_snapshot(job)
+            cache.set(key, snapshot, timeout)
+        return snapshot
+
+    @staticmethod
+    def compute_snapshot(job):
+        """
+        Computes applicant totals, average scores and the status distribution
+        for a job in a single aggregate query.
+        """
+        aggregates = {
+            'total': Count('pk'),
+            'avg_ai': Avg('cv_used__ai_score'),
+            'avg_cl': Avg('cover_letter_document__cl_analysis__total_score'),
+        }
+        for i, status in enumerate(JobAnalyticsService.STATUS_ORDER):
+            aggregates[f'status_{i}'] = Count('pk', filter=Q(status=status))
+
+        result = job.applications.aggregate(**aggregates)
+        total_applicants = result['total']
+
+        stats = []
+        for i, status in enumerate(JobAnalyticsService.STATUS_ORDER):
+            count = result[f'status_{i}']
+            stats.append({
+                'label': status,
+                'count': count,
+                'pct': (count / total_applicants * 100) if total_applicants > 0 else 0,
+                'color': JobAnalyticsService.STATUS_COLORS.get(status, 'var(--primary)'),
+                'css_class': status.lower(),
+            })
+
+        return {
+            'total_applicants': total_applicants,
+            'avg_ai_score': round(result['avg_ai'] or 0, 1),
+            'avg_cl_score': round(result['avg_cl'] or 0, 1),
+            'stats': stats,
+        }
+
+    @staticmethod
+    def invalidate(*job_ids):
+        cache.delete_many([JobAnalyticsService.cache_key(job_id) for job_id in job_ids])
+
+
+class JobRequirementService:
+    @staticmethod
+    def from_post(data):
+        """
+        Reads the requirement rows posted by the job forms: parallel
+        requirement_description inputs and requirement_mandatory checkboxes
+        whose values are the row indexes.
+        """
+        mandatory = set(data.getlist('requirement_mandatory'))
+        return [
+            {'description': description.strip(), 'is_mandatory': str(i) in mandatory}
+            for i, description in enumerate(data.getlist('requirement_description'))
+        ]
+
+    @staticmethod
+    def sync(job, requirements):
+        """
+        Makes a job's requirements match `requirements` (dicts with description
+        and is_mandatory, in display order) with at most one bulk_update, one
+        bulk_create and one delete. Existing rows are reused in order, so editing
+        a posting only rewrites the rows that changed.
+        """
+        wanted = [
+            ((r.get('description') or '').strip()[:255], bool(r.get('is_mandatory', True)))
+            for r in requirements
+        ]
+        wanted = [(description, is_mandatory) for description, is_mandatory in wanted if description]
+
+        # Joins the caller's transaction (the job save) without a savepoint
+        with transaction.atomic(savepoint=False):
+            existing = list(job.requirements.order_by('pk'))
+            changed = []
+            for requirement, (description, is_mandatory) in zip(existing, wanted):
+                if (requirement.description, requirement.is_mandatory) != (description, is_mandatory):
+                    requirement.description = description
+                    requirement.is_mandatory = is_mandatory
+                    changed.append(requirement)
+            new = [
+                JobRequirement(job=job, description=description, is_mandatory=is_mandatory)
+                for description, is_mandatory in wanted[len(existing):]
+            ]
+            removed = [requirement.pk for requirement in existing[len(wanted):]]
+
+            if changed:
+                JobRequirement.objects.bulk_update(changed, ['description', 'is_mandatory'])
+            if new:
+                JobRequirement.objects.bulk_create(new)
+            if removed:
+                from .importers import suppress_job_signals
+                with suppress_job_signals():
+                    JobRequirement.objects.filter(pk__in=removed).delete()
+            if not (changed or new or removed):
+                return False
+
+            # Bulk writes skip touch_job_for_requirement, so do its work once here
+            JobListing.objects.filter(pk=job.pk).update(updated_at=timezone.now())
+            from .page_cache import invalidate
+            invalidate()
+        return True
+
+
+class _EchoBuffer:
+    """File-like object whose write() hands the value straight back, for streaming csv.writer output."""
+    def write(self, value):
+        return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Writable sink that collects bytes until drained, so Parquet row groups can be streamed."""
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ApplicantExportService:
+    COLUMNS = [
+        ('application_id', 'pk'),
+        ('full_name', 'user__profile__full_name'),
+        ('email', 'user__email'),
+        ('phone', 'user__profile__phone_primary'),
+        ('status', 'status'),
+        ('applied_at', 'applied_at'),
+        ('cv_score', 'cv_used__ai_score'),
+        ('cover_letter_score', 'cover_letter_document__cl_analysis__total_score'),
+    ]
+
+    @staticmethod
+    def iter_rows(applications):
+        """
+        Yields applicant rows as tuples, fetched in pk-ordered keyset chunks so
+        memory stays flat regardless of the number of applications. A single
+        iterator() query would not: mysqlclient buffers the whole result set.
+        """
+        chunk_size = getattr(settings, 'APPLICANT_EXPORT_CHUNK_SIZE', 2000)
+        fields = [field for _, field in ApplicantExportService.COLUMNS]
+        rows = applications.order_by('pk').values_list(*fields)
+        last_pk = 0
+        while True:
+            chunk = list(rows.filter(pk__gt=last_pk)[:chunk_size])
+            yield from chunk
+            if len(chunk) < chunk_size:
+                return
+            last_pk = chunk[-1][0]
+
+    # Spreadsheet apps treat cells starting with these as formulas
+    FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+    # Phone numbers and signed numbers are left alone; they evaluate to themselves
+    NUMERIC_VALUE = re.compile(r'^[+-]?\d[\d ().-]*$')
+
+    @staticmethod
+    def csv_safe(value):
+        """Prefixes applicant-entered text that would run as a formula with a quote."""
+        if not isinstance(value, str) or not value.startswith(ApplicantExportService.FORMULA_PREFIXES):
+            return value
+        if value[0] in '+-' and ApplicantExportService.NUMERIC_VALUE.match(value):
+            return value
+        return "'" + value
+
+    @staticmethod
+    def stream_csv(applications):
+        writer = csv.writer(_EchoBuffer())
+        yield writer.writerow([name for name, _ in ApplicantExportService.COLUMNS])
+        for row in ApplicantExportService.iter_rows(applications):
+            yield writer.writerow([ApplicantExportService.csv_safe(value) for value in row])
+
+    @staticmethod
+    def parquet_available():
+        try:
+            import pyarrow  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @staticmethod
+    def stream_parquet(applications):
+        """
+        Streams a Parquet file, writing one row group per fetched chunk.
+        Requires the optional pyarrow dependency.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ('application_id', pa.int64()),
+            ('full_name', pa.string()),
+            ('email', pa.string()),
+            ('phone', pa.string()),
+            ('status', pa.string()),
+            ('applied_at', pa.timestamp('us', tz='UTC')),
+            ('cv_score', pa.int32()),
+            ('cover_letter_score', pa.int32()),
+        ])
+        chunk_size = getattr(settings, 'APPLICANT_EXPORT_CHUNK_SIZE', 2000)
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+
+        batch = []
+        for row in ApplicantExportService.iter_rows(applications):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                writer.write_table(pa.Table.from_pylist([dict(zip(schema.names, r)) for r in batch], schema=schema))
+                batch = []
+                yield sink.drain()
+        if batch:
+            writer.write_table(pa.Table.from_pylist([dict(zip(schema.names, r)) for r in batch], schema=schema))
+        writer.close()
+        yield sink.drain()
@@ -0,0 +1,292 @@
+import random
+from datetime import date, timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from users.models import (
+    MyUser, PersonalProfile, NotificationPreference, UserNotification, DocumentType,
+    UserDocument, MySkill, WorkExperience, Education,
+)
+from .importers import JobImportWriter, suppress_job_signals
+from .models import Application, Company, JobCategory, JobListing
+
+# Every synthetic row is tagged with this domain so a later run can remove it
+SYNTHETIC_DOMAIN = 'synthetic.example.com'
+SYNTHETIC_PASSWORD = 'synthetic-password'
+
+CATEGORIES = {
+    'Software Engineering': ['Backend Developer', 'Frontend Developer', 'DevOps Engineer', 'QA Engineer', 'Mobile Developer'],
+    'Finance': ['Accountant', 'Financial Analyst', 'Credit Officer', 'Auditor', 'Payroll Administrator'],
+    'Healthcare': ['Registered Nurse', 'Clinical Officer', 'Pharmacist', 'Lab Technologist', 'Nutritionist'],
+    'Sales / Marketing': ['Sales Executive', 'Digital Marketer', 'Brand Manager', 'Account Manager', 'Copywriter'],
+    'Education': ['Mathematics Teacher', 'ECD Teacher', 'Lecturer', 'Librarian', 'Tutor'],
+    'Logistics': ['Driver', 'Warehouse Supervisor', 'Fleet Manager', 'Procurement Officer', 'Dispatcher'],
+}
+SKILLS = {
+    'Software Engineering': ['Python', 'Django', 'JavaScript', 'React', 'Docker', 'PostgreSQL', 'AWS', 'Git'],
+    'Finance': ['Excel', 'QuickBooks', 'IFRS', 'Tax Returns', 'Sage', 'Budgeting', 'Audit', 'Payroll'],
+    'Healthcare': ['Patient Care', 'Triage', 'Phlebotomy', 'Pharmacology', 'First Aid', 'Record Keeping'],
+    'Sales / Marketing': ['Negotiation', 'SEO', 'Google Ads', 'CRM', 'Copywriting', 'Social Media'],
+    'Education': ['Lesson Planning', 'Classroom Management', 'CBC Curriculum', 'Mentoring', 'Assessment'],
+    'Logistics': ['Route Planning', 'Inventory', 'Forklift', 'Procurement', 'Fleet Tracking', 'Driving Licence'],
+}
+FIRST_NAMES = ['Amina', 'Brian', 'Cynthia', 'David', 'Esther', 'Felix', 'Grace', 'Hassan', 'Irene', 'James',
+               'Kevin', 'Lydia', 'Mercy', 'Njeri', 'Otieno', 'Purity', 'Rose', 'Samuel', 'Tabitha', 'Wanjiru']
+LAST_NAMES = ['Achieng', 'Kamau', 'Mwangi', 'Odhiambo', 'Wanjala', 'Kiptoo', 'Njoroge', 'Mutua', 'Chebet', 'Omondi']
+CITIES = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika', 'Remote']
+COMPANY_WORDS = ['Savanna', 'Acacia', 'Rift', 'Lakeside', 'Summit', 'Baobab', 'Coastal', 'Highland', 'Unity', 'Zenith']
+COMPANY_KINDS = ['Technologies', 'Logistics', 'Bank', 'Hospital', 'Academy', 'Traders', 'Media', 'Foods', 'Insurance']
+LEVELS = ['Secondary', 'College', 'University']
+SENTENCES = [
+    'You will work closely with a small, supportive team.',
+    'The role reports to the head of department.',
+    'We value ownership, curiosity and clear communication.',
+    'Occasional travel within the region may be required.',
+    'We offer medical cover, a pension scheme and paid leave.',
+    'You will help us improve our processes as we grow.',
+    'Previous experience in a similar organisation is an advantage.',
+    'Shortlisted candidates will be invited for an interview.',
+]
+
+# Rows created per unit of scale
+BASE_COUNTS = {
+    'companies': 50,
+    'listings': 500,
+    'seekers': 200,
+    'employers': 20,
+    'applications': 1000,
+    'notifications': 2000,
+}
+
+
+class SyntheticDataGenerator:
+    """
+    Generates a reproducible job board: companies, listings with requirements,
+    job seekers with profiles, skills, work history, education and a CV, employers,
+    applications, notifications and the seekers' precomputed recommendations.
+    Row counts are BASE_COUNTS times the scale factor, and everything is written
+    with bulk_create, so a scale of 100 (50k listings, 20k users) takes minutes
+    rather than hours.
+    """
+
+    def __init__(self, scale=1.0, seed=0, chunk_size=1000, stdout=None):
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.stdout = stdout
+        self.counts = {name: max(1, int(count * scale)) for name, count in BASE_COUNTS.items()}
+        self.stats = {}
+
+    def _log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+
+    @staticmethod
+    def clear():
+        """Deletes the rows created by earlier runs."""
+        with transaction.atomic(), suppress_job_signals():
+            JobListing.objects.filter(url__startswith=f'https://{SYNTHETIC_DOMAIN}/').delete()
+            Company.objects.filter(website__startswith=f'https://{SYNTHETIC_DOMAIN}/').delete()
+            MyUser.objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}').delete()
+
+    def run(self):
+        job_ids = self._create_listings()
+        company_ids = list(Company.objects.filter(
+            website__startswith=f'https://{SYNTHETIC_DOMAIN}/'
+        ).values_list('id', flat=True))
+        self._create_users('employer', self.counts['employers'], role='Employer', company_ids=company_ids)
+        seekers = self._create_users('seeker', self.counts['seekers'], role='Job Seeker')
+        cvs = self._create_seeker_details(seekers)
+        self._create_applications(seekers, cvs, job_ids)
+        self._create_notifications(seekers, job_ids)
+        self._create_recommendations(seekers)
+        return self.stats
+
+    def _listing_item(self, number):
+        category = self.random.choice(list(CATEGORIES))
+        title = self.random.choice(CATEGORIES[category])
+        company = self._company_name(self.random.randrange(self.counts['companies']))
+        skills = self.random.sample(SKILLS[category], 4)
+        description = ' '.join(
+            [f'{company} is hiring a {title} in {self.random.choice(CITIES)}.',
+             f'The ideal candidate is strong in {", ".join(skills[:3])}.']
+            + self.random.sample(SENTENCES, 4)
+        )
+        method = self.random.choice(['email', 'website', 'website', 'google_form'])
+        return {
+            'company': {
+                'name': company,
+                'website': f'https://{SYNTHETIC_DOMAIN}/companies/{company.lower().replace(" ", "-")}',
+                'location': self.random.choice(CITIES),
+            },
+            'job_listing': {
+                'title': f'{self.random.choice(["", "Senior ", "Junior ", "Lead "])}{title}',
+                'category': category,
+                'location': self.random.choice(CITIES),
+                'description': description,
+                'url': f'https://{SYNTHETIC_DOMAIN}/jobs/{number}',
+                'terms': self.random.choice(['Full Time', 'Full Time', 'Part Time', 'Contract']),
+                'education_level_required': self.random.choice(LEVELS + ['None']),
+                'experience_required_years': self.random.choice([None, 0, 1, 2, 3, 5, 8]),
+                'application_method': method,
+                'employer_email': f'jobs{number}@{SYNTHETIC_DOMAIN}' if method == 'email' else None,
+                'expiry_date': (date.today() + timedelta(days=self.random.randint(-10, 60))).isoformat(),
+            },
+            'requirements': [
+                {'description': f'Experience with {skill}', 'is_mandatory': i < 2}
+                for i, skill in enumerate(skills)
+            ],
+        }
+
+    def _company_name(self, number):
+        return (f'{COMPANY_WORDS[number % len(COMPANY_WORDS)]} '
+                f'{COMPANY_KINDS[number // len(COMPANY_WORDS) % len(COMPANY_KINDS)]} {number}')
+
+    def _create_listings(self):
+        # Generated text never repeats closely enough to need SimHash, so skip it for speed
+        writer = JobImportWriter(chunk_size=self.chunk_size, notify=False, create_categories=True, fingerprint=False)
+        writer.write(self._listing_item(number) for number in range(self.counts['listings']))
+        self.stats.update(listings=writer.stats['created'], companies=writer.stats['companies_created'])
+        self._log(f"Created {writer.stats['created']} listings")
+        return writer.created_job_ids
+
+    def _create_users(self, kind, count, role, company_ids=None):
+        # Hashing is slow by design; every synthetic user shares one hash
+        password = make_password(SYNTHETIC_PASSWORD)
+        # Numbering continues after earlier runs so emails stay unique
+        offset = MyUser.objects.filter(email__startswith=kind, email__endswith=f'@{SYNTHETIC_DOMAIN}').count()
+        users = [
+            MyUser(
+                email=f'{kind}{offset + i}@{SYNTHETIC_DOMAIN}',
+                password=password,
+                role=role,
+                company_id=self.random.choice(company_ids) if company_ids else None,
+            )
+            for i in range(count)
+        ]
+        MyUser.objects.bulk_create(users, batch_size=self.chunk_size)
+        # Re-read the ids, which bulk_create only sets on some databases
+        emails = [user.email for user in users]
+        users = list(MyUser.objects.filter(email__in=emails).order_by('id'))
+
+        categories = list(JobCategory.objects.values_list('id', flat=True))
+        PersonalProfile.objects.bulk_create([
+            PersonalProfile(
+                user=user,
+                full_name=f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}',
+                phone_primary=f'07{self.random.randint(10000000, 99999999)}',
+                city=self.random.choice(CITIES),
+                country='Kenya',
+            )
+            for user in users
+        ], batch_size=self.chunk_size)
+        NotificationPreference.objects.bulk_create(
+            [NotificationPreference(user=user, email_enabled=self.random.random() < 0.7) for user in users],
+            batch_size=self.chunk_size,
+        )
+        if role == 'Job Seeker' and categories:
+            profile_ids = dict(PersonalProfile.objects.filter(user__in=users).values_list('user_id', 'id'))
+            through = PersonalProfile.preferred_categories.through
+            through.objects.bulk_create([
+                through(personalprofile_id=profile_ids[user.pk], jobcategory_id=category_id)
+                for user in users
+                for category_id in self.random.sample(categories, min(2, len(categories)))
+            ], batch_size=self.chunk_size)
+        self.stats[f'{kind}s'] = len(users)
+        self._log(f"Created {len(users)} {kind}s")
+        return users
+
+    def _create_seeker_details(self, seekers):
+        cv_type, _ = DocumentType.objects.get_or_create(name='CV')
+        # All synthetic CVs point at one stored file
+        cv_path = f'user_documents/{SYNTHETIC_DOMAIN}-cv.txt'
+        if not default_storage.exists(cv_path):
+            cv_path = default_storage.save(cv_path, ContentFile(b'Synthetic CV'))
+
+        skills, experiences, educations, cvs = [], [], [], []
+        today = date.today()
+        for user in seekers:
+            category = self.random.choice(list(CATEGORIES))
+            user_skills = self.random.sample(SKILLS[category], 4)
+            title = self.random.choice(CATEGORIES[category])
+            years = self.random.randint(0, 12)
+            skills.extend(
+                MySkill(user=user, name=skill, proficiency=self.random.choice(['Beginner', 'Intermediate', 'Expert']))
+                for skill in user_skills
+            )
+            experiences.append(WorkExperience(
+                user=user,
+                company_name=self._company_name(self.random.randrange(1000)),
+                job_title=title,
+                location=self.random.choice(CITIES),
+                start_date=today - timedelta(days=365 * years + 30),
+                is_current=True,
+                description=f'Worked as a {title} using {", ".join(user_skills)}.',
+            ))
+            educations.append(Education(
+                user=user,
+                institution=f'{self.random.choice(CITIES)} Institute',
+                level=self.random.choice(LEVELS),
+                field_of_study=category,
+                start_date=today - timedelta(days=365 * (years + 4)),
+                end_date=today - timedelta(days=365 * years),
+            ))
+            cvs.append(UserDocument(
+                user=user,
+                document_type=cv_type,
+                file=cv_path,
+                extracted_content=(
+                    f'{title} with {years} years of experience. Skills: {", ".join(user_skills)}. '
+                    + ' '.join(self.random.sample(SENTENCES, 3))
+                ),
+                ai_score=self.random.randint(35, 95),
+            ))
+        MySkill.objects.bulk_create(skills, batch_size=self.chunk_size)
+        WorkExperience.objects.bulk_create(experiences, batch_size=self.chunk_size)
+        Education.objects.bulk_create(educations, batch_size=self.chunk_size)
+        UserDocument.objects.bulk_create(cvs, batch_size=self.chunk_size)
+        self.stats['cvs'] = len(cvs)
+        return dict(UserDocument.objects.filter(user__in=seekers, document_type=cv_type).values_list('user_id', 'id'))
+
+    def _create_applications(self, seekers, cvs, job_ids):
+        if not job_ids:
+            return
+        pairs = set()
+        target = min(self.counts['applications'], len(seekers) * len(job_ids))
+        while len(pairs) < target:
+            pairs.add((self.random.choice(seekers).pk, self.random.choice(job_ids)))
+        statuses = [status for status, _ in Application.STATUS_CHOICES]
+        Application.objects.bulk_create([
+            Application(
+                user_id=user_id,
+                job_id=job_id,
+                cv_used_id=cvs.get(user_id),
+                status=self.random.choice(statuses),
+                cover_letter_text='Synthetic cover letter.',
+                delivery_status='Sent',
+            )
+            for user_id, job_id in pairs
+        ], batch_size=self.chunk_size)
+        self.stats['applications'] = len(pairs)
+        self._log(f"Created {len(pairs)} applications")
+
+    def _create_notifications(self, seekers, job_ids):
+        if not job_ids:
+            return
+        UserNotification.objects.bulk_create([
+            UserNotification(
+                user=self.random.choice(seekers),
+                job_id=self.random.choice(job_ids),
+                message='New match for your profile.',
+                is_read=self.random.random() < 0.5,
+            )
+            for _ in range(self.counts['notifications'])
+        ], batch_size=self.chunk_size)
+        self.stats['notifications'] = self.counts['notifications']
+
+    def _create_recommendations(self, seekers):
+        from .recommendations import RecommendationEngine
+        written = RecommendationEngine(chunk_size=self.chunk_size).refresh_users([user.pk for user in seekers])
+        self.stats['recommendations'] = written
+        self._log(f"Computed {written} job recommendations")
@@ -1,53 +1,62 @@
-from django.core.mail import EmailMessage
+import json
+import math
+from django.core.mail import EmailMessage, get_connection
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.urls import reverse
+from django.utils import timezone
+from datetime import datetime, timedelta
+from django_q.tasks import async_chain, async_task, schedule
+from django_q.models import Schedule
 from users.models import MyUser, NotificationPreference, UserNotification
-from .models import JobListing
+from .models import JobListing, Application, AutomationLog
+from .services import EmailService, AttachmentTooLargeError
+
+def _users_to_notify(category_id):
+    # Users who have this category in their preferred_categories, have
+    # email_enabled = True in notification_preferences and are active
+    return MyUser.objects.filter(
+        profile__preferred_categories=category_id,
+        notification_preferences__email_enabled=True,
+        is_active=True
+    ).select_related('profile').distinct()
+
+
+def _job_notification_email(job, user, connection, domain):
+    user_name = getattr(user.profile, 'full_name', user.email)
+    if not user_name:
+        user_name = user.email.split('@')[0]
+
+    context = {
+        'user_name': user_name,
+        'job': job,
+        'category_name': job.category.name,
+        'job_url': f"https://{domain}{reverse('job_detail', args=[job.id])}",
+        'preferences_url': f"https://{domain}{reverse('profile_detail')}", # Or specific preferences edit url
+    }
+
+    email = EmailMessage(
+        subject=f"New Job Match: {job.title} at {job.company}",
+        body=render_to_string('emails/job_notification.html', context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+        connection=connection,
+    )
+    email.content_subtype = "html"
+    return email
+
 
 def send_job_notification_task(job_id):
     try:
-        job = JobListing.objects.get(id=job_id)
-        category = job.category
-        
-        # Find users who:
-        # 1. Have this category in their preferred_categories
-        # 2. Have email_enabled = True in notification_preferences
-        # 3. Are active
-        users_to_notify = MyUser.objects.filter(
-            profile__preferred_categories=category,
-            notification_preferences__email_enabled=True,
-            is_active=True
-        ).distinct()
-        
+        job = JobListing.objects.select_related('category').get(id=job_id)
+
+        # One backend for the whole fan-out so the SMTP connection is reused
+        connection = get_connection()
         domain = Site.objects.get_current().domain
-        job_url = f"https://{domain}{reverse('job_detail', args=[job.id])}"
-        preferences_url = f"https://{domain}{reverse('profile_detail')}" # Or specific preferences edit url
-        
-        for user in users_to_notify:
-            user_name = getattr(user.profile, 'full_name', user.email)
-            if not user_name:
-                user_name = user.email.split('@')[0]
-                
-            context = {
-                'user_name': user_name,
-                'job': job,
-                'category_name': category.name,
-                'job_url': job_url,
-                'preferences_url': preferences_url,
-            }
-            
-            html_content = render_to_string('emails/job_notification.html', context)
-            
-            email = EmailMessage(
-                subject=f"New Job Match: {job.title} at {job.company}",
-                body=html_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[user.email],
-            )
-            email.content_subtype = "html"
-            email.send(fail_silently=False)
+
+        for user in _users_to_notify(job.category_id):
+            _job_notification_email(job, user, connection, domain).send(fail_silently=False)
 
             # Record the notification in the database
             UserNotification.objects.create(
@@ -60,3 +69,227 @@ def send_job_notification_task(job_id):
         print(f"Job with ID {job_id} not found for notification task.")
     except Exception as e:
         print(f"Error in send_job_notification_task: {str(e)}")
+
+
+def send_job_notifications_batch_task(job_ids):
+    """
+    Notification pass for one chunk of a bulk import: looks up the interested
+    users once per category instead of once per job and sends every email over
+    one connection. Each UserNotification row is written right after its email,
+    and users who already have one for the job are skipped, so a retried or
+    re-run task does not notify anyone twice.
+    """
+    jobs = JobListing.objects.filter(
+        id__in=job_ids, is_active=True, duplicate_of__isnull=True
+    ).select_related('category').order_by('category_id', 'id')
+    already_notified = set(
+        UserNotification.objects.filter(job_id__in=job_ids).values_list('job_id', 'user_id')
+    )
+    connection = get_connection()
+    domain = Site.objects.get_current().domain
+    sent = 0
+    users_by_category = {}
+    for job in jobs.iterator(chunk_size=500):
+        if job.category_id not in users_by_category:
+            # Jobs are ordered by category, so only the current category's users are kept
+            users_by_category = {job.category_id: list(_users_to_notify(job.category_id))}
+        for user in users_by_category[job.category_id]:
+            if (job.id, user.id) in already_notified:
+                continue
+            try:
+                _job_notification_email(job, user, connection, domain).send(fail_silently=False)
+            except Exception as e:
+                print(f"Error notifying {user.email} about job {job.id}: {str(e)}")
+                continue
+            sent += 1
+            UserNotification.objects.create(
+                user=user,
+                job=job,
+                message=f"New match for your profile: {job.title} at {job.company}."
+            )
+    return sent
+
+
+def queue_application_delivery(application):
+    """Marks an application as pending delivery and hands the email send to the Django-Q cluster."""
+    Application.objects.filter(pk=application.pk).update(
+        delivery_status='Pending', delivery_attempts=0, delivery_error=None
+    )
+    async_task('jobs.tasks.send_application_email_task', application.pk)
+
+
+def send_application_email_task(application_id):
+    """
+    Sends the application email for one Application.
+    Failures are retried with exponential backoff (APPLICATION_DELIVERY_RETRY_BASE
+    seconds, doubling per attempt). After APPLICATION_DELIVERY_MAX_ATTEMPTS the
+    application is dead-lettered: marked Failed and logged to AutomationLog.
+    """
+    try:
+        application = Application.objects.select_related(
+            'user', 'user__profile', 'job', 'job__company_profile', 'cv_used'
+        ).get(id=application_id)
+    except Application.DoesNotExist:
+        print(f"Application with ID {application_id} not found for delivery task.")
+        return
+
+    if application.delivery_status in ('Sent', 'Failed'):
+        return
+
+    attempts = application.delivery_attempts + 1
+    max_attempts = getattr(settings, 'APPLICATION_DELIVERY_MAX_ATTEMPTS', 5)
+    # .update() keeps delivery bookkeeping out of the Application post_save signal
+    Application.objects.filter(pk=application.pk).update(delivery_status='Sending', delivery_attempts=attempts)
+
+    try:
+        success, message = EmailService.send_application_email(
+            user=application.user,
+            job=application.job,
+            cover_letter_file=application.cover_letter,
+            cv_file_path=application.cv_used.file.path if application.cv_used else None
+        )
+    except AttachmentTooLargeError as e:
+        # Retrying cannot shrink the file, so dead-letter straight away
+        success, message, attempts = False, str(e), max_attempts
+    except Exception as e:
+        success, message = False, str(e)
+
+    if success:
+        Application.objects.filter(pk=application.pk).update(
+            delivery_status='Sent', delivered_at=timezone.now(), delivery_error=None
+        )
+        UserNotification.objects.create(
+            user=application.user,
+            job=application.job,
+            message=f"Your application for {application.job.title} was sent. {message}"
+        )
+        return
+
+    if attempts >= max_attempts:
+        Application.objects.filter(pk=application.pk).update(delivery_status='Failed', delivery_error=message)
+        AutomationLog.objects.create(
+            user=application.user,
+            action='Application delivery failed',
+            details=f"Application {application.pk} for job {application.job_id} failed after {attempts} attempts: {message}"
+        )
+        UserNotification.objects.create(
+            user=application.user,
+            job=application.job,
+            message=f"We could not send your application for {application.job.title}. Please try again or contact support."
+        )
+        return
+
+    delay = getattr(settings, 'APPLICATION_DELIVERY_RETRY_BASE', 60) * (2 ** (attempts - 1))
+    Application.objects.filter(pk=application.pk).update(delivery_status='Retrying', delivery_error=message)
+    schedule(
+        'jobs.tasks.send_application_email_task',
+        application.pk,
+        schedule_type=Schedule.ONCE,
+        next_run=timezone.now() + timedelta(seconds=delay),
+    )
+
+def queue_ai_import(postings, user_id):
+    """
+    Queues an AI import as a chain of tasks of JOB_IMPORT_CHUNK_SIZE postings.
+    The chain runs one task at a time so AI_IMPORT_REQUESTS_PER_MINUTE holds,
+    and each task gets a timeout sized to how long its postings take at that
+    rate. Returns the number of tasks queued.
+    """
+    chunk_size = getattr(settings, 'JOB_IMPORT_CHUNK_SIZE', 100)
+    per_minute = getattr(settings, 'AI_IMPORT_REQUESTS_PER_MINUTE', 60)
+    margin = getattr(settings, 'AI_IMPORT_TASK_TIMEOUT_MARGIN', 120)
+    batches = [postings[start:start + chunk_size] for start in range(0, len(postings), chunk_size)]
+    async_chain([
+        (
+            'jobs.tasks.import_ai_postings_task',
+            (batch, user_id, f"{number}/{len(batches)}"),
+            {'timeout': math.ceil(len(batch) * 60 / per_minute) + margin},
+        )
+        for number, batch in enumerate(batches, 1)
+    ])
+    return len(batches)
+
+def import_ai_postings_task(postings, user_id, batch=None):
+    from .importers import AIJobImporter
+    stats = AIJobImporter().run(postings)
+    if batch:
+        stats['batch'] = batch
+    AutomationLog.objects.create(
+        user_id=user_id,
+        action="AI job import",
+        details=json.dumps(stats),
+    )
+    return stats
+
+
+def recommend_new_listings_task(job_ids):
+    from .recommendations import RecommendationEngine
+    return RecommendationEngine().add_listings(job_ids)
+
+
+NEW_LISTING_RECOMMENDATIONS_PENDING_KEY = 'jobs:new_listing_recommendations_pending'
+
+
+def schedule_new_listing_recommendations(posted_since):
+    """
+    Schedules one recommend_listings_since_task JOB_RECOMMENDATION_LISTING_DELAY
+    seconds from now. Every listing posted in that window is scored against the
+    seekers in the same pass, instead of one pass over all seekers per listing.
+    The pending flag is on the shared cache so all web workers see it.
+    posted_since is passed as an ISO string: schedule args are stored as their
+    repr and read back with ast.literal_eval, which can't parse a datetime.
+    """
+    from users.services import shared_cache
+    delay = getattr(settings, 'JOB_RECOMMENDATION_LISTING_DELAY', 300)
+    if not shared_cache().add(NEW_LISTING_RECOMMENDATIONS_PENDING_KEY, True, delay):
+        return
+    schedule(
+        'jobs.tasks.recommend_listings_since_task',
+        posted_since.isoformat(),
+        schedule_type=Schedule.ONCE,
+        next_run=timezone.now() + timedelta(seconds=delay),
+        repeats=-1,
+        q_options={'timeout': getattr(settings, 'JOB_RECOMMENDATION_TASK_TIMEOUT', 600)},
+    )
+
+
+def recommend_listings_since_task(posted_since):
+    from users.services import shared_cache
+    # Cleared before the query, so a listing posted from here on either makes
+    # this pass or schedules the next one
+    shared_cache().delete(NEW_LISTING_RECOMMENDATIONS_PENDING_KEY)
+    job_ids = JobListing.objects.filter(
+        posted_at__gte=datetime.fromisoformat(posted_since), is_active=True, duplicate_of__isnull=True
+    ).values_list('pk', flat=True)
+    return recommend_new_listings_task(list(job_ids))
+
+
+def recommendation_refresh_key(user_id):
+    return f'jobs:recommendation_refresh_pending:{user_id}'
+
+
+def schedule_recommendation_refresh(user_id):
+    """
+    Schedules one refresh of the user's recommendations
+    JOB_RECOMMENDATION_REFRESH_DELAY seconds from now, so editing several
+    profile sections in a row recomputes the list once. The pending flag is on
+    the shared cache so the web workers and the cluster all see it.
+    """
+    from users.services import shared_cache
+    delay = getattr(settings, 'JOB_RECOMMENDATION_REFRESH_DELAY', 60)
+    if not shared_cache().add(recommendation_refresh_key(user_id), True, delay):
+        return
+    schedule(
+        'jobs.tasks.refresh_recommendations_task',
+        user_id,
+        schedule_type=Schedule.ONCE,
+        next_run=timezone.now() + timedelta(seconds=delay),
+        repeats=-1,
+    )
+
+
+def refresh_recommendations_task(user_id):
+    from .recommendations import RecommendationEngine
+    from users.services import shared_cache
+    shared_cache().delete(recommendation_refresh_key(user_id))
+    return RecommendationEngine().refresh_users([user_id])
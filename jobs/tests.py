@@ -1,7 +1,45 @@
+import csv
+import io
+import os
+import tempfile
+import threading
+import time
+import warnings
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import call, patch
+from django.test import TestCase, override_settings
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
 from django.urls import reverse
-from users.models import MyUser
-from .models import JobListing, JobCategory, Wishlist
+from django.contrib.sites.models import Site
+from django.utils import timezone
+from allauth.socialaccount.models import SocialApp, SocialAccount, SocialToken
+from google.oauth2.credentials import Credentials
+from users.models import MyUser, DocumentType, UserDocument, MySkill, WorkExperience, Education, UserNotification
+from users.services import shared_cache
+from django_q.cluster import scheduler
+from django_q.models import Schedule
+from .models import JobListing, JobCategory, JobRequirement, JobRecommendation, Wishlist, Company, Application, AutomationLog
+from .services import JobAnalyticsService, ApplicantExportService, GmailClientCache, EmailService
+from .services import MimeAttachmentCache, AttachmentTooLargeError, JobRequirementService
+from .tasks import send_application_email_task, send_job_notifications_batch_task, recommendation_refresh_key, queue_ai_import
+from .tasks import NEW_LISTING_RECOMMENDATIONS_PENDING_KEY, recommend_listings_since_task
+from .pagination import KeysetPaginator
+from . import page_cache
+from .company_matcher import CompanyNameIndex, normalize_company_name
+from .importers import AIJobImporter, JobImportWriter, RateLimiter, read_postings
+from .loadtest import SCENARIOS, HiddenInputs, LoadTestDriver
+from .benchmarks import BenchmarkHistory, BenchmarkSuite
+from .duplicates import JobDuplicateIndex, simhash
+from .recommendations import RecommendationEngine
+from home.ai_service import AIService
 from django.test import Client
+from django.shortcuts import render
 
 class WishlistTests(TestCase):
     def setUp(self):
@@ -40,3 +78,1051 @@ class WishlistTests(TestCase):
         Wishlist.objects.create(user=self.user, job=self.job)
         with self.assertRaises(Exception): # unique_together constraint
             Wishlist.objects.create(user=self.user, job=self.job)
+
+class JobAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='Analytics Co')
+        self.employer = MyUser.objects.create_user(
+            email='employer@example.com', password='password123', role='Employer', company=self.company
+        )
+        self.category = JobCategory.objects.create(name='Tech')
+        self.job = JobListing.objects.create(
+            title='Data Analyst',
+            company=self.company.name,
+            company_profile=self.company,
+            category=self.category,
+            location='Remote',
+            url='http://example.com'
+        )
+        for i, status in enumerate(['Under Review', 'Under Review', 'Shortlisted', 'Offer']):
+            applicant = MyUser.objects.create_user(email=f'applicant{i}@example.com', password='password123')
+            Application.objects.create(user=applicant, job=self.job, status=status)
+        self.client = Client()
+        self.client.login(email='employer@example.com', password='password123')
+
+    def test_snapshot_single_query(self):
+        with self.assertNumQueries(1):
+            snapshot = JobAnalyticsService.compute_snapshot(self.job)
+        self.assertEqual(snapshot['total_applicants'], 4)
+        counts = {s['label']: s['count'] for s in snapshot['stats']}
+        self.assertEqual(counts, {'Under Review': 2, 'Shortlisted': 1, 'Interviewing': 0, 'Offer': 1, 'Rejected': 0})
+
+    @override_settings(JOB_ANALYTICS_CACHE_TIMEOUT=300)
+    def test_snapshot_invalidated_on_status_changes(self):
+        JobAnalyticsService.get_snapshot(self.job)
+        with self.assertNumQueries(0):
+            JobAnalyticsService.get_snapshot(self.job)
+
+        application = self.job.applications.filter(status='Under Review').first()
+        application.status = 'Rejected'
+        application.save()
+        snapshot = JobAnalyticsService.get_snapshot(self.job)
+        self.assertEqual(snapshot['stats'][4]['count'], 1)
+
+        self.client.post(reverse('bulk_update_application_status'), {
+            'application_ids': list(self.job.applications.values_list('pk', flat=True)),
+            'status': 'Interviewing',
+            'job_pk': self.job.pk,
+        })
+        snapshot = JobAnalyticsService.get_snapshot(self.job)
+        self.assertEqual(snapshot['stats'][2]['count'], 4)
+
+    def test_analytics_view(self):
+        response = self.client.get(reverse('job_analytics', kwargs={'pk': self.job.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_applicants'], 4)
+
+    def test_applicant_pool_keyset_pages(self):
+        cv_type = DocumentType.objects.create(name='CV')
+        for i, app in enumerate(self.job.applications.order_by('pk')[:2]):
+            app.cv_used = UserDocument.objects.create(user=app.user, document_type=cv_type, ai_score=50 + i)
+            app.save()
+
+        paginator = KeysetPaginator(self.job.applications.all(), ['cv_used__ai_score', 'applied_at', 'pk'], per_page=3)
+        first = paginator.page()
+        self.assertTrue(first.has_next)
+        second = paginator.page(first.next_cursor)
+        self.assertFalse(second.has_next)
+
+        seen = [app.pk for app in first] + [app.pk for app in second]
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(len(set(seen)), 4)
+        self.assertEqual([app.cv_used.ai_score for app in first.object_list[:2]], [51, 50])
+
+    def test_keyset_cursor_keeps_microseconds(self):
+        applied_at = timezone.now().replace(microsecond=123000)
+        for i, app in enumerate(self.job.applications.order_by('pk')):
+            Application.objects.filter(pk=app.pk).update(applied_at=applied_at + timedelta(microseconds=100 * i))
+
+        paginator = KeysetPaginator(self.job.applications.all(), ['applied_at', 'pk'], per_page=1)
+        seen = []
+        page = paginator.page()
+        while True:
+            seen.extend(app.pk for app in page)
+            if not page.has_next:
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(seen, list(self.job.applications.order_by('-applied_at').values_list('pk', flat=True)))
+        self.assertEqual(len(seen), 4)
+
+    def test_export_applicants_csv(self):
+        response = self.client.get(reverse('export_job_applicants', kwargs={'pk': self.job.pk}), {'status': 'Under Review'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['application_id', 'full_name', 'email'])
+        self.assertEqual(len(rows), 3)
+
+    def test_export_csv_neutralises_formulas(self):
+        applicant = self.job.applications.order_by('pk').first().user
+        applicant.profile.full_name = '=HYPERLINK("http://evil.example","Click")'
+        applicant.profile.phone_primary = '+254712345678'
+        applicant.profile.save()
+        response = self.client.get(reverse('export_job_applicants', kwargs={'pk': self.job.pk}))
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[1][1:4], ["'=HYPERLINK(\"http://evil.example\",\"Click\")", applicant.email, '+254712345678'])
+        self.assertEqual(ApplicantExportService.csv_safe('+254 (712) 345-678'), '+254 (712) 345-678')
+        self.assertEqual(ApplicantExportService.csv_safe('-2+3+cmd|calc'), "'-2+3+cmd|calc")
+        self.assertEqual(ApplicantExportService.csv_safe('+1+1'), "'+1+1")
+
+    def test_export_reads_keyset_chunks(self):
+        with self.settings(APPLICANT_EXPORT_CHUNK_SIZE=3), self.assertNumQueries(2):
+            rows = list(ApplicantExportService.iter_rows(self.job.applications.all()))
+        self.assertEqual([row[0] for row in rows], sorted(self.job.applications.values_list('pk', flat=True)))
+
+    @skipUnless(ApplicantExportService.parquet_available(), "pyarrow is not installed")
+    def test_export_applicants_parquet(self):
+        import pyarrow.parquet as pq
+        with self.settings(APPLICANT_EXPORT_CHUNK_SIZE=3):
+            response = self.client.get(reverse('export_job_applicants', kwargs={'pk': self.job.pk}), {'format': 'parquet'})
+            table = pq.read_table(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.num_rows, 4)
+
+    def test_application_list_paginated(self):
+        MyUser.objects.create_user(email='admin@example.com', password='password123', role='Admin')
+        self.client.login(email='admin@example.com', password='password123')
+        response = self.client.get(reverse('application_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['applications']), 4)
+        self.assertIsNone(response.context['next_cursor'])
+
+
+class GmailClientCacheTests(TestCase):
+    def setUp(self):
+        GmailClientCache.clear()
+        self.user = MyUser.objects.create_user(email='gmail@example.com', password='password123')
+        self.app = SocialApp.objects.create(provider='google', name='Google', client_id='client', secret='secret')
+        account = SocialAccount.objects.create(user=self.user, provider='google', uid='123')
+        self.token = SocialToken.objects.create(
+            app=self.app, account=account, token='old-token', token_secret='refresh',
+            expires_at=timezone.now() + timedelta(minutes=1)
+        )
+
+    def test_social_app_cached(self):
+        GmailClientCache.get_social_app()
+        with self.assertNumQueries(0):
+            self.assertEqual(GmailClientCache.get_social_app().client_id, 'client')
+
+    def test_discovery_document_is_static(self):
+        self.assertIs(GmailClientCache.get_discovery_document(), GmailClientCache.get_discovery_document())
+
+    def test_expiring_token_refreshed_once(self):
+        def fake_refresh(creds, request):
+            creds.token = 'new-token'
+            creds.expiry = timezone.now().replace(tzinfo=None) + timedelta(hours=1)
+
+        with patch.object(Credentials, 'refresh', autospec=True, side_effect=fake_refresh) as refresh:
+            creds = GmailClientCache.get_credentials(self.token, self.app)
+            self.assertIs(GmailClientCache.get_credentials(self.token, self.app), creds)
+        self.assertEqual(refresh.call_count, 1)
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.token, 'new-token')
+
+    def test_slow_refresh_does_not_block_other_accounts(self):
+        other_user = MyUser.objects.create_user(email='other@example.com', password='password123')
+        other_account = SocialAccount.objects.create(user=other_user, provider='google', uid='456')
+        other_token = SocialToken.objects.create(
+            app=self.app, account=other_account, token='fresh-token', token_secret='other-refresh',
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+        refreshing = threading.Event()
+        release = threading.Event()
+
+        def slow_refresh(creds, request):
+            refreshing.set()
+            release.wait(5)
+            creds.token = 'new-token'
+            creds.expiry = timezone.now().replace(tzinfo=None) + timedelta(hours=1)
+
+        with patch.object(Credentials, 'refresh', autospec=True, side_effect=slow_refresh), \
+                patch('jobs.services.SocialToken.objects.filter'):
+            worker = threading.Thread(target=GmailClientCache.get_credentials, args=(self.token, self.app))
+            worker.start()
+            self.assertTrue(refreshing.wait(5))
+            try:
+                self.assertEqual(GmailClientCache.get_credentials(other_token, self.app).token, 'fresh-token')
+            finally:
+                release.set()
+                worker.join(5)
+
+
+class ApplicationDeliveryTests(TestCase):
+    def setUp(self):
+        self.user = MyUser.objects.create_user(email='seeker@example.com', password='password123')
+        category = JobCategory.objects.create(name='Tech')
+        self.job = JobListing.objects.create(
+            title='Backend Developer',
+            company='Test Co',
+            category=category,
+            location='Remote',
+            url='http://example.com',
+            application_method='email',
+            employer_email='hr@example.com'
+        )
+        self.application = Application.objects.create(user=self.user, job=self.job)
+
+    @override_settings(APPLICATION_DELIVERY_MAX_ATTEMPTS=2, APPLICATION_DELIVERY_RETRY_BASE=30)
+    def test_failed_delivery_retries_then_dead_letters(self):
+        with patch.object(EmailService, 'send_application_email', return_value=(False, 'SMTP down')):
+            send_application_email_task(self.application.pk)
+            self.application.refresh_from_db()
+            self.assertEqual(self.application.delivery_status, 'Retrying')
+            self.assertTrue(Schedule.objects.filter(func='jobs.tasks.send_application_email_task').exists())
+
+            send_application_email_task(self.application.pk)
+            self.application.refresh_from_db()
+            self.assertEqual(self.application.delivery_status, 'Failed')
+            self.assertEqual(self.application.delivery_attempts, 2)
+        self.assertTrue(AutomationLog.objects.filter(user=self.user, action='Application delivery failed').exists())
+
+    def test_successful_delivery(self):
+        with patch.object(EmailService, 'send_application_email', return_value=(True, 'Email sent via Gmail API')):
+            send_application_email_task(self.application.pk)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.delivery_status, 'Sent')
+        self.assertIsNotNone(self.application.delivered_at)
+
+
+class MimeAttachmentCacheTests(TestCase):
+    def setUp(self):
+        MimeAttachmentCache.clear()
+        self.tmp = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        self.content = os.urandom(200 * 1024 + 7)
+        self.tmp.write(self.content)
+        self.tmp.close()
+        self.addCleanup(os.unlink, self.tmp.name)
+
+    def test_streamed_encoding_round_trips(self):
+        part = MimeAttachmentCache.build_part(self.tmp.name, 'CV.pdf')
+        self.assertEqual(part.get_content_type(), 'application/pdf')
+        self.assertEqual(part.get_payload(decode=True), self.content)
+        # Retries reuse the already-encoded payload
+        self.assertIs(MimeAttachmentCache.build_part(self.tmp.name, 'CV.pdf').get_payload(), part.get_payload())
+
+    @override_settings(EMAIL_ATTACHMENT_MAX_BYTES=1024)
+    def test_size_cap(self):
+        with self.assertRaises(AttachmentTooLargeError):
+            MimeAttachmentCache.build_part(self.tmp.name, 'CV.pdf')
+
+    def test_smtp_send_attaches_parts(self):
+        user = MyUser.objects.create_user(email='smtp@example.com', password='password123')
+        category = JobCategory.objects.create(name='Ops')
+        job = JobListing.objects.create(
+            title='Ops Lead', company='Test Co', category=category, location='Remote', url='http://example.com'
+        )
+        success, _ = EmailService.send_application_email(user, job, None, cv_file_path=self.tmp.name)
+        self.assertTrue(success)
+        self.assertEqual(len(mail.outbox), 1)
+        attachment = mail.outbox[0].message().get_payload()[1]
+        self.assertEqual(attachment.get_payload(decode=True), self.content)
+        self.assertEqual(attachment.get_filename(), 'CV.pdf')
+
+    def test_attachments_are_mime_parts(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            message = EmailMessage('Subject', 'Body', 'from@example.com', ['to@example.com'])
+            message.attach(MimeAttachmentCache.build_part(self.tmp.name, 'CV.pdf'))
+            self.assertEqual(message.message().get_payload()[1].get_payload(decode=True), self.content)
+
+    @override_settings(EMAIL_ATTACHMENT_MAX_BYTES=1024)
+    def test_oversize_gmail_attachment_does_not_fall_back_to_smtp(self):
+        user = MyUser.objects.create_user(email='gmail-big@example.com', password='password123')
+        app = SocialApp.objects.create(provider='google', name='Google', client_id='client', secret='secret')
+        account = SocialAccount.objects.create(user=user, provider='google', uid='456')
+        SocialToken.objects.create(app=app, account=account, token='token', token_secret='refresh')
+        category = JobCategory.objects.create(name='Ops')
+        job = JobListing.objects.create(
+            title='Ops Lead', company='Test Co', category=category, location='Remote', url='http://example.com',
+            application_method='email', employer_email='jobs@example.com',
+        )
+        with patch('jobs.services.GmailClientCache.get_credentials'), patch('jobs.services.GmailClientCache.build_service'):
+            with self.assertRaises(AttachmentTooLargeError):
+                EmailService.send_application_email(user, job, None, cv_file_path=self.tmp.name)
+        self.assertEqual(len(mail.outbox), 0)
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.category = JobCategory.objects.create(name='Engineering')
+        self.company = Company.objects.create(name='Acme Ltd')
+        self.job = JobListing.objects.create(
+            title='Backend Engineer', company='Acme Ltd', company_profile=self.company,
+            category=self.category, location='Nairobi', url='http://example.com'
+        )
+
+    def _revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('no-cache', first['Cache-Control'])
+        return first, self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    def test_unchanged_pages_return_304(self):
+        for url in [reverse('job_detail', args=[self.job.pk]), reverse('company_detail', args=[self.company.pk]),
+                    reverse('job_list') + '?category=1', reverse('index')]:
+            first, second = self._revalidate(url)
+            self.assertEqual(second.status_code, 304, url)
+            self.assertEqual(second.content, b'')
+            self.assertIn('Last-Modified', first)
+
+    def test_304_skips_rendering(self):
+        url = reverse('job_detail', args=[self.job.pk])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1), patch('jobs.views.render') as render:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        render.assert_not_called()
+
+    def test_changes_invalidate_validators(self):
+        url = reverse('job_detail', args=[self.job.pk])
+        etag = self.client.get(url)['ETag']
+
+        self.job.requirements.create(description='Python')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        self.company.description = 'We build things'
+        self.company.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        company_url = reverse('company_detail', args=[self.company.pk])
+        etag = self.client.get(company_url)['ETag']
+        self.job.is_active = False
+        self.job.save()
+        self.assertEqual(self.client.get(company_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_signed_in_visitors_get_full_pages(self):
+        user = MyUser.objects.create_user(email='seeker@example.com', password='password')
+        self.client.force_login(user)
+        response = self.client.get(reverse('job_detail', args=[self.job.pk]))
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.client.get(reverse('job_detail', args=[self.job.pk]), HTTP_IF_NONE_MATCH='*').status_code, 200)
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-pages'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-shared'},
+})
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        page_cache.page_cache().clear()
+        self.category = JobCategory.objects.create(name='Engineering')
+        self.company = Company.objects.create(name='Acme Ltd')
+        self.job = JobListing.objects.create(
+            title='Backend Engineer', company='Acme Ltd', company_profile=self.company,
+            category=self.category, location='Nairobi', url='http://example.com'
+        )
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        for url in [reverse('index'), reverse('job_list'), reverse('job_detail', args=[self.job.pk])]:
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            with patch('jobs.views.render') as render, patch('home.views.render') as home_render:
+                second = self.client.get(url)
+            render.assert_not_called()
+            home_render.assert_not_called()
+            self.assertEqual(second.status_code, 200)
+            self.assertIn(b'Backend Engineer', second.content)
+
+    def test_cached_pages_get_the_visitors_own_csrf_token(self):
+        url = reverse('job_detail', args=[self.job.pk])
+        self.client.get(url)
+        response = Client().get(url)
+        self.assertNotIn(page_cache.CSRF_PLACEHOLDER.encode(), response.content)
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_job_and_company_saves_invalidate(self):
+        url = reverse('job_detail', args=[self.job.pk])
+        self.client.get(url)
+
+        self.job.title = 'Platform Engineer'
+        self.job.save()
+        self.assertIn(b'Platform Engineer', self.client.get(url).content)
+
+        self.company.name = 'Acme Holdings'
+        self.company.save()
+        self.assertIn(b'Acme Holdings', self.client.get(url).content)
+
+        self.job.requirements.create(description='Kubernetes experience')
+        self.assertIn(b'Kubernetes experience', self.client.get(url).content)
+
+    def test_signed_in_visitors_bypass_cache(self):
+        self.client.get(reverse('job_list'))
+        user = MyUser.objects.create_user(email='seeker@example.com', password='password')
+        self.client.force_login(user)
+        with patch('jobs.views.render', wraps=render) as rendered:
+            self.client.get(reverse('job_list'))
+        rendered.assert_called_once()
+
+class CompanyNameIndexTests(TestCase):
+    def setUp(self):
+        CompanyNameIndex.reset()
+        self.addCleanup(CompanyNameIndex.reset)
+        self.acme = Company.objects.create(name='Acme Ltd')
+        self.equity = Company.objects.create(name='Equity Bank Kenya')
+        Company.objects.create(name='Safaricom PLC')
+
+    def test_normalizes_legal_suffixes(self):
+        self.assertEqual(normalize_company_name('ACME Holdings Co. Limited'), 'acme holdings')
+        self.assertEqual(normalize_company_name('Co-operative Bank'), 'co operative bank')
+
+    def test_top_k_ranks_similar_companies(self):
+        index = CompanyNameIndex.shared()
+        self.assertEqual(index.top_k('ACME Limited')[0], {'id': self.acme.pk, 'name': 'Acme Ltd', 'similarity': 1.0})
+        self.assertEqual([m['id'] for m in index.top_k('Equity Bank')], [self.equity.pk])
+        self.assertEqual(index.top_k('Totally Unrelated Farms'), [])
+
+    def test_index_follows_company_saves_and_deletes(self):
+        index = CompanyNameIndex.shared()
+        company = Company.objects.create(name='Arrotech Solutions')
+        self.assertEqual(index.top_k('Arrotech Solutions Ltd')[0]['id'], company.pk)
+
+        company.name = 'Brightpath Logistics'
+        company.save()
+        self.assertEqual(index.top_k('Arrotech Solutions'), [])
+        self.assertEqual(index.top_k('Brightpath Logistics')[0]['id'], company.pk)
+
+        company.delete()
+        self.assertEqual(index.top_k('Brightpath Logistics'), [])
+
+    def test_sync_picks_up_changes_from_other_processes(self):
+        index = CompanyNameIndex.shared()
+        # Bulk writes bypass signals, like a change made by another worker
+        Company.objects.filter(pk=self.acme.pk).update(name='Zenith Media Ltd', updated_at=timezone.now())
+        Company.objects.filter(pk=self.equity.pk).delete()
+        index.sync(force=True)
+
+        self.assertEqual(index.top_k('Zenith Media')[0]['id'], self.acme.pk)
+        self.assertEqual(index.top_k('Equity Bank'), [])
+        self.assertEqual(len(index), 2)
+
+    def test_ai_service_uses_index(self):
+        matches = AIService._fuzzy_match_company('Safaricom')
+        self.assertEqual(matches[0]['name'], 'Safaricom PLC')
+
+class CompanyPromptCandidateTests(TestCase):
+    def setUp(self):
+        CompanyNameIndex.reset()
+        self.addCleanup(CompanyNameIndex.reset)
+        Company.objects.bulk_create([Company(name=f'Filler Company {i}') for i in range(200)])
+        self.kcb = Company.objects.create(name='KCB Bank Kenya Limited')
+
+    def test_candidates_come_from_the_posting_text(self):
+        text = "Join KCB Bank Kenya! We are hiring a Relationship Manager in Nairobi. Apply before Friday."
+        candidates = CompanyNameIndex.shared().candidates_in_text(text, k=5)
+        self.assertEqual(candidates[0]['id'], self.kcb.pk)
+        self.assertLessEqual(len(candidates), 5)
+
+    @override_settings(OPENAI_API_KEY='test-key', AI_COMPANY_PROMPT_CANDIDATES=3)
+    def test_prompt_only_lists_top_candidates(self):
+        with patch('home.ai_service.OpenAI') as openai:
+            openai.return_value.chat.completions.create.side_effect = RuntimeError('offline')
+            AIService.create_job_listing("KCB Bank Kenya Ltd seeks a Teller.")
+
+        system_prompt = openai.return_value.chat.completions.create.call_args.kwargs['messages'][0]['content']
+        self.assertIn('KCB Bank Kenya Limited', system_prompt)
+        self.assertNotIn('Filler Company', system_prompt)
+
+def _parsed_posting(text):
+    title, company, location = text.split('|')
+    return {
+        'company': {'name': company},
+        'job_listing': {
+            'title': title, 'category': 'engineering', 'location': location, 'description': text,
+            'url': 'https://jobs.example.com/postings',
+        },
+        'requirements': [{'description': f'{title} experience', 'is_mandatory': True}],
+    }
+
+
+class AIJobImportTests(TestCase):
+    def setUp(self):
+        CompanyNameIndex.reset()
+        self.addCleanup(CompanyNameIndex.reset)
+        self.category = JobCategory.objects.create(name='Engineering')
+        self.acme = Company.objects.create(name='Acme Ltd')
+        JobListing.objects.create(
+            title='Backend Engineer', company='Acme Ltd', company_profile=self.acme,
+            category=self.category, location='Nairobi', url='http://example.com'
+        )
+
+    def test_read_postings_formats(self):
+        self.assertEqual(read_postings(['{"text": "one"}\n', '\n', '{"text": "two"}\n']), ['one', 'two'])
+        self.assertEqual(read_postings([b'first\n', b'posting\n', b'---\n', b'second\n']), ['first\nposting', 'second'])
+
+    def test_import_dedupes_and_bulk_creates(self):
+        postings = [
+            'Backend Engineer|ACME Limited|Nairobi',   # duplicate of the existing listing
+            'Data Analyst|Acme Ltd|Nairobi',
+            'Data Analyst|Acme Ltd|Nairobi',           # repeated text, parsed once
+            'Data Analyst|Acme Limited|nairobi',       # duplicate within the batch
+            'Site Reliability Engineer|Brightpath Logistics|Mombasa',
+            'Invalid posting||',
+        ]
+        with patch('home.ai_service.AIService.create_job_listing', side_effect=lambda text, **kw: _parsed_posting(text)), \
+                patch('jobs.importers.async_task') as async_task:
+            stats = AIJobImporter(workers=3, per_minute=6000, chunk_size=2).run(postings)
+
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual(stats['duplicates'], 2)
+        self.assertEqual(stats['repeated_postings'], 1)
+        self.assertEqual(stats['invalid'], 1)
+        self.assertEqual(stats['companies_created'], 1)
+
+        analyst = JobListing.objects.get(title='Data Analyst')
+        self.assertEqual(analyst.company_profile, self.acme)
+        self.assertEqual(list(analyst.requirements.values_list('description', flat=True)), ['Data Analyst experience'])
+        self.assertTrue(Company.objects.filter(name='Brightpath Logistics').exists())
+        self.assertEqual(
+            [c.args[0] for c in async_task.call_args_list],
+            ['jobs.tasks.recommend_new_listings_task', 'jobs.tasks.send_job_notifications_batch_task'],
+        )
+        self.assertEqual(len(async_task.call_args.args[1]), 2)
+
+    def test_rate_limiter_spaces_requests(self):
+        limiter = RateLimiter(per_minute=600)
+        started = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.29)
+
+    def test_admin_upload_queues_import(self):
+        admin_user = MyUser.objects.create_superuser(email='admin@example.com', password='password')
+        self.client.force_login(admin_user)
+        changelist = self.client.get(reverse('admin:jobs_joblisting_changelist'))
+        self.assertContains(changelist, reverse('admin:jobs_joblisting_import_ai'))
+        self.assertEqual(self.client.get(reverse('admin:jobs_joblisting_import_ai')).status_code, 200)
+
+        upload = SimpleUploadedFile('postings.txt', b'First posting\n---\nSecond posting\n')
+        with patch('jobs.tasks.async_chain') as async_chain:
+            response = self.client.post(reverse('admin:jobs_joblisting_import_ai'), {'postings_file': upload})
+
+        self.assertRedirects(response, reverse('admin:jobs_joblisting_changelist'))
+        async_chain.assert_called_once_with([
+            ('jobs.tasks.import_ai_postings_task', (['First posting', 'Second posting'], admin_user.id, '1/1'), {'timeout': 122}),
+        ])
+
+    @override_settings(JOB_IMPORT_CHUNK_SIZE=2, AI_IMPORT_REQUESTS_PER_MINUTE=60, AI_IMPORT_TASK_TIMEOUT_MARGIN=10)
+    def test_ai_import_is_queued_as_a_chain_of_chunks(self):
+        with patch('jobs.tasks.async_chain') as async_chain:
+            self.assertEqual(queue_ai_import(['a', 'b', 'c'], None), 2)
+        self.assertEqual(async_chain.call_args.args[0], [
+            ('jobs.tasks.import_ai_postings_task', (['a', 'b'], None, '1/2'), {'timeout': 12}),
+            ('jobs.tasks.import_ai_postings_task', (['c'], None, '2/2'), {'timeout': 11}),
+        ])
+
+    def test_admin_upload_rejects_malformed_file(self):
+        admin_user = MyUser.objects.create_superuser(email='admin@example.com', password='password')
+        self.client.force_login(admin_user)
+        for content in (b'{"text": "one"}\n{not json\n', b'\xff\xfe posting\n'):
+            upload = SimpleUploadedFile('postings.jsonl', content)
+            with patch('jobs.tasks.async_chain') as async_chain:
+                response = self.client.post(reverse('admin:jobs_joblisting_import_ai'), {'postings_file': upload})
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'not valid UTF-8 text or JSON Lines')
+            async_chain.assert_not_called()
+
+
+REPOST_DESCRIPTION = (
+    "We are looking for an experienced accountant to manage our books, prepare monthly "
+    "financial statements, reconcile bank accounts, handle payroll and work closely with "
+    "the auditors during the annual audit. You will report to the finance manager and "
+    "support budgeting and forecasting across the business. Responsibilities include maintaining "
+    "the general ledger, processing supplier invoices and customer receipts, preparing VAT and "
+    "withholding tax returns, managing petty cash, and keeping the fixed asset register up to date. "
+    "The ideal candidate holds a degree in commerce or accounting, is CPA certified, has at least "
+    "three years of experience in a similar role, and is comfortable with QuickBooks, Sage and "
+    "advanced Excel. We offer a competitive salary, medical cover and a pension scheme."
+)
+
+
+class JobDuplicateDetectionTests(TestCase):
+    def setUp(self):
+        JobDuplicateIndex.reset()
+        self.addCleanup(JobDuplicateIndex.reset)
+        self.category = JobCategory.objects.create(name='Finance')
+        self.company = Company.objects.create(name='Savanna Traders Ltd')
+        self.original = self._create('Accountant', REPOST_DESCRIPTION)
+
+    def _create(self, title, description, company='Savanna Traders Ltd'):
+        return JobListing.objects.create(
+            title=title, company=company, company_profile=self.company, category=self.category,
+            description=description, location='Nairobi', url='http://example.com'
+        )
+
+    def test_light_edits_stay_close(self):
+        edited = REPOST_DESCRIPTION + ' Apply by Friday.'
+        close = (simhash('Accountant', 'Savanna Traders Limited', edited)
+                 ^ simhash('Accountant', 'Savanna Traders Ltd', REPOST_DESCRIPTION)).bit_count()
+        far = (simhash('Driver', 'Savanna Traders Ltd', 'Drive the delivery truck around Nairobi every day.')
+               ^ simhash('Accountant', 'Savanna Traders Ltd', REPOST_DESCRIPTION)).bit_count()
+        self.assertLessEqual(close, 4)
+        self.assertGreater(far, 10)
+
+    def test_repost_is_flagged_on_save(self):
+        with patch('jobs.models.async_task') as async_task:
+            repost = self._create('Accountant', REPOST_DESCRIPTION + ' Apply by Friday.')
+            other = self._create('Delivery Driver', 'Drive the delivery truck around Nairobi every day.')
+
+        self.assertEqual(repost.duplicate_of, self.original)
+        self.assertFalse(repost.is_active)
+        self.assertIsNone(other.duplicate_of)
+        self.assertTrue(other.is_active)
+        self.assertEqual(async_task.call_args_list, [
+            call('jobs.tasks.send_job_notification_task', other.id),
+        ])
+
+        # Edits to an existing listing never flag it
+        self.original.title = 'Senior Accountant'
+        self.original.save()
+        self.assertIsNone(JobListing.objects.get(pk=self.original.pk).duplicate_of)
+
+    @override_settings(JOB_DUPLICATE_DETECTION=False)
+    def test_detection_can_be_disabled(self):
+        repost = self._create('Accountant', REPOST_DESCRIPTION)
+        self.assertIsNone(repost.duplicate_of)
+        self.assertTrue(repost.is_active)
+
+    def test_importer_skips_near_duplicates(self):
+        parsed = {
+            'company': {'name': 'Savanna Traders Limited'},
+            'job_listing': {'title': 'Accountant', 'category': 'Finance', 'location': 'Mombasa',
+                            'url': 'https://jobs.example.com/accountant',
+                            'description': REPOST_DESCRIPTION + ' Apply by Friday.'},
+        }
+        with patch('jobs.importers.async_task'):
+            stats = JobImportWriter().write([parsed])
+        self.assertEqual(stats['created'], 0)
+        self.assertEqual(stats['duplicates'], 1)
+
+    def test_backfill_flags_and_merges(self):
+        with override_settings(JOB_DUPLICATE_DETECTION=False):
+            repost = self._create('Accountant', REPOST_DESCRIPTION + ' Apply by Friday.')
+        JobListing.objects.update(simhash=None)
+        user = MyUser.objects.create_user(email='seeker@example.com', password='password')
+        Wishlist.objects.create(user=user, job=self.original)
+        Wishlist.objects.create(user=user, job=repost)
+        Application.objects.create(user=user, job=repost)
+        # Applied to both copies: only the earlier application survives the merge
+        twice = MyUser.objects.create_user(email='twice@example.com', password='password')
+        Application.objects.create(user=twice, job=self.original, status='Shortlisted')
+        Application.objects.create(user=twice, job=repost)
+
+        call_command('backfill_job_duplicates', dry_run=True, stdout=io.StringIO())
+        self.assertIsNone(JobListing.objects.get(pk=repost.pk).duplicate_of)
+
+        call_command('backfill_job_duplicates', stdout=io.StringIO())
+        repost.refresh_from_db()
+        self.assertEqual(repost.duplicate_of, self.original)
+        self.assertFalse(repost.is_active)
+        self.assertFalse(JobListing.objects.filter(simhash__isnull=True).exists())
+
+        cache.delete(JobAnalyticsService.cache_key(self.original.pk))
+        with override_settings(JOB_ANALYTICS_CACHE_TIMEOUT=300):
+            self.assertEqual(JobAnalyticsService.get_snapshot(self.original)['total_applicants'], 1)
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('backfill_job_duplicates', merge=True, stdout=io.StringIO())
+            self.assertEqual(JobAnalyticsService.get_snapshot(self.original)['total_applicants'], 2)
+        self.assertFalse(JobListing.objects.filter(pk=repost.pk).exists())
+        self.assertEqual(Application.objects.get(user=user).job, self.original)
+        self.assertEqual(Application.objects.get(user=twice).status, 'Shortlisted')
+        self.assertEqual(Wishlist.objects.filter(user=user).count(), 1)
+
+    def test_backfill_merges_repost_chains_into_the_root(self):
+        with override_settings(JOB_DUPLICATE_DETECTION=False):
+            repost = self._create('Accountant', REPOST_DESCRIPTION + ' Apply by Friday.')
+            chained = self._create('Accountant', REPOST_DESCRIPTION + ' Apply by Monday.')
+        # Flagged against the repost when it was saved, before the backfill ran
+        JobListing.objects.filter(pk=chained.pk).update(duplicate_of=repost, is_active=False)
+        JobListing.objects.update(simhash=None)
+        user = MyUser.objects.create_user(email='seeker@example.com', password='password')
+        Application.objects.create(user=user, job=chained)
+        Wishlist.objects.create(user=user, job=chained)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('backfill_job_duplicates', stdout=io.StringIO())
+        self.assertEqual(JobListing.objects.get(pk=chained.pk).duplicate_of, self.original)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('backfill_job_duplicates', merge=True, stdout=io.StringIO())
+        self.assertFalse(JobListing.objects.filter(pk__in=[repost.pk, chained.pk]).exists())
+        self.assertEqual(Application.objects.get(user=user).job, self.original)
+        self.assertEqual(Wishlist.objects.get(user=user).job, self.original)
+
+
+class JobRequirementSyncTests(TestCase):
+    def setUp(self):
+        category = JobCategory.objects.create(name='Engineering')
+        self.job = JobListing.objects.create(
+            title='Backend Engineer', company='Acme', category=category,
+            description='Build APIs', location='Nairobi', url='http://example.com'
+        )
+        JobRequirement.objects.bulk_create([
+            JobRequirement(job=self.job, description=f'Skill {i}', is_mandatory=True) for i in range(30)
+        ])
+        self.admin = MyUser.objects.create_user(email='admin@example.com', password='password', role='Admin')
+
+    def _post_data(self, descriptions, mandatory):
+        data = {
+            'title': self.job.title, 'category': self.job.category_id, 'terms': 'Full Time',
+            'company': self.job.company, 'description': self.job.description, 'location': self.job.location,
+            'url': self.job.url, 'education_level_required': 'None', 'application_method': 'website',
+            'requirement_description': descriptions, 'requirement_mandatory': mandatory,
+        }
+        return data
+
+    def test_edit_only_writes_changed_rows(self):
+        ids = list(self.job.requirements.order_by('pk').values_list('pk', flat=True))
+        wanted = [{'description': f'Skill {i}', 'is_mandatory': i % 2 == 0} for i in range(30)]
+        wanted[3]['description'] = 'Python'
+        # Select, one bulk update and the updated_at touch
+        with self.assertNumQueries(3):
+            self.assertTrue(JobRequirementService.sync(self.job, wanted))
+
+        rows = list(self.job.requirements.order_by('pk').values_list('pk', 'description', 'is_mandatory'))
+        self.assertEqual([row[0] for row in rows], ids)
+        self.assertEqual(rows[3][1:], ('Python', False))
+        self.assertEqual(rows[4][1:], ('Skill 4', True))
+
+        with self.assertNumQueries(1):
+            self.assertFalse(JobRequirementService.sync(self.job, wanted))
+
+    def test_admin_edit_adds_and_removes_requirements(self):
+        self.client.force_login(self.admin)
+        before = JobListing.objects.get(pk=self.job.pk).updated_at
+        response = self.client.post(
+            reverse('admin_edit_job', args=[self.job.pk]),
+            self._post_data(['Skill 0', 'Docker', '  '], ['1']),
+        )
+        self.assertRedirects(response, reverse('job_detail', args=[self.job.pk]), fetch_redirect_response=False)
+        self.assertEqual(
+            list(self.job.requirements.order_by('pk').values_list('description', 'is_mandatory')),
+            [('Skill 0', False), ('Docker', True)],
+        )
+        self.assertGreater(JobListing.objects.get(pk=self.job.pk).updated_at, before)
+
+        self.client.post(
+            reverse('admin_edit_job', args=[self.job.pk]),
+            self._post_data(['Skill 0', 'Docker', 'Kubernetes'], ['1', '2']),
+        )
+        self.assertEqual(self.job.requirements.count(), 3)
+
+
+class ImportJobsCommandTests(TestCase):
+    def setUp(self):
+        CompanyNameIndex.reset()
+        JobDuplicateIndex.reset()
+        self.addCleanup(CompanyNameIndex.reset)
+        self.addCleanup(JobDuplicateIndex.reset)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_imports_jsonl_and_csv_in_bulk(self):
+        Company.objects.create(name='TechFlow Systems Ltd')
+        jsonl = self._write('jobs.jsonl', (
+            '{"title": "Frontend Developer", "company": "TechFlow Systems", "category": "Software Engineering", '
+            '"location": "Nairobi", "description": "Build dashboards", "expires_in_days": 30, '
+            '"url": "https://techflow.example.com/careers", '
+            '"requirements": ["React", {"description": "Jest", "is_mandatory": false}]}\n'
+            '{"title": "Nurse", "company": {"name": "City Hospital", "website": "https://city.example.com"}, '
+            '"category": "Healthcare", "location": "Mombasa", "experience_required_years": 2, '
+            '"url": "https://city.example.com/jobs/nurse"}\n'
+            '{"title": "Nurse", "company": "City Hospital", "category": "Healthcare", "location": "Mombasa", '
+            '"url": "https://city.example.com/jobs/nurse"}\n'
+        ))
+        with patch('jobs.importers.async_task') as async_task, patch('jobs.models.async_task') as signal_task:
+            call_command('import_jobs', jsonl, stdout=io.StringIO())
+
+        self.assertEqual(JobListing.objects.count(), 2)
+        self.assertEqual(set(JobCategory.objects.values_list('name', flat=True)), {'Software Engineering', 'Healthcare'})
+        frontend = JobListing.objects.get(title='Frontend Developer')
+        self.assertEqual(frontend.company_profile.name, 'TechFlow Systems Ltd')
+        self.assertEqual(frontend.expiry_date, timezone.now().date() + timedelta(days=30))
+        self.assertEqual(list(frontend.requirements.values_list('description', 'is_mandatory')), [('React', True), ('Jest', False)])
+        self.assertEqual(Company.objects.get(name='City Hospital').website, 'https://city.example.com')
+        signal_task.assert_not_called()
+        self.assertEqual(
+            [c.args[0] for c in async_task.call_args_list],
+            ['jobs.tasks.recommend_new_listings_task', 'jobs.tasks.send_job_notifications_batch_task'],
+        )
+        self.assertEqual(sorted(async_task.call_args.args[1]), sorted(JobListing.objects.values_list('pk', flat=True)))
+
+        csv_path = self._write('jobs.csv', (
+            'title,company,category,location,url,requirements,experience_required_years\n'
+            'Teacher,Greenwood Academy,Education,Nakuru,https://greenwood.example.com,TSC Registration|Two years teaching,\n'
+        ))
+        with patch('jobs.importers.async_task') as async_task:
+            call_command('import_jobs', csv_path, '--no-notify', '--skip-duplicate-check', stdout=io.StringIO())
+        teacher = JobListing.objects.get(title='Teacher')
+        self.assertEqual(teacher.requirements.count(), 2)
+        self.assertIsNone(teacher.simhash)
+        async_task.assert_called_once_with('jobs.tasks.recommend_new_listings_task', [teacher.pk], timeout=600)
+
+    def test_notification_batch_groups_by_category(self):
+        category = JobCategory.objects.create(name='Engineering')
+        user = MyUser.objects.create_user(email='seeker@example.com', password='password')
+        user.profile.preferred_categories.add(category)
+        with patch('jobs.models.async_task'):
+            jobs = [
+                JobListing.objects.create(
+                    title=title, company='Acme', category=category, description=title,
+                    location='Nairobi', url='http://example.com'
+                )
+                for title in ('Backend Engineer', 'Mobile Developer')
+            ]
+
+        Site.objects.get_current()
+        # Jobs, already-notified pairs, users for the one category, one insert per email
+        with self.assertNumQueries(5):
+            sent = send_job_notifications_batch_task([job.pk for job in jobs])
+        self.assertEqual(sent, 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(user.notifications.count(), 2)
+
+        # A retried task skips users who were already notified
+        self.assertEqual(send_job_notifications_batch_task([job.pk for job in jobs]), 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_bad_expiry_cell_counts_row_as_invalid(self):
+        path = self._write('jobs.csv', (
+            'title,company,category,location,url,expires_in_days\n'
+            'Teacher,Greenwood Academy,Education,Nakuru,https://greenwood.example.com,soon\n'
+            'Librarian,Greenwood Academy,Education,Nakuru,https://greenwood.example.com,14\n'
+        ))
+        out = io.StringIO()
+        with patch('jobs.importers.async_task'):
+            call_command('import_jobs', path, '--no-notify', stdout=out)
+        self.assertEqual(list(JobListing.objects.values_list('title', flat=True)), ['Librarian'])
+        self.assertIn('"invalid": 1', out.getvalue())
+
+    def test_unusable_records_count_as_invalid(self):
+        # Already in the table but not yet in this process's company index
+        Company.objects.create(name='Greenwood Academy')
+        path = self._write('jobs.jsonl', (
+            '{"title": "Teacher", "company": "Greenwood Academy", "category": "Education", "location": "Nakuru", '
+            '"url": "https://greenwood.example.com"}\n'
+            '{"title": "Librarian", "company": "Greenwood Academy", "category": "Education", "location": "Nakuru"}\n'
+            '{"title": "Bursar", "company": "Greenwood Academy", "category": "Education", "location": "Nakuru", '
+            '"url": "not a url"}\n'
+            '{"title": "Cook", "company": "Greenwood Academy", "category": "Education", "location": "Nakuru", '
+            '"url": "https://greenwood.example.com", "terms": "Whenever"}\n'
+            '["not", "an", "object"]\n'
+        ))
+        out = io.StringIO()
+        with patch('jobs.importers.CompanyNameIndex.shared', return_value=CompanyNameIndex()), \
+                patch('jobs.importers.async_task'):
+            call_command('import_jobs', path, '--no-notify', stdout=out)
+        self.assertEqual(list(JobListing.objects.values_list('title', 'url')), [('Teacher', 'https://greenwood.example.com')])
+        self.assertIn('"invalid": 4', out.getvalue())
+        self.assertIn('"companies_created": 0', out.getvalue())
+
+    @override_settings(JOB_NOTIFICATION_TASK_TIMEOUT=30)
+    def test_notifications_are_queued_per_chunk(self):
+        writer = JobImportWriter(chunk_size=2)
+        writer.created_job_ids = [1, 2, 3]
+        with patch('jobs.importers.async_task') as async_task, patch('home.tasks.schedule_sitemap_rebuild'):
+            writer._after_import()
+        self.assertEqual(async_task.call_args_list[1:], [
+            call('jobs.tasks.send_job_notifications_batch_task', [1, 2], timeout=30),
+            call('jobs.tasks.send_job_notifications_batch_task', [3], timeout=30),
+        ])
+
+
+class SyntheticDataAndLoadTestTests(TestCase):
+    def setUp(self):
+        CompanyNameIndex.reset()
+        self.addCleanup(CompanyNameIndex.reset)
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_override = override_settings(MEDIA_ROOT=media.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+    def test_generates_scaled_data_and_drives_every_scenario(self):
+        call_command('generate_synthetic_data', scale=0.05, seed=1, stdout=io.StringIO())
+
+        seekers = MyUser.objects.filter(email__endswith='@synthetic.example.com', role='Job Seeker')
+        self.assertEqual(seekers.count(), 10)
+        self.assertEqual(UserDocument.objects.filter(user__in=seekers, document_type__name='CV').count(), 10)
+        self.assertEqual(Application.objects.count(), 50)
+        self.assertTrue(JobListing.objects.filter(requirements__isnull=False).exists())
+        self.assertTrue(MyUser.objects.get(email='employer0@synthetic.example.com').company_id)
+        self.assertTrue(JobRecommendation.objects.filter(user__in=seekers).exists())
+
+        report = LoadTestDriver(concurrency=1, iterations=30, seed=2).run()
+        self.assertEqual(set(report['scenarios']), set(SCENARIOS))
+        for name, scenario in report['scenarios'].items():
+            self.assertEqual(scenario['errors'], 0, name)
+        self.assertGreater(Application.objects.count(), 50)
+
+        call_command('generate_synthetic_data', scale=0.05, clear=True, stdout=io.StringIO())
+        self.assertEqual(seekers.count(), 10)
+
+    def test_apply_scenario_reads_letter_from_page(self):
+        response = HttpResponse(
+            '<form><input type="hidden" name="cover_letter_text" value="Dear &quot;Acme&quot;,\nI &amp; you">'
+            '<input type="hidden" name="analysis_data_json" value="{&quot;score&quot;: 7}"></form>'
+        )
+        self.assertEqual(HiddenInputs.parse(response), {
+            'cover_letter_text': 'Dear "Acme",\nI & you',
+            'analysis_data_json': '{"score": 7}',
+        })
+
+
+class BenchmarkSuiteTests(TestCase):
+    def setUp(self):
+        CompanyNameIndex.reset()
+        self.addCleanup(CompanyNameIndex.reset)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        media_override = override_settings(MEDIA_ROOT=self.tmpdir.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+    def test_suite_records_history_and_flags_regressions(self):
+        call_command('generate_synthetic_data', scale=0.05, seed=3, stdout=io.StringIO())
+        notifications = UserNotification.objects.count()
+        results = BenchmarkSuite(repeat=1).run()
+        self.assertIn('send_job_notification_task', results)
+        self.assertEqual(UserNotification.objects.count(), notifications)
+        self.assertIn('dashboard_employer', results)
+        self.assertIn('extract_file_docx', results)
+        self.assertGreater(results['job_list']['queries'], 0)
+        self.assertEqual(results['generate_pdf']['queries'], 0)
+
+        history = BenchmarkHistory(os.path.join(self.tmpdir.name, 'history.json'))
+        first, previous = history.append(results, scale=0.05)
+        self.assertIsNone(previous)
+        slower = {name: dict(result) for name, result in results.items()}
+        slower['job_list']['queries'] += 1
+        slower['generate_pdf']['median_ms'] = results['generate_pdf']['median_ms'] * 2 + 1
+        second, previous = history.append(slower, scale=0.05)
+        self.assertEqual(previous['results'], first['results'])
+        self.assertEqual(len(history.load()), 2)
+
+        regressions = BenchmarkHistory.regressions(second, previous)
+        self.assertEqual({regression.split(':')[0] for regression in regressions}, {'job_list', 'generate_pdf'})
+
+
+class JobRecommendationTests(TestCase):
+    def setUp(self):
+        JobDuplicateIndex.reset()
+        self.addCleanup(JobDuplicateIndex.reset)
+        self.engineering = JobCategory.objects.create(name='Software Engineering')
+        self.finance = JobCategory.objects.create(name='Finance')
+        self.seeker = MyUser.objects.create_user(email='seeker@example.com', password='password123')
+        self.seeker.profile.preferred_categories.add(self.engineering)
+        for skill in ['Python', 'Django', 'PostgreSQL']:
+            MySkill.objects.create(user=self.seeker, name=skill)
+        WorkExperience.objects.create(
+            user=self.seeker, company_name='Acme', job_title='Backend Developer',
+            start_date=timezone.localdate() - timedelta(days=3 * 366), description='Built Django REST APIs.',
+        )
+        Education.objects.create(
+            user=self.seeker, institution='University of Nairobi', level='University',
+            degree='BSc Computer Science', start_date=timezone.localdate() - timedelta(days=8 * 366),
+        )
+        with patch('jobs.models.async_task'):
+            self.backend = self._job('Backend Developer', 'Build Python and Django services on PostgreSQL.', years=2)
+            self.senior = self._job('Principal Engineer', 'Lead our Django platform architecture.', years=10)
+            self.accountant = self._job('Accountant', 'Prepare monthly ledgers and tax returns.', category=self.finance)
+
+    def _job(self, title, description, years=None, category=None):
+        return JobListing.objects.create(
+            title=title, company='Acme Ltd', category=category or self.engineering, location='Nairobi',
+            url='http://example.com', description=description, experience_required_years=years,
+            education_level_required='University',
+        )
+
+    def _recommended(self, user=None):
+        return list(JobRecommendation.objects.filter(user=user or self.seeker).order_by('-score').values_list('job_id', flat=True))
+
+    def test_refresh_ranks_by_profile_and_skips_applied_jobs(self):
+        RecommendationEngine().refresh_users([self.seeker.pk])
+        self.assertEqual(self._recommended(), [self.backend.pk, self.senior.pk])
+
+        Application.objects.create(user=self.seeker, job=self.backend)
+        self.assertEqual(self._recommended(), [self.senior.pk])
+        RecommendationEngine().refresh_users([self.seeker.pk])
+        self.assertEqual(self._recommended(), [self.senior.pk])
+
+    def test_new_listings_only_displace_weaker_matches(self):
+        engine = RecommendationEngine(per_user=2)
+        engine.refresh_users()
+        with patch('jobs.models.async_task'):
+            strong = self._job('Python Django Developer', 'Python, Django and PostgreSQL APIs.', years=1)
+            weak = self._job('Bookkeeper', 'Ledgers and Python scripts.', category=self.finance)
+
+        self.assertEqual(engine.add_listings([strong.pk, weak.pk]), 1)
+        self.assertEqual(self._recommended(), [strong.pk, self.backend.pk])
+
+    def test_dashboard_reads_precomputed_list(self):
+        RecommendationEngine().refresh_users([self.seeker.pk])
+        self.senior.is_active = False
+        self.senior.save()
+        self.client.force_login(self.seeker)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['recommended_jobs'], [self.backend])
+
+    def test_profile_edits_schedule_one_refresh(self):
+        shared_cache().delete(recommendation_refresh_key(self.seeker.pk))
+        Schedule.objects.filter(func='jobs.tasks.refresh_recommendations_task').delete()
+
+        MySkill.objects.create(user=self.seeker, name='Docker')
+        self.seeker.profile.preferred_categories.add(self.finance)
+        schedules = Schedule.objects.filter(func='jobs.tasks.refresh_recommendations_task')
+        self.assertEqual(schedules.count(), 1)
+
+    def test_dashboard_falls_back_to_preferred_categories(self):
+        self.client.force_login(self.seeker)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(
+            list(response.context['recommended_jobs']),
+            [self.senior, self.backend],
+        )
+
+    def test_new_listings_are_batched_into_one_scoring_pass(self):
+        shared_cache().delete(NEW_LISTING_RECOMMENDATIONS_PENDING_KEY)
+        Schedule.objects.filter(func='jobs.tasks.recommend_listings_since_task').delete()
+        with patch('jobs.models.async_task'):
+            first = self._job('Data Engineer', 'Python and Django pipelines.')
+            second = self._job('Django Developer', 'Python, Django and PostgreSQL.')
+
+        schedules = Schedule.objects.filter(func='jobs.tasks.recommend_listings_since_task')
+        self.assertEqual(schedules.count(), 1)
+        schedules.update(next_run=timezone.now() - timedelta(seconds=1))
+        with patch('django_q.cluster.close_old_django_connections'), \
+                patch('django_q.tasks.async_task', return_value='task-id') as queue:
+            scheduler()
+        self.assertFalse(schedules.exists())
+        func, *args = queue.call_args.args
+        self.assertEqual(func, 'jobs.tasks.recommend_listings_since_task')
+        with patch('jobs.tasks.recommend_new_listings_task') as recommend:
+            recommend_listings_since_task(*args)
+        self.assertEqual(sorted(recommend.call_args.args[0]), sorted([first.pk, second.pk]))
+        self.assertIsNone(shared_cache().get(NEW_LISTING_RECOMMENDATIONS_PENDING_KEY))
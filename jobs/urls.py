@@ -17,6 +17,7 @@ urlpatterns = [
     path('wishlist/', views.wishlist_list, name='wishlist_list'),
     path('wishlist/toggle/<int:pk>/', views.toggle_wishlist, name='toggle_wishlist'),
     path('<int:pk>/analytics/', views.job_analytics, name='job_analytics'),
+    path('<int:pk>/analytics/export/', views.export_job_applicants, name='export_job_applicants'),
     path('applications/<int:pk>/status/', views.update_application_status, name='update_application_status'),
     path('<int:pk>/toggle-status/', views.toggle_job_status, name='toggle_job_status'),
     path('applications/bulk-update/', views.bulk_update_application_status, name='bulk_update_application_status'),
@@ -4,18 +4,26 @@ from django.db.models import Q, Avg, Count, F
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.files.base import ContentFile
-from .models import JobListing, JobCategory, Application, JobRequirement, Company, Wishlist
+from .models import JobListing, JobCategory, Application, Company, Wishlist
 from .forms import ApplicationForm, JobListingForm, JobRequirementForm, CompanyForm, PublicApplicationForm
-from .services import EmailService
+from .services import JobAnalyticsService, ApplicantExportService, JobRequirementService
+from .pagination import KeysetPaginator
+from .conditional import public_conditional_page, job_list_state, job_detail_state, company_detail_state
+from .page_cache import anonymous_page_cache
+from .tasks import queue_application_delivery
 from .utils import DocumentGenerator
 from home.ai_service import AIService
 from django.contrib.auth.decorators import user_passes_test
+from django.http import StreamingHttpResponse
 from django.db import transaction
 import json
 import uuid
 from django.contrib.auth import get_user_model
 from users.models import UserDocument, DocumentType, CoverLetterAnalysis, PersonalProfile
+from users.services import EntitlementService
 
+@public_conditional_page(job_list_state)
+@anonymous_page_cache('job_list')
 def job_list(request):
     query = request.GET.get('q', '')
     category_id = request.GET.get('category', '')
@@ -124,6 +132,7 @@ def apply_via_email(request, pk):
 
     # Check for existing application
     has_applied = Application.objects.filter(user=request.user, job=job).exists()
+    has_active_subscription = EntitlementService.has_active_subscription(request)
         
     if request.method == 'POST':
         if has_applied:
@@ -151,22 +160,6 @@ def apply_via_email(request, pk):
                 'cv_used': request.POST.get('cv_used')
             })
             
-            # Check subscription for AI features
-            has_active_subscription = False
-            try:
-                if hasattr(request.user, 'subscription'):
-                    subscription = request.user.subscription
-                    from django.utils import timezone
-                    # Check if subscription is active and not expired
-                    if subscription.is_active:
-                        if subscription.expiry_date:
-                            has_active_subscription = subscription.expiry_date > timezone.now()
-                        else:
-                            # If no expiry date, consider it active if is_active is True
-                            has_active_subscription = True
-            except Exception:
-                pass
-
             # Pass data to template
             context = {
                 'form': form, 
@@ -246,42 +239,14 @@ def apply_via_email(request, pk):
 
             application.save()
             
-            # Send Email
-            success, message = EmailService.send_application_email(
-                user=request.user,
-                job=job,
-                cover_letter_file=application.cover_letter,
-                cv_file_path=application.cv_used.file.path if application.cv_used else None
-            )
-            
-            if success:
-                if "sent to your email" in message.lower() or "forwarded to your email" in message.lower():
-                    messages.info(request, f"📧 {message}")
-                else:
-                    messages.success(request, f"✅ Application sent successfully! {message}")
-            else:
-                messages.warning(request, f"Application logged, but email failed: {message}")
+            # Send Email in the background; delivery is retried by the task queue
+            queue_application_delivery(application)
+            messages.success(request, "✅ Application submitted! We're sending your application materials now and will notify you once they're delivered.")
                 
             return redirect('job_detail', pk=pk)
     else:
         form = ApplicationForm(user=request.user)
         
-        # Check subscription status for GET request
-        has_active_subscription = False
-        try:
-            if hasattr(request.user, 'subscription'):
-                subscription = request.user.subscription
-                from django.utils import timezone
-                # Check if subscription is active and not expired
-                if subscription.is_active:
-                    if subscription.expiry_date:
-                        has_active_subscription = subscription.expiry_date > timezone.now()
-                    else:
-                        # If no expiry date, consider it active if is_active is True
-                        has_active_subscription = True
-        except Exception:
-            pass
-        
     return render(request, 'jobs/email_application.html', {
         'form': form, 
         'job': job, 
@@ -433,6 +398,8 @@ def public_job_application(request, pk):
         
     return render(request, 'jobs/public_application.html', {'form': form, 'job': job})
 
+@public_conditional_page(job_detail_state)
+@anonymous_page_cache('job_detail')
 def job_detail(request, pk):
     job = get_object_or_404(JobListing, pk=pk)
     user_application = None
@@ -450,17 +417,31 @@ def job_detail(request, pk):
     }
     return render(request, 'jobs/job_detail.html', context)
 
+APPLICATIONS_PER_PAGE = 25
+
 @login_required
 def application_list(request):
     if request.user.role == 'Employer' and request.user.company:
         # Employers see applications for their company's jobs
-        applications = Application.objects.filter(job__company_profile=request.user.company).order_by('-applied_at')
+        applications = Application.objects.filter(job__company_profile=request.user.company)
     elif request.user.role == 'Admin':
-        applications = Application.objects.all().order_by('-applied_at')
+        applications = Application.objects.all()
     else:
         # Job seekers see their own applications
-        applications = Application.objects.filter(user=request.user).order_by('-applied_at')
-    return render(request, 'jobs/application_list.html', {'applications': applications})
+        applications = Application.objects.filter(user=request.user)
+
+    # Everything the template touches comes back in the same query
+    applications = applications.select_related('job', 'user', 'user__profile', 'cv_used')
+
+    # Newest first, paged by cursor so the admin view never loads the whole table
+    paginator = KeysetPaginator(applications, ['applied_at', 'pk'], per_page=APPLICATIONS_PER_PAGE)
+    page = paginator.page(request.GET.get('after'))
+
+    return render(request, 'jobs/application_list.html', {
+        'applications': page,
+        'next_cursor': page.next_cursor,
+        'is_first_page': not request.GET.get('after'),
+    })
 
 @login_required
 def application_detail(request, pk):
@@ -505,20 +486,11 @@ def job_add(request):
                 job.save()
                 
                 # Handle Requirements
-                req_descriptions = request.POST.getlist('requirement_description')
-                req_mandatory = request.POST.getlist('requirement_mandatory')
-                
-                for i in range(len(req_descriptions)):
-                    desc = req_descriptions[i].strip()
-                    if desc:
-                        is_mandatory = True if str(i) in req_mandatory else False
-                        JobRequirement.objects.create(
-                            job=job,
-                            description=desc,
-                            is_mandatory=is_mandatory
-                        )
+                JobRequirementService.sync(job, JobRequirementService.from_post(request.POST))
                 
                 messages.success(request, f"Job Listing '{job.title}' created successfully!")
+                if job.duplicate_of_id:
+                    messages.warning(request, "This listing looks like a repost of an existing job, so it was saved as inactive.")
                 return redirect('job_detail', pk=job.pk)
     else:
         # Pre-fill for employers or via GET param for admins
@@ -553,23 +525,10 @@ def admin_edit_job(request, pk):
     if request.method == 'POST':
         job_form = JobListingForm(request.POST, instance=job)
         if job_form.is_valid():
-            job = job_form.save()
-            
-            # Update Requirements: Remove existing and create new ones
-            job.requirements.all().delete()
-            
-            req_descriptions = request.POST.getlist('requirement_description')
-            req_mandatory = request.POST.getlist('requirement_mandatory')
-            
-            for i in range(len(req_descriptions)):
-                desc = req_descriptions[i].strip()
-                if desc:
-                    is_mandatory = True if str(i) in req_mandatory else False
-                    JobRequirement.objects.create(
-                        job=job,
-                        description=desc,
-                        is_mandatory=is_mandatory
-                    )
+            with transaction.atomic():
+                job = job_form.save()
+                # Update Requirements: only rows that changed are written
+                JobRequirementService.sync(job, JobRequirementService.from_post(request.POST))
             
             messages.success(request, f"Job Listing '{job.title}' updated successfully!")
             return redirect('job_detail', pk=job.pk)
@@ -599,6 +558,7 @@ def create_company(request):
     })
 
 
+@public_conditional_page(company_detail_state)
 def company_detail(request, pk):
     company = get_object_or_404(Company, pk=pk)
     jobs = company.jobs.all().order_by('-posted_at')
@@ -628,39 +588,18 @@ def toggle_wishlist(request, pk):
     if referer:
         return redirect(referer)
     return redirect('job_detail', pk=pk)
-@login_required
-def job_analytics(request, pk):
-    job = get_object_or_404(JobListing, pk=pk)
-    
-    # Permission check: Only job owner (Employer) or Admin
-    if request.user.role != 'Admin' and (request.user.role != 'Employer' or job.company_profile != request.user.company):
-        messages.error(request, "Access denied. You can only view analytics for your company's jobs.")
-        return redirect('dashboard')
-    
-    all_applications = job.applications.all()
-    
-    # Metrics (calculated on all applications)
-    total_applicants = all_applications.count()
-    
-    # Filtering for the table
-    # Optimized query to fetch user, profile, cv, and cover letter analysis
-    applications = job.applications.select_related(
-        'user', 
-        'user__profile', 
-        'cv_used', 
-        'cover_letter_document',
-        'cover_letter_document__cl_analysis'
-    )
-    
-    search_query = request.GET.get('q', '')
-    status_filter = request.GET.get('status', '')
-    cv_min = request.GET.get('cv_min', '')
-    cl_min = request.GET.get('cl_min', '')
+def _filter_applicant_pool(applications, params):
+    """Applies the applicant pool search, status and minimum score filters from GET params."""
+    search_query = params.get('q', '')
+    status_filter = params.get('status', '')
+    cv_min = params.get('cv_min', '')
+    cl_min = params.get('cl_min', '')
     
     if search_query:
+        # Prefix matches can use the email/full_name indexes, unlike icontains
         applications = applications.filter(
-            Q(user__email__icontains=search_query) |
-            Q(user__profile__full_name__icontains=search_query)
+            Q(user__email__istartswith=search_query) |
+            Q(user__profile__full_name__istartswith=search_query)
         )
     
     if status_filter:
@@ -681,54 +620,110 @@ def job_analytics(request, pk):
         except (ValueError, TypeError):
             pass
 
-    applications = applications.order_by(F('cv_used__ai_score').desc(nulls_last=True), '-applied_at')
+    return applications
+
+APPLICANTS_PER_PAGE = 50
+
+@login_required
+def job_analytics(request, pk):
+    job = get_object_or_404(JobListing, pk=pk)
     
-    # AI Score Metrics
-    avg_ai_score = all_applications.aggregate(avg=Avg('cv_used__ai_score'))['avg'] or 0
+    # Permission check: Only job owner (Employer) or Admin
+    if request.user.role != 'Admin' and (request.user.role != 'Employer' or job.company_profile != request.user.company):
+        messages.error(request, "Access denied. You can only view analytics for your company's jobs.")
+        return redirect('dashboard')
     
-    # Cover Letter Score Metrics
-    # We need to compute this manually or via simpler aggregation if possible
-    # Note: 'cover_letter_document__cl_analysis__total_score' might span tables, so using aggregate with valid relation traversal
-    avg_cl_score = all_applications.filter(cover_letter_document__cl_analysis__isnull=False).aggregate(
-        avg=Avg('cover_letter_document__cl_analysis__total_score')
-    )['avg'] or 0
+    # Metrics (calculated on all applications, cached per job)
+    snapshot = JobAnalyticsService.get_snapshot(job)
     
-    # Prepare status distribution with percentages
-    stats = []
-    status_choices = ['Under Review', 'Shortlisted', 'Interviewing', 'Offer', 'Rejected']
-    for status in status_choices:
-        count = all_applications.filter(status=status).count()
-        pct = (count / total_applicants * 100) if total_applicants > 0 else 0
-        
-        color = 'var(--primary)'
-        if status == 'Interviewing': color = '#f59e0b'
-        elif status == 'Shortlisted': color = '#8b5cf6'
-        elif status == 'Offer': color = 'var(--success)'
-        elif status == 'Rejected': color = '#ef4444'
-        
-        stats.append({
-            'label': status,
-            'count': count,
-            'pct': pct,
-            'color': color,
-            'css_class': status.lower()
-        })
+    # Filtering for the table
+    # Optimized query to fetch user, profile, cv, and cover letter analysis
+    applications = job.applications.select_related(
+        'user', 
+        'user__profile', 
+        'cv_used', 
+        'cover_letter_document',
+        'cover_letter_document__cl_analysis'
+    )
+    
+    search_query = request.GET.get('q', '')
+    status_filter = request.GET.get('status', '')
+    cv_min = request.GET.get('cv_min', '')
+    cl_min = request.GET.get('cl_min', '')
+    applications = _filter_applicant_pool(applications, request.GET)
+
+    match_count = None
+    if search_query or status_filter or cv_min or cl_min:
+        match_count = applications.count()
+
+    # Best CVs first, paged by cursor so large applicant pools stay cheap
+    paginator = KeysetPaginator(
+        applications, ['cv_used__ai_score', 'applied_at', 'pk'], per_page=APPLICANTS_PER_PAGE
+    )
+    page = paginator.page(request.GET.get('after'))
+
+    next_page_query = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['after'] = page.next_cursor
+        next_page_query = params.urlencode()
+
+    params = request.GET.copy()
+    params.pop('after', None)
+    filter_query = params.urlencode()
+    first_page_query = filter_query if request.GET.get('after') else None
     
     context = {
         'job': job,
-        'applications': applications,
-        'total_applicants': total_applicants,
-        'avg_ai_score': round(avg_ai_score, 1),
-        'avg_cl_score': round(avg_cl_score, 1),
-        'stats': stats,
+        'applications': page,
+        'match_count': match_count,
+        'next_page_query': next_page_query,
+        'first_page_query': first_page_query,
+        'filter_query': filter_query,
+        'parquet_export_available': ApplicantExportService.parquet_available(),
+        'total_applicants': snapshot['total_applicants'],
+        'avg_ai_score': snapshot['avg_ai_score'],
+        'avg_cl_score': snapshot['avg_cl_score'],
+        'stats': snapshot['stats'],
         'search_query': search_query,
         'status_filter': status_filter,
         'cv_min': cv_min,
         'cl_min': cl_min,
-        'status_choices': status_choices,
+        'status_choices': JobAnalyticsService.STATUS_ORDER,
     }
     return render(request, 'jobs/job_analytics.html', context)
 
+@login_required
+def export_job_applicants(request, pk):
+    job = get_object_or_404(JobListing, pk=pk)
+    
+    # Permission check: Only job owner (Employer) or Admin
+    if request.user.role != 'Admin' and (request.user.role != 'Employer' or job.company_profile != request.user.company):
+        messages.error(request, "Access denied. You can only export applicants for your company's jobs.")
+        return redirect('dashboard')
+
+    applications = _filter_applicant_pool(job.applications.all(), request.GET)
+    export_format = request.GET.get('format', 'csv')
+    filename = f"job_{job.pk}_applicants"
+
+    if export_format == 'parquet':
+        if not ApplicantExportService.parquet_available():
+            messages.error(request, "Parquet export is not available on this server. Please use CSV.")
+            return redirect('job_analytics', pk=job.pk)
+        response = StreamingHttpResponse(
+            ApplicantExportService.stream_parquet(applications),
+            content_type='application/vnd.apache.parquet'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}.parquet"'
+        return response
+
+    response = StreamingHttpResponse(
+        ApplicantExportService.stream_csv(applications),
+        content_type='text/csv'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
 @login_required
 def update_application_status(request, pk):
     application = get_object_or_404(Application, pk=pk)
@@ -803,7 +798,10 @@ def bulk_update_application_status(request):
             messages.error(request, "Permission denied.")
             return redirect('dashboard')
             
+        job_ids = set(applications.values_list('job_id', flat=True))
         count = applications.update(status=new_status)
+        # QuerySet.update() skips post_save, so drop the cached analytics here
+        JobAnalyticsService.invalidate(*job_ids)
         messages.success(request, f"Successfully updated status to '{new_status}' for {count} applications.")
         
         if job_pk:
@@ -839,14 +837,11 @@ def add_jobs_ai(request):
                     'text': text
                 })
             
-            # Get all existing companies for fuzzy matching
-            existing_companies = list(Company.objects.values('id', 'name'))
-            
             # Get all job categories
             categories_data = list(JobCategory.objects.values('name', 'keywords'))
             
             # Call AI service to parse the text
-            parsed_data = AIService.create_job_listing(text, existing_companies, categories_data)
+            parsed_data = AIService.create_job_listing(text, categories_data=categories_data)
             
             if not parsed_data:
                 messages.error(request, "Failed to parse job listing. Please try again or check your OpenAI API key.")
@@ -985,18 +980,15 @@ def add_jobs_ai(request):
                     )
                     
                     # Create requirements
-                    for req in requirements:
-                        JobRequirement.objects.create(
-                            job=job,
-                            description=req.get('description', ''),
-                            is_mandatory=req.get('is_mandatory', True)
-                        )
+                    JobRequirementService.sync(job, requirements)
                     
                     # Clear session data
                     request.session.pop('ai_job_parsed_data', None)
                     request.session.pop('ai_job_original_text', None)
                     
                     messages.success(request, f"Job listing '{job.title}' created successfully!")
+                    if job.duplicate_of_id:
+                        messages.warning(request, "This listing looks like a repost of an existing job, so it was saved as inactive.")
                     return redirect('job_detail', pk=job.pk)
                     
             except Exception as e:
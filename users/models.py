@@ -58,7 +58,7 @@ class PersonalProfile(models.Model):
     )
 
     user = models.OneToOneField(MyUser, on_delete=models.CASCADE, related_name='profile')
-    full_name = models.CharField(max_length=255, blank=True)
+    full_name = models.CharField(max_length=255, blank=True, db_index=True)
     phone_primary = models.CharField(max_length=15, blank=True, null=True)
     phone_secondary = models.CharField(max_length=15, blank=True, null=True)
     gender = models.CharField(max_length=20, choices=GENDER_CHOICES, blank=True, null=True)
@@ -112,7 +112,7 @@ class UserDocument(models.Model):
     file = models.FileField(upload_to='user_documents/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     extracted_content = models.TextField(blank=True, null=True)
-    ai_score = models.IntegerField(blank=True, null=True)
+    ai_score = models.IntegerField(blank=True, null=True, db_index=True)
 
     def __str__(self):
         return f"{self.document_type.name} - {self.user.email}"
@@ -255,7 +255,7 @@ class MpesaTransaction(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     checkout_request_id = models.CharField(max_length=100, unique=True)
     merchant_request_id = models.CharField(max_length=100)
-    mpesa_receipt_number = models.CharField(max_length=50, blank=True, null=True)
+    mpesa_receipt_number = models.CharField(max_length=50, blank=True, null=True, unique=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     result_code = models.IntegerField(blank=True, null=True)
     result_description = models.TextField(blank=True, null=True)
@@ -1,15 +1,162 @@
 import requests
 import base64
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 from django.conf import settings
-from .models import MpesaTransaction
+from django.db import transaction
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .models import MpesaTransaction, Subscription
+from .services import shared_cache
 
 class MpesaService:
+    TOKEN_CACHE_KEY = 'mpesa:access_token'
+    TOKEN_LOCK_KEY = 'mpesa:access_token:lock'
+    TOKEN_LOCK_TIMEOUT = 30  # seconds
+    _token_lock = threading.Lock()
+
+    # One keep-alive connection pool per process, shared by all threads
+    _session = None
+    _session_lock = threading.Lock()
+    _metrics = {}
+    _metrics_lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls):
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    # Only idempotent methods are retried after a response error;
+                    # an STK push must never be sent twice.
+                    retry = Retry(
+                        total=getattr(settings, 'MPESA_MAX_RETRIES', 3),
+                        backoff_factor=0.5,
+                        status_forcelist=(500, 502, 503, 504),
+                        allowed_methods=frozenset({'GET'}),
+                        raise_on_status=False,
+                    )
+                    pool_size = getattr(settings, 'MPESA_POOL_SIZE', 10)
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    cls._session = session
+        return cls._session
+
+    @classmethod
+    def reset_session(cls):
+        with cls._session_lock:
+            if cls._session is not None:
+                cls._session.close()
+            cls._session = None
+
+    @classmethod
+    def _request(cls, method, endpoint, url, **kwargs):
+        """Sends a request through the pooled session with timeouts and records its latency."""
+        kwargs.setdefault('timeout', (
+            getattr(settings, 'MPESA_CONNECT_TIMEOUT', 5),
+            getattr(settings, 'MPESA_READ_TIMEOUT', 30),
+        ))
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = cls.get_session().request(method, url, **kwargs)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            cls._record_latency(endpoint, (time.perf_counter() - started) * 1000, failed)
+
+    @classmethod
+    def _record_latency(cls, endpoint, elapsed_ms, failed):
+        with cls._metrics_lock:
+            stats = cls._metrics.setdefault(endpoint, {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['errors'] += int(failed)
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    @classmethod
+    def latency_stats(cls):
+        """Per-endpoint call count, error count and average/max latency (ms) for this process."""
+        with cls._metrics_lock:
+            return {
+                endpoint: {
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'avg_ms': round(stats['total_ms'] / stats['count'], 2),
+                    'max_ms': round(stats['max_ms'], 2),
+                }
+                for endpoint, stats in cls._metrics.items()
+            }
+
     @staticmethod
-    def get_access_token():
-        url = "https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
+    def base_url():
+        # MPESA_API_BASE_URL lets tests and local development point at a stub server
+        override = getattr(settings, 'MPESA_API_BASE_URL', None)
+        if override:
+            return override.rstrip('/')
         if settings.MPESA_ENVIRONMENT == 'production':
-            url = "https://api.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials"
+            return "https://api.safaricom.co.ke"
+        return "https://sandbox.safaricom.co.ke"
+
+    @staticmethod
+    def get_access_token():
+        """
+        Returns a Daraja OAuth token from the shared cache (CACHES['shared']),
+        fetching a new one only when the cached token is within
+        MPESA_TOKEN_REFRESH_MARGIN seconds of expiry. Refreshes are single-flight
+        within a process, and across processes via a cache.add() lock; that lock
+        is atomic on Redis and best-effort on the file cache fallback. Callers
+        that lose the race keep using the still-valid token or wait briefly for
+        the new one.
+        """
+        cache = shared_cache()
+        cached = cache.get(MpesaService.TOKEN_CACHE_KEY)
+        if cached and not MpesaService._token_needs_refresh(cached):
+            return cached['token']
+
+        with MpesaService._token_lock:
+            cached = cache.get(MpesaService.TOKEN_CACHE_KEY)
+            if cached and not MpesaService._token_needs_refresh(cached):
+                return cached['token']
+
+            acquired = cache.add(MpesaService.TOKEN_LOCK_KEY, 1, MpesaService.TOKEN_LOCK_TIMEOUT)
+            if not acquired:
+                # Another worker is refreshing
+                if cached and cached['expires_at'] > time.time():
+                    return cached['token']
+                deadline = time.monotonic() + 5
+                while time.monotonic() < deadline:
+                    time.sleep(0.1)
+                    cached = cache.get(MpesaService.TOKEN_CACHE_KEY)
+                    if cached and not MpesaService._token_needs_refresh(cached):
+                        return cached['token']
+
+            try:
+                token_data = MpesaService._fetch_access_token()
+            finally:
+                if acquired:
+                    cache.delete(MpesaService.TOKEN_LOCK_KEY)
+
+            if not token_data:
+                # Keep using the old token if it has not actually expired yet
+                if cached and cached['expires_at'] > time.time():
+                    return cached['token']
+                return None
+
+            cache.set(MpesaService.TOKEN_CACHE_KEY, token_data, token_data['expires_in'])
+            return token_data['token']
+
+    @staticmethod
+    def _token_needs_refresh(cached):
+        margin = getattr(settings, 'MPESA_TOKEN_REFRESH_MARGIN', 300)
+        return cached['expires_at'] - margin <= time.time()
+
+    @staticmethod
+    def _fetch_access_token():
+        url = f"{MpesaService.base_url()}/oauth/v1/generate?grant_type=client_credentials"
             
         auth_str = f"{settings.MPESA_CONSUMER_KEY}:{settings.MPESA_CONSUMER_SECRET}"
         encoded_auth = base64.b64encode(auth_str.encode()).decode()
@@ -17,13 +164,25 @@ class MpesaService:
         headers = {"Authorization": f"Basic {encoded_auth}"}
         
         try:
-            response = requests.get(url, headers=headers)
+            response = MpesaService._request('GET', 'oauth', url, headers=headers)
             response.raise_for_status()
-            return response.json().get('access_token')
+            data = response.json()
+            expires_in = int(data.get('expires_in', 3599))
+            return {
+                'token': data.get('access_token'),
+                'expires_in': expires_in,
+                'expires_at': time.time() + expires_in,
+            }
         except Exception as e:
             print(f"Error getting M-Pesa access token: {str(e)}")
             return None
 
+    @staticmethod
+    def initiate_stk_push_async(user, phone_number, amount, subscription_tier):
+        """Queues the STK push on the Django-Q cluster so the web worker doesn't wait on Daraja."""
+        from django_q.tasks import async_task
+        async_task('users.tasks.initiate_stk_push_task', user.id, phone_number, amount, subscription_tier)
+
     @staticmethod
     def initiate_stk_push(user, phone_number, amount, subscription_tier):
         access_token = MpesaService.get_access_token()
@@ -40,9 +199,7 @@ class MpesaService:
         password_str = f"{settings.MPESA_SHORTCODE}{settings.MPESA_PASSKEY}{timestamp}"
         password = base64.b64encode(password_str.encode()).decode()
         
-        url = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-        if settings.MPESA_ENVIRONMENT == 'production':
-            url = "https://api.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
+        url = f"{MpesaService.base_url()}/mpesa/stkpush/v1/processrequest"
             
         headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
         
@@ -61,7 +218,7 @@ class MpesaService:
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers)
+            response = MpesaService._request('POST', 'stk_push', url, json=payload, headers=headers)
             res_json = response.json()
             
             if response.status_code == 200 and res_json.get('ResponseCode') == '0':
@@ -80,3 +237,54 @@ class MpesaService:
                 return False, res_json.get('ResponseDescription', 'STK Push failed')
         except Exception as e:
             return False, f"Error initiating STK Push: {str(e)}"
+
+    @staticmethod
+    def process_callback(stk_callback):
+        """
+        Applies an STK push result to its transaction and the user's subscription
+        in one transaction. The transaction row is locked and only a Pending one is
+        updated, and a receipt number is never applied twice, so Safaricom's
+        retries and duplicate deliveries are no-ops. Returns True if applied.
+        """
+        checkout_request_id = stk_callback.get('CheckoutRequestID')
+        if not checkout_request_id:
+            return False
+        result_code = stk_callback.get('ResultCode')
+        receipt_number = None
+        for item in stk_callback.get('CallbackMetadata', {}).get('Item', []):
+            if item.get('Name') == 'MpesaReceiptNumber':
+                receipt_number = item.get('Value')
+
+        with transaction.atomic():
+            mpesa_transaction = (
+                MpesaTransaction.objects.select_for_update()
+                .filter(checkout_request_id=checkout_request_id)
+                .first()
+            )
+            if mpesa_transaction is None:
+                print(f"M-Pesa callback for unknown CheckoutRequestID {checkout_request_id}")
+                return False
+            if mpesa_transaction.status != 'Pending':
+                return False
+            if receipt_number and MpesaTransaction.objects.filter(mpesa_receipt_number=receipt_number).exists():
+                return False
+
+            mpesa_transaction.result_code = result_code
+            mpesa_transaction.result_description = stk_callback.get('ResultDesc')
+            if result_code == 0:
+                # Payment Successful
+                mpesa_transaction.status = 'Success'
+                mpesa_transaction.mpesa_receipt_number = receipt_number
+
+                sub, created = Subscription.objects.select_for_update().get_or_create(user_id=mpesa_transaction.user_id)
+                sub.tier = mpesa_transaction.subscription_tier
+                sub.is_active = True
+                sub.start_date = timezone.now()
+                sub.expiry_date = timezone.now() + timedelta(days=90) # 3 months
+                sub.save()
+            else:
+                mpesa_transaction.status = 'Failed'
+            mpesa_transaction.save(update_fields=[
+                'status', 'result_code', 'result_description', 'mpesa_receipt_number', 'updated_at'
+            ])
+        return True
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from .models import Subscription
+
+
+def shared_cache():
+    """Cache visible to every web worker and the qcluster (see CACHES['shared'])."""
+    return caches[getattr(settings, 'SHARED_CACHE_ALIAS', 'shared')]
+
+
+class EntitlementService:
+    """
+    Looks up a user's subscription tier and expiry from the shared cache, falling
+    back to one query on a miss. Subscription saves and deletes invalidate the entry
+    (see users.signals), and for_request() memoizes the result on the request so
+    a view and its template share a single lookup.
+    """
+
+    @staticmethod
+    def cache_key(user_id):
+        return f"users:entitlement:{user_id}"
+
+    @classmethod
+    def get(cls, user):
+        """Returns {'tier', 'is_active', 'expiry_date'}, or None if the user has no subscription."""
+        if not user.is_authenticated:
+            return None
+
+        key = cls.cache_key(user.pk)
+        entitlement = shared_cache().get(key)
+        if entitlement is None:
+            subscription = (
+                Subscription.objects.filter(user_id=user.pk)
+                .values('tier', 'is_active', 'expiry_date')
+                .first()
+            )
+            # Cache "no subscription" too, so free users don't query every time
+            entitlement = subscription or {}
+            shared_cache().set(key, entitlement, getattr(settings, 'ENTITLEMENT_CACHE_TIMEOUT', 600))
+        return entitlement or None
+
+    @classmethod
+    def for_request(cls, request):
+        if not hasattr(request, '_entitlement'):
+            request._entitlement = cls.get(request.user)
+        return request._entitlement
+
+    @staticmethod
+    def is_active(entitlement):
+        # Expiry is checked at call time so a cached entry never outlives it
+        if not entitlement or not entitlement['is_active']:
+            return False
+        expiry_date = entitlement['expiry_date']
+        return expiry_date is None or expiry_date > timezone.now()
+
+    @classmethod
+    def has_active_subscription(cls, request):
+        return cls.is_active(cls.for_request(request))
+
+    @classmethod
+    def active_tier(cls, request):
+        entitlement = cls.for_request(request)
+        return entitlement['tier'] if cls.is_active(entitlement) else None
+
+    @classmethod
+    def invalidate(cls, *user_ids):
+        shared_cache().delete_many([cls.cache_key(user_id) for user_id in user_ids])
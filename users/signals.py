@@ -1,8 +1,37 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
-from .models import MyUser, PersonalProfile
+from .models import Education, MySkill, MyUser, PersonalProfile, Subscription, UserDocument, WorkExperience
 
 @receiver(post_save, sender=MyUser)
 def create_personal_profile(sender, instance, created, **kwargs):
     if created:
         PersonalProfile.objects.create(user=instance)
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_entitlement(sender, instance, **kwargs):
+    from .services import EntitlementService
+    # After commit, so a concurrent request can't re-cache the old row
+    transaction.on_commit(lambda: EntitlementService.invalidate(instance.user_id))
+
+@receiver(post_save, sender=MySkill)
+@receiver(post_delete, sender=MySkill)
+@receiver(post_save, sender=WorkExperience)
+@receiver(post_delete, sender=WorkExperience)
+@receiver(post_save, sender=Education)
+@receiver(post_delete, sender=Education)
+@receiver(post_save, sender=UserDocument)
+@receiver(post_delete, sender=UserDocument)
+def refresh_job_recommendations(sender, instance, **kwargs):
+    # Only documents with extracted text feed the CV part of the score
+    if sender is UserDocument and not instance.extracted_content:
+        return
+    from jobs.tasks import schedule_recommendation_refresh
+    schedule_recommendation_refresh(instance.user_id)
+
+@receiver(m2m_changed, sender=PersonalProfile.preferred_categories.through)
+def refresh_job_recommendations_for_preferences(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, PersonalProfile):
+        from jobs.tasks import schedule_recommendation_refresh
+        schedule_recommendation_refresh(instance.user_id)
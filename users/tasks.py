@@ -0,0 +1,44 @@
+import json
+import uuid
+from .models import MpesaTransaction, MyUser
+from .mpesa_service import MpesaService
+
+def initiate_stk_push_task(user_id, phone_number, amount, subscription_tier):
+    try:
+        user = MyUser.objects.get(id=user_id)
+    except MyUser.DoesNotExist:
+        print(f"User with ID {user_id} not found for STK push task.")
+        return False
+
+    success, message = MpesaService.initiate_stk_push(user, phone_number, amount, subscription_tier)
+    if not success:
+        print(f"STK push for user {user_id} failed: {message}")
+        record_stk_push_failure(user, phone_number, amount, subscription_tier, message)
+    return success
+
+def record_stk_push_failure(user, phone_number, amount, subscription_tier, message):
+    """
+    The view already told the user the request was sent, so a push that never
+    reached Daraja is saved as a Failed transaction (shown on the subscription
+    page) and logged to AutomationLog.
+    """
+    from jobs.models import AutomationLog
+    # Daraja never issued a CheckoutRequestID, so use a local one
+    MpesaTransaction.objects.create(
+        user=user,
+        phone_number=phone_number[:15],
+        amount=amount,
+        checkout_request_id=f"failed-{uuid.uuid4().hex}",
+        merchant_request_id='',
+        subscription_tier=subscription_tier,
+        status='Failed',
+        result_description=message,
+    )
+    AutomationLog.objects.create(
+        user=user,
+        action="M-Pesa STK push failed",
+        details=json.dumps({'subscription_tier': subscription_tier, 'amount': str(amount), 'error': message}),
+    )
+
+def process_mpesa_callback_task(stk_callback):
+    return MpesaService.process_callback(stk_callback)
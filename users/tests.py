@@ -1,3 +1,271 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .models import MyUser, MpesaTransaction, Subscription
+from .mpesa_service import MpesaService
+from .services import EntitlementService, shared_cache
+from .tasks import initiate_stk_push_task
+from jobs.models import AutomationLog
 
-# Create your tests here.
+
+class _DarajaStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.client_ports.append(self.client_address[1])
+        if server.fail_next:
+            server.fail_next -= 1
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        with server.counter_lock:
+            server.token_requests += 1
+            count = server.token_requests
+        time.sleep(server.delay)
+        body = json.dumps({'access_token': f'token-{count}', 'expires_in': str(server.expires_in)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MpesaAccessTokenTests(TestCase):
+    """Runs MpesaService against a local stub of the Daraja OAuth endpoint."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _DarajaStubHandler)
+        self.server.token_requests = 0
+        self.server.counter_lock = threading.Lock()
+        self.server.delay = 0
+        self.server.expires_in = 3599
+        self.server.fail_next = 0
+        self.server.client_ports = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        settings_override = override_settings(
+            MPESA_API_BASE_URL=f'http://127.0.0.1:{self.server.server_port}',
+            MPESA_CONSUMER_KEY='key',
+            MPESA_CONSUMER_SECRET='secret',
+            MPESA_TOKEN_REFRESH_MARGIN=300,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        shared_cache().delete(MpesaService.TOKEN_CACHE_KEY)
+        shared_cache().delete(MpesaService.TOKEN_LOCK_KEY)
+        MpesaService.reset_session()
+        MpesaService._metrics.clear()
+
+    def tearDown(self):
+        MpesaService.reset_session()
+        self.server.shutdown()
+        self.server.server_close()
+        shared_cache().delete(MpesaService.TOKEN_CACHE_KEY)
+
+    def test_token_is_cached_until_refresh_margin(self):
+        self.assertEqual(MpesaService.get_access_token(), 'token-1')
+        self.assertEqual(MpesaService.get_access_token(), 'token-1')
+        self.assertEqual(self.server.token_requests, 1)
+
+        # Move the cached token inside the refresh margin
+        cached = shared_cache().get(MpesaService.TOKEN_CACHE_KEY)
+        cached['expires_at'] = time.time() + 60
+        shared_cache().set(MpesaService.TOKEN_CACHE_KEY, cached, 60)
+
+        self.assertEqual(MpesaService.get_access_token(), 'token-2')
+        self.assertEqual(self.server.token_requests, 2)
+
+    def test_concurrent_callers_share_one_refresh(self):
+        self.server.delay = 0.2
+        results = []
+
+        def fetch():
+            results.append(MpesaService.get_access_token())
+
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['token-1'] * 8)
+        self.assertEqual(self.server.token_requests, 1)
+
+    def test_valid_token_is_kept_when_refresh_fails(self):
+        shared_cache().set(MpesaService.TOKEN_CACHE_KEY, {
+            'token': 'old-token',
+            'expires_in': 60,
+            'expires_at': time.time() + 60,
+        }, 60)
+        self.server.shutdown()
+        self.server.server_close()
+
+        self.assertEqual(MpesaService.get_access_token(), 'old-token')
+
+    def test_session_keeps_connection_alive(self):
+        MpesaService.get_access_token()
+        shared_cache().delete(MpesaService.TOKEN_CACHE_KEY)
+        MpesaService.get_access_token()
+
+        self.assertEqual(self.server.token_requests, 2)
+        self.assertEqual(len(set(self.server.client_ports)), 1)
+
+    def test_token_request_is_retried_on_server_error(self):
+        self.server.fail_next = 1
+        self.assertEqual(MpesaService.get_access_token(), 'token-1')
+        self.assertEqual(len(self.server.client_ports), 2)
+
+    @override_settings(MPESA_READ_TIMEOUT=0.2, MPESA_MAX_RETRIES=0)
+    def test_slow_api_times_out_and_is_recorded(self):
+        self.server.delay = 1
+        started = time.monotonic()
+        self.assertIsNone(MpesaService.get_access_token())
+        self.assertLess(time.monotonic() - started, 1)
+
+        stats = MpesaService.latency_stats()['oauth']
+        self.assertEqual(stats['count'], 1)
+        self.assertEqual(stats['errors'], 1)
+
+
+class SubscriptionPageTests(TestCase):
+    def setUp(self):
+        self.user = MyUser.objects.create_user(email='payer@example.com', password='password')
+        self.client.force_login(self.user)
+
+    @override_settings(MPESA_ASYNC_STK_PUSH=True)
+    def test_stk_push_is_queued(self):
+        with patch('django_q.tasks.async_task') as async_task:
+            response = self.client.post(reverse('subscription_page'), {'tier': 'Pro', 'phone_number': '0712345678'})
+
+        self.assertEqual(response.status_code, 302)
+        async_task.assert_called_once_with(
+            'users.tasks.initiate_stk_push_task', self.user.id, '0712345678', 500, 'Pro'
+        )
+
+    def test_failed_queued_push_is_shown_and_logged(self):
+        with patch('users.mpesa_service.MpesaService.initiate_stk_push', return_value=(False, 'Invalid phone number')):
+            self.assertFalse(initiate_stk_push_task(self.user.id, '0712345678', 500, 'Pro'))
+
+        failed = MpesaTransaction.objects.get(user=self.user)
+        self.assertEqual(failed.status, 'Failed')
+        self.assertEqual(failed.result_description, 'Invalid phone number')
+        self.assertTrue(AutomationLog.objects.filter(user=self.user, action="M-Pesa STK push failed").exists())
+        response = self.client.get(reverse('subscription_page'))
+        self.assertContains(response, 'Your Pro payment did not go through: Invalid phone number')
+
+
+class MpesaCallbackTests(TestCase):
+    def setUp(self):
+        self.user = MyUser.objects.create_user(email='payer@example.com', password='password')
+        self.transaction = MpesaTransaction.objects.create(
+            user=self.user, phone_number='254712345678', amount=500,
+            checkout_request_id='ws_CO_1', merchant_request_id='m-1', subscription_tier='Pro'
+        )
+
+    def _post(self, checkout_request_id='ws_CO_1', result_code=0, receipt='QKX123'):
+        payload = {'Body': {'stkCallback': {
+            'MerchantRequestID': 'm-1',
+            'CheckoutRequestID': checkout_request_id,
+            'ResultCode': result_code,
+            'ResultDesc': 'The service request is processed successfully.',
+            'CallbackMetadata': {'Item': [
+                {'Name': 'Amount', 'Value': 500},
+                {'Name': 'MpesaReceiptNumber', 'Value': receipt},
+            ]},
+        }}}
+        return self.client.post(reverse('mpesa_callback'), json.dumps(payload), content_type='application/json')
+
+    def test_success_activates_subscription(self):
+        response = self._post()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['ResultCode'], 0)
+
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, 'Success')
+        self.assertEqual(self.transaction.mpesa_receipt_number, 'QKX123')
+        subscription = Subscription.objects.get(user=self.user)
+        self.assertEqual(subscription.tier, 'Pro')
+        self.assertTrue(subscription.is_active)
+
+    def test_duplicate_callback_is_not_reapplied(self):
+        self._post()
+        expiry = Subscription.objects.get(user=self.user).expiry_date
+
+        response = self._post()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Subscription.objects.get(user=self.user).expiry_date, expiry)
+
+    def test_receipt_is_only_applied_once(self):
+        self._post()
+        MpesaTransaction.objects.create(
+            user=self.user, phone_number='254712345678', amount=500,
+            checkout_request_id='ws_CO_2', merchant_request_id='m-2', subscription_tier='Ultimate'
+        )
+
+        self._post(checkout_request_id='ws_CO_2')
+        self.assertEqual(MpesaTransaction.objects.get(checkout_request_id='ws_CO_2').status, 'Pending')
+        self.assertEqual(Subscription.objects.get(user=self.user).tier, 'Pro')
+
+    def test_failed_payment_and_unknown_request_are_acknowledged(self):
+        self.assertEqual(self._post(checkout_request_id='ws_CO_missing').status_code, 200)
+
+        self._post(result_code=1032, receipt=None)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, 'Failed')
+        self.assertFalse(Subscription.objects.filter(user=self.user).exists())
+
+
+class EntitlementServiceTests(TestCase):
+    def setUp(self):
+        self.user = MyUser.objects.create_user(email='member@example.com', password='password')
+        shared_cache().delete(EntitlementService.cache_key(self.user.pk))
+
+    def _request(self):
+        request = RequestFactory().get('/')
+        request.user = MyUser.objects.get(pk=self.user.pk)
+        return request
+
+    def test_lookup_is_cached_and_memoized(self):
+        Subscription.objects.create(user=self.user, tier='Pro', expiry_date=timezone.now() + timedelta(days=30))
+        request = self._request()
+        with self.assertNumQueries(1):
+            self.assertTrue(EntitlementService.has_active_subscription(request))
+            self.assertEqual(EntitlementService.active_tier(request), 'Pro')
+        second_request = self._request()
+        with self.assertNumQueries(0):
+            self.assertTrue(EntitlementService.has_active_subscription(second_request))
+
+    def test_expired_and_missing_subscriptions_are_inactive(self):
+        self.assertFalse(EntitlementService.has_active_subscription(self._request()))
+        second_request = self._request()
+        with self.assertNumQueries(0):
+            self.assertFalse(EntitlementService.has_active_subscription(second_request))
+
+        # The save invalidates the cached "no subscription", so the expired row is read back
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.create(user=self.user, tier='Pro', expiry_date=timezone.now() - timedelta(days=1))
+        request = self._request()
+        with self.assertNumQueries(1):
+            self.assertFalse(EntitlementService.has_active_subscription(request))
+            self.assertIsNone(EntitlementService.active_tier(request))
+        self.assertEqual(EntitlementService.for_request(request)['tier'], 'Pro')
+
+    def test_subscription_save_invalidates_cache(self):
+        subscription = Subscription.objects.create(user=self.user, tier='Basic', is_active=False)
+        self.assertFalse(EntitlementService.has_active_subscription(self._request()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription.is_active = True
+            subscription.save()
+        self.assertTrue(EntitlementService.has_active_subscription(self._request()))
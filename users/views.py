@@ -1,10 +1,11 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
 from django.urls import reverse
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
+from django.conf import settings
 from .forms import (
     SignupForm, LoginForm, ProfileUpdateForm, WorkExperienceForm, 
     EducationForm, MySkillForm, UserDocumentForm, JobPreferenceForm
@@ -337,6 +338,9 @@ def subscription_page(request):
             amount = pricing[tier]
             if not phone_number:
                 messages.error(request, "Please provide a valid phone number for M-Pesa payment.")
+            elif getattr(settings, 'MPESA_ASYNC_STK_PUSH', False):
+                MpesaService.initiate_stk_push_async(request.user, phone_number, amount, tier)
+                messages.success(request, "Payment request sent. Please check your phone to complete the M-Pesa payment.")
             else:
                 success, message = MpesaService.initiate_stk_push(request.user, phone_number, amount, tier)
                 if success:
@@ -345,55 +349,34 @@ def subscription_page(request):
                     messages.error(request, message)
             return redirect('subscription_page')
             
+    # Surfaces a payment that failed after the request was accepted (e.g. a queued STK push)
+    latest_payment = request.user.mpesa_transactions.order_by('-created_at').first()
     return render(request, 'users/subscription.html', {
         'subscription': subscription,
-        'tiers': Subscription.TIER_CHOICES
+        'tiers': Subscription.TIER_CHOICES,
+        'failed_payment': latest_payment if latest_payment and latest_payment.status == 'Failed' else None,
     })
 
+# Safaricom only needs to know the callback was received
+MPESA_CALLBACK_ACK = b'{"ResultCode": 0, "ResultDesc": "Accepted"}'
+
 @csrf_exempt
 def mpesa_callback(request):
-    if request.method == 'POST':
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    try:
         data = json.loads(request.body)
         stk_callback = data.get('Body', {}).get('stkCallback', {})
-        
-        result_code = stk_callback.get('ResultCode')
-        checkout_request_id = stk_callback.get('CheckoutRequestID')
-        merchant_request_id = stk_callback.get('MerchantRequestID')
-        result_desc = stk_callback.get('ResultDesc')
-        
-        try:
-            transaction = MpesaTransaction.objects.get(checkout_request_id=checkout_request_id)
-            transaction.result_code = result_code
-            transaction.result_description = result_desc
-            
-            if result_code == 0:
-                # Payment Successful
-                transaction.status = 'Success'
-                # Extract details from CallbackMetadata
-                items = stk_callback.get('CallbackMetadata', {}).get('Item', [])
-                for item in items:
-                    if item.get('Name') == 'MpesaReceiptNumber':
-                        transaction.mpesa_receipt_number = item.get('Value')
-                
-                # Update/Create Subscription
-                from django.utils import timezone
-                from datetime import timedelta
-                
-                sub, created = Subscription.objects.get_or_create(user=transaction.user)
-                sub.tier = transaction.subscription_tier
-                sub.is_active = True
-                sub.start_date = timezone.now()
-                sub.expiry_date = timezone.now() + timedelta(days=90) # 3 months
-                sub.save()
-            else:
-                transaction.status = 'Failed'
-                
-            transaction.save()
-            return render(request, 'users/callback_success.html', status=200) # Simple response for Safaricom
-        except MpesaTransaction.DoesNotExist:
-            return render(request, 'users/callback_error.html', status=404)
-            
-    return render(request, 'users/callback_error.html', status=405)
+    except (ValueError, AttributeError):
+        return HttpResponseBadRequest()
+
+    if getattr(settings, 'MPESA_CALLBACK_ASYNC', False):
+        from django_q.tasks import async_task
+        async_task('users.tasks.process_mpesa_callback_task', stk_callback)
+    else:
+        MpesaService.process_callback(stk_callback)
+    return HttpResponse(MPESA_CALLBACK_ACK, content_type='application/json')
 
 @login_required
 def payment_history(request):